@@ -10,6 +10,8 @@ from typing import List, Dict, Optional
 # from tableau_client import TableauClient
 
 from .tableau_client import TableauClient
+from .multipart_body import MultipartMixedBody
+from .file_upload import FileUpload, needs_chunked_upload
 
 
 
@@ -99,45 +101,38 @@ class DatasourceManager:
         # Build multipart payload
         boundary = "boundary_string"
         
-        xml_part = (
-            f'--{boundary}\r\n'
-            f'Content-Disposition: name="request_payload"\r\n'
-            f'Content-Type: text/xml\r\n\r\n'
+        xml_request = (
             f'<tsRequest>'
             f'<datasource name="{datasource_name}">'
             f'<project id="{project_id}"/>'
             f'</datasource>'
-            f'</tsRequest>\r\n'
+            f'</tsRequest>'
         )
         
-        file_header = (
-            f'--{boundary}\r\n'
-            f'Content-Disposition: name="tableau_datasource"; '
-            f'filename="{file_path.name}"\r\n'
-            f'Content-Type: application/octet-stream\r\n\r\n'
-        )
-        
-        # Read file content
-        with open(file_path, "rb") as f:
-            file_content = f.read()
-        
-        # Combine parts
-        payload = (
-            xml_part.encode('utf-8') +
-            file_header.encode('utf-8') +
-            file_content +
-            f'\r\n--{boundary}--\r\n'.encode('utf-8')
-        )
+        # XML payload, then the file streamed in chunks, then the closing boundary
+        payload = MultipartMixedBody(boundary, xml_request, "tableau_datasource", file_path)
         
         # Prepare endpoint
         endpoint = f"/sites/{self.client.site_id}/datasources"
+        params = []
         if overwrite:
-            endpoint += "?overwrite=true"
+            params.append("overwrite=true")
+        
+        logger.info(f"File size: {file_path.stat().st_size} bytes")
+        if needs_chunked_upload(payload):
+            # Over the single-request limit: upload the file in parts, then publish the upload session
+            upload_session_id = FileUpload(self.client, file_path).upload()
+            params.append(f"uploadSessionId={upload_session_id}")
+            params.append(f"datasourceType={file_path.suffix.lstrip('.').lower()}")
+            payload = MultipartMixedBody(boundary, xml_request)
+        
+        if params:
+            endpoint += "?" + "&".join(params)
         
         # Custom headers for multipart
         headers = {
             "X-Tableau-Auth": self.client.token,
-            "Content-Type": f"multipart/mixed; boundary={boundary}",
+            "Content-Type": payload.content_type,
             "Accept": "application/json"
         }
         
@@ -0,0 +1,182 @@
+"""
+Chunked publishing through Tableau's fileUploads API
+
+A single publish request is capped at 64 MB, which extract-backed .tdsx /
+.twbx files often exceed. Larger files are uploaded in parts first:
+
+    POST /sites/{site}/fileUploads                    -> uploadSessionId
+    PUT  /sites/{site}/fileUploads/{uploadSessionId}  one per part, in order
+    POST /sites/{site}/workbooks|datasources?uploadSessionId=...   (the publish commit)
+
+`FileUpload` runs the first two steps. Parts are appended strictly in order
+(the server concatenates them as they arrive, so they cannot be sent in
+parallel); parallelism comes from uploading several files at once, bounded by
+the per-site cap of the migration DAG.
+
+- A part that fails with a transient error (connection error, timeout, 429,
+  5xx) is retried with backoff from the last acknowledged part; earlier parts
+  are never sent again.
+- The file size the server reports after each part (whole megabytes) is
+  checked against the bytes acknowledged so far: it must be that size, or
+  one of the two megabyte values around it when it does not fall on a
+  megabyte boundary. A mismatch (e.g. a part applied twice after a lost
+  response) or an expired upload session (404) restarts the upload in a new
+  session, at most `max_part_retries` times.
+- When the retries of a part run out, `UploadInterrupted` carries the
+  `FileUpload`; calling `upload()` on it again resumes after the last
+  acknowledged part.
+
+Usage:
+    if needs_chunked_upload(body):
+        upload_session_id = FileUpload(client, file_path).upload()
+"""
+
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Optional
+
+import requests
+
+from util.config_managers.tableau_reader import TableauConfigManager
+
+from .multipart_body import MultipartMixedBody
+from .tableau_client import TableauClient
+
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+_settings = TableauConfigManager().get_file_upload_settings()
+
+
+class UploadInterrupted(Exception):
+    """A part could not be appended; `upload.upload()` resumes after the last acknowledged part"""
+
+    def __init__(self, upload: "FileUpload", cause: Exception):
+        super().__init__(
+            f"Upload of {upload.file_path.name} interrupted after "
+            f"{upload.acknowledged_parts}/{upload.part_count} parts: {cause}"
+        )
+        self.upload = upload
+        self.cause = cause
+
+
+def needs_chunked_upload(body: MultipartMixedBody) -> bool:
+    """True when a publish body exceeds the single-request limit"""
+    return len(body) > _settings['single_request_max_mb'] * MB
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+
+class FileUpload:
+    """One file uploaded in parts through a fileUploads session"""
+
+    def __init__(self, client: TableauClient, file_path: Path, chunk_size: Optional[int] = None,
+                 max_part_retries: Optional[int] = None, retry_backoff_seconds: Optional[float] = None):
+        self.client = client
+        self.file_path = Path(file_path)
+        self.chunk_size = chunk_size or int(_settings['chunk_size_mb'] * MB)
+        self.max_part_retries = _settings['max_part_retries'] if max_part_retries is None else max_part_retries
+        self.retry_backoff_seconds = (_settings['retry_backoff_seconds']
+                                      if retry_backoff_seconds is None else retry_backoff_seconds)
+        self.file_size = self.file_path.stat().st_size
+        self.part_count = max(1, -(-self.file_size // self.chunk_size))
+        self.upload_session_id: Optional[str] = None
+        self.acknowledged_parts = 0
+        self.restarts = 0
+
+    def _endpoint(self) -> str:
+        endpoint = f"/sites/{self.client.site_id}/fileUploads"
+        if self.upload_session_id:
+            endpoint += f"/{self.upload_session_id}"
+        return endpoint
+
+    def _initiate(self):
+        self.upload_session_id = None
+        response = self.client.post(self._endpoint())
+        self.upload_session_id = response.json()['fileUpload']['uploadSessionId']
+        self.acknowledged_parts = 0
+        logger.info(f"Upload session {self.upload_session_id} opened for {self.file_path.name} "
+                    f"({self.file_size} bytes, {self.part_count} parts)")
+
+    def _append(self, index: int) -> Optional[float]:
+        """Append part `index`; returns the file size (MB) reported by the server"""
+        offset = index * self.chunk_size
+        body = MultipartMixedBody("boundary_string", "", "tableau_file", self.file_path,
+                                  offset=offset, length=min(self.chunk_size, self.file_size - offset))
+        headers = {
+            "X-Tableau-Auth": self.client.token,
+            "Content-Type": body.content_type,
+            "Accept": "application/json"
+        }
+        response = self.client.request("PUT", self._endpoint(), custom_headers=headers, data=body)
+        try:
+            return float(response.json()['fileUpload']['fileSize'])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _acknowledged_bytes(self) -> int:
+        return min(self.acknowledged_parts * self.chunk_size, self.file_size)
+
+    def _restart(self, reason: str):
+        self.restarts += 1
+        if self.restarts > self.max_part_retries:
+            raise UploadInterrupted(self, RuntimeError(reason))
+        logger.warning(f"{reason}; restarting upload of {self.file_path.name}")
+        self._initiate()
+
+    def _size_matches(self, reported_mb: Optional[float]) -> bool:
+        if reported_mb is None:
+            return True
+        expected_mb = self._acknowledged_bytes() / MB
+        # Whole megabytes are reported: inside a megabyte either rounding is fine, on a boundary only the exact size
+        return reported_mb == expected_mb or reported_mb in (math.floor(expected_mb), math.ceil(expected_mb))
+
+    def upload(self) -> str:
+        """Upload every part not yet acknowledged; returns the uploadSessionId to publish with"""
+        if self.upload_session_id is None:
+            self._initiate()
+
+        failures = 0
+        while self.acknowledged_parts < self.part_count:
+            index = self.acknowledged_parts
+            try:
+                reported_mb = self._append(index)
+            except requests.exceptions.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    self._restart(f"Upload session {self.upload_session_id} expired")
+                    continue
+                if not _is_transient(e):
+                    raise
+                error = e
+            except requests.exceptions.RequestException as e:
+                if not _is_transient(e):
+                    raise
+                error = e
+            else:
+                self.acknowledged_parts += 1
+                failures = 0
+                if not self._size_matches(reported_mb):
+                    self._restart(f"Server reports {reported_mb} MB after part {index + 1}, "
+                                  f"expected {self._acknowledged_bytes() / MB:.1f} MB")
+                    continue
+                logger.info(f"Uploaded part {index + 1}/{self.part_count} of {self.file_path.name}")
+                continue
+
+            failures += 1
+            if failures > self.max_part_retries:
+                raise UploadInterrupted(self, error) from error
+            delay = self.retry_backoff_seconds * 2 ** (failures - 1)
+            logger.warning(f"Part {index + 1}/{self.part_count} of {self.file_path.name} failed ({error}), "
+                           f"retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        return self.upload_session_id
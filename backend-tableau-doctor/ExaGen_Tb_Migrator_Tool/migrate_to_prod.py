@@ -3,15 +3,19 @@ from pathlib import Path
 from dotenv import load_dotenv
 from typing import List, Dict, Tuple
 import getpass
+import shutil
 
 
 from .config import Config
-from .tableau_client import TableauClient
+from .session_manager import tableau_sessions
 from .datasource_manager import DatasourceManager
 from .workbook_manager import WorkbookManager
 from .connection_manager import ConnectionManager
+from .migration_dag import MigrationDag, RUNNING, DONE, FAILED
+from util.config_managers.tableau_reader import TableauConfigManager
 from datetime import datetime
 import time
+import uuid
 
 from urllib.parse import unquote_plus
 
@@ -25,208 +29,199 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def publish_progress(progress_channel, task_id, update, replace=False):
+    """Push a progress update to the SSE subscribers of a task (no-op outside the API)."""
+    if progress_channel is not None and task_id:
+        progress_channel.publish(task_id, update, replace=replace)
+
+
 def migrate_multiple_datasources_and_workbook_interactive(
     dev_datasource_ids: List[str],
     dev_workbook_id: str,
     prod_project_id: str,
     datasource_db_configs: Dict[str, Dict[str, str]],
     task_id: str = None,
-    progress_store: dict = None
+    progress_channel=None
 ):
     """
     Migrate multiple datasources and a workbook from dev to prod.
+
+    The steps run as a dependency graph (see migration_dag): all downloads
+    start at once, each datasource is published as soon as it is downloaded
+    and its connection updated right after, the workbook references are
+    rewritten once every datasource mapping is known, and the workbook is
+    published last. REST calls against one site are capped by
+    `max_site_concurrency`.
     """
-    output_dir = Path("./downloads")
-    output_dir.mkdir(exist_ok=True)
+    # Per-migration directory, removed when the migration ends; every download gets
+    # its own subdirectory below it, as file names come from Content-Disposition
+    output_dir = Path("./downloads") / (task_id or uuid.uuid4().hex)
 
-    datasource_mapping = {}
-    datasource_info = []
     total_datasources = len(dev_datasource_ids)
 
     logger.info("=" * 80)
-    logger.info(f"STARTING INTERACTIVE MULTI-DATASOURCE MIGRATION")
+    logger.info(f"STARTING MULTI-DATASOURCE MIGRATION")
     logger.info(f"Total datasources: {total_datasources}")
     logger.info("=" * 80)
 
+    # Every step (and every concurrent migration) shares one signed-in session per
+    # environment; resolving both up front fails fast on missing credentials
+    tableau_sessions.get('dev')
+    tableau_sessions.get('prod')
+
     dev_config = Config.from_env('dev')
     prod_config = Config.from_env('prod')
-
-    # PHASE 1: MIGRATE ALL DATASOURCES
-    for idx, dev_ds_id in enumerate(dev_datasource_ids, 1):
-        logger.info("\n" + "=" * 80)
-        logger.info(f"DATASOURCE {idx}/{total_datasources}")
-        logger.info("=" * 80)
-
-        try:
-            # Step 1: Download from Dev
-            stage_base = 10 + ((idx - 1) * 10)
-            
-            # Initial progress update for this datasource
-            if progress_store is not None and task_id in progress_store:
-                progress_store[task_id].update({
-                    "stage": stage_base,
-                    "message": f"Starting datasource {idx} of {total_datasources}",
-                    "status": "in_progress",
-                    "total_datasources": total_datasources,
-                    "current_datasource": idx,
-                    "timestamp": datetime.now().isoformat()
-                })
-            
-            logger.info(f"\n--- Step 1.{idx}: Downloading Datasource from Dev ---")
-            with TableauClient(dev_config) as dev_client:
-                ds_manager = DatasourceManager(dev_client)
-                file_path = ds_manager.download_datasource(dev_ds_id, output_dir)
-                datasource_name = unquote_plus(file_path.stem)
-                logger.info(f"✓ Downloaded: {file_path.name}")
-                details = ds_manager.get_datasource_details(dev_ds_id)
-                old_content_url = details['contentUrl']
-                
-                # Update progress with datasource name
-                if progress_store is not None and task_id in progress_store:
-                    progress_store[task_id].update({
-                        "stage": stage_base + 1,
-                        "message": f"Downloading Datasource: {datasource_name} ({idx}/{total_datasources})",
-                        "current_datasource": idx,
-                        "total_datasources": total_datasources,
-                        "current_datasource_name": datasource_name
-                    })
-
-            # Step 2: Publish to Prod
-            if progress_store is not None and task_id in progress_store:
-                progress_store[task_id].update({
-                    "stage": stage_base + 4,
-                    "message": f"Publishing Datasource: {datasource_name} ({idx}/{total_datasources})",
-                    "current_datasource": idx,
-                    "current_datasource_name": datasource_name
-                })
-            
-            logger.info(f"\n--- Step 2.{idx}: Publishing Datasource to Prod ---")
-            with TableauClient(prod_config) as prod_client:
-                ds_manager_prod = DatasourceManager(prod_client)
-                result = ds_manager_prod.publish_datasource(
-                    file_path=file_path,
-                    datasource_name=datasource_name,
-                    project_id=prod_project_id,
-                    overwrite=True
-                )
-                new_datasource_id = result['id']
-                new_content_url = result['contentUrl']
-                logger.info(f"✓ Published successfully!")
-
-                # Step 3: Update Connection
-                if progress_store is not None and task_id in progress_store:
-                    progress_store[task_id].update({
-                        "stage": stage_base + 7,
-                        "message": f"Updating Connections: {datasource_name} ({idx}/{total_datasources})",
-                        "current_datasource": idx,
-                        "current_datasource_name": datasource_name
-                    })
-                
-                logger.info(f"\n--- Step 3.{idx}: Update Connection ---")
-                cfg = datasource_db_configs[dev_ds_id]
-                conn_manager = ConnectionManager(prod_client)
-                conn_manager.update_datasource_connection(
-                    datasource_id=new_datasource_id,
-                    server_address=cfg["host"],
-                    server_port=cfg["port"],
-                    username=cfg["username"],
-                    password=cfg["password"]
-                )
-                logger.info(f"✓ Connection updated successfully!")
-                
-                datasource_mapping[old_content_url] = new_content_url
-                datasource_info.append((datasource_name, cfg))
-
-        except Exception as e:
-            logger.error(f"❌ Failed to migrate datasource {dev_ds_id}: {e}", exc_info=True)
-            if progress_store is not None and task_id in progress_store:
-                progress_store[task_id].update({
-                    "stage": -1,
-                    "message": f"Failed at datasource {idx}/{total_datasources}: {str(e)}",
-                    "status": "failed"
-                })
-            raise
-
-    # PHASE 2: MIGRATE WORKBOOK
-    workbook_stage_base = 10 + (total_datasources * 10)
-    
-    logger.info("\n\n" + "=" * 80)
-    logger.info("PHASE 2: WORKBOOK MIGRATION")
-    logger.info("=" * 80)
-
-    try:
-        # Step 4: Download Workbook
-        if progress_store is not None and task_id in progress_store:
-            progress_store[task_id].update({
-                "stage": workbook_stage_base + 1,
-                "message": "Downloading Workbook"
-            })
-        
-        logger.info("\n--- Step 4: Downloading Workbook from Dev ---")
-        with TableauClient(dev_config) as dev_client:
-            wb_manager = WorkbookManager(dev_client)
-            wb_file_path = wb_manager.download_workbook(dev_workbook_id, output_dir)
-            workbook_name = unquote_plus(wb_file_path.stem)
-            logger.info(f"✓ Downloaded: {wb_file_path.name}")
-
-        # Step 5: Update References
-        if progress_store is not None and task_id in progress_store:
-            progress_store[task_id].update({
-                "stage": workbook_stage_base + 10,
-                "message": "Updating References"
-            })
-        
-        logger.info("\n--- Step 5: Updating Datasource References ---")
-        with TableauClient(dev_config) as dev_client:
-            wb_manager = WorkbookManager(dev_client)
-            wb_manager.update_datasource_references(wb_file_path, datasource_mapping)
-        logger.info("✓ References updated!")
-
-        # Step 6: Publish Workbook
-        if progress_store is not None and task_id in progress_store:
-            progress_store[task_id].update({
-                "stage": workbook_stage_base + 20,
-                "message": "Publishing Workbook"
-            })
-        
-        logger.info("\n--- Step 6: Publishing Workbook to Prod ---")
-        with TableauClient(prod_config) as prod_client:
-            wb_manager_prod = WorkbookManager(prod_client)
-            result = wb_manager_prod.publish_workbook(
-                file_path=wb_file_path,
-                workbook_name=workbook_name,
+    dev_site = f"{dev_config.server_url}|{dev_config.site_content_url}"
+    prod_site = f"{prod_config.server_url}|{prod_config.site_content_url}"
+    settings = TableauConfigManager().get_migration_dag_settings()
+
+    publish_progress(progress_channel, task_id, {
+        "stage": 10,
+        "message": f"Starting migration of {total_datasources} datasource(s) and the workbook",
+        "status": "in_progress",
+        "total_datasources": total_datasources,
+        "timestamp": datetime.now().isoformat()
+    })
+
+    # ---------------- steps ----------------
+    def download_datasource(dev_ds_id):
+        def run(_):
+            ds_manager = DatasourceManager(tableau_sessions.get('dev'))
+            file_path = ds_manager.download_datasource(dev_ds_id, output_dir / dev_ds_id)
+            details = ds_manager.get_datasource_details(dev_ds_id)
+            return {
+                "file_path": file_path,
+                "name": unquote_plus(file_path.stem),
+                "old_content_url": details['contentUrl'],
+            }
+        return run
+
+    def publish_datasource(dev_ds_id):
+        def run(results):
+            download = results[f"download_ds:{dev_ds_id}"]
+            result = DatasourceManager(tableau_sessions.get('prod')).publish_datasource(
+                file_path=download["file_path"],
+                datasource_name=download["name"],
                 project_id=prod_project_id,
                 overwrite=True
             )
-            workbook_url = result['webpageUrl']
-            logger.info(f"✓ Workbook published!")
-
-        # FINAL SUCCESS
-        if progress_store is not None and task_id in progress_store:
-            progress_store[task_id].update({
-                "stage": 100,
-                "status": "completed",
-                "message": "Migration completed successfully",
-                "workbook_url": workbook_url,
-                "web_url": workbook_url,
-                "timestamp": datetime.now().isoformat()
-            })
-
-        logger.info("\n" + "=" * 80)
-        logger.info("✅ MIGRATION COMPLETE")
-        logger.info("=" * 80)
-
-        return workbook_url, workbook_name, datasource_mapping
+            return {
+                "id": result['id'],
+                "content_url": result['contentUrl'],
+                "old_content_url": download["old_content_url"],
+            }
+        return run
+
+    def update_connection(dev_ds_id):
+        def run(results):
+            cfg = datasource_db_configs[dev_ds_id]
+            ConnectionManager(tableau_sessions.get('prod')).update_datasource_connection(
+                datasource_id=results[f"publish_ds:{dev_ds_id}"]["id"],
+                server_address=cfg["host"],
+                server_port=cfg["port"],
+                username=cfg["username"],
+                password=cfg["password"]
+            )
+        return run
+
+    def download_workbook(_):
+        return WorkbookManager(tableau_sessions.get('dev')).download_workbook(dev_workbook_id, output_dir / "workbook")
+
+    def build_mapping(results):
+        # old content URL -> new content URL, in selection order
+        return {
+            results[f"publish_ds:{ds_id}"]["old_content_url"]: results[f"publish_ds:{ds_id}"]["content_url"]
+            for ds_id in dev_datasource_ids
+        }
+
+    def rewrite_references(results):
+        wb_file_path = results["download_wb"]
+        datasource_mapping = build_mapping(results)
+        # Local XML rewrite: no REST call
+        WorkbookManager(tableau_sessions.get('dev')).update_datasource_references(wb_file_path, datasource_mapping)
+        return wb_file_path
+
+    def publish_workbook(results):
+        wb_file_path = results["rewrite_wb"]
+        result = WorkbookManager(tableau_sessions.get('prod')).publish_workbook(
+            file_path=wb_file_path,
+            workbook_name=unquote_plus(wb_file_path.stem),
+            project_id=prod_project_id,
+            overwrite=True
+        )
+        return result['webpageUrl']
+
+    # ---------------- graph ----------------
+    dag = MigrationDag(
+        max_workers=settings['max_workers'],
+        # Same site for dev and prod -> one shared cap
+        resource_limits={dev_site: settings['max_site_concurrency'], prod_site: settings['max_site_concurrency']},
+        on_update=lambda node, done, total: _publish_node_progress(progress_channel, task_id, dag, node, done, total),
+    )
+    # Steps start in insertion order when runnable: the workbook download goes first
+    dag.add("download_wb", download_workbook, resource=dev_site, label="Downloading workbook")
+    for idx, dev_ds_id in enumerate(dev_datasource_ids, 1):
+        label = f"datasource {idx}/{total_datasources}"
+        dag.add(f"download_ds:{dev_ds_id}", download_datasource(dev_ds_id),
+                resource=dev_site, label=f"Downloading {label}")
+        dag.add(f"publish_ds:{dev_ds_id}", publish_datasource(dev_ds_id),
+                deps=[f"download_ds:{dev_ds_id}"], resource=prod_site, label=f"Publishing {label}")
+        dag.add(f"connection:{dev_ds_id}", update_connection(dev_ds_id),
+                deps=[f"publish_ds:{dev_ds_id}"], resource=prod_site, label=f"Updating connections of {label}")
+    dag.add("rewrite_wb", rewrite_references,
+            deps=["download_wb"] + [f"publish_ds:{ds_id}" for ds_id in dev_datasource_ids],
+            label="Updating workbook references")
+    dag.add("publish_wb", publish_workbook,
+            deps=["rewrite_wb"] + [f"connection:{ds_id}" for ds_id in dev_datasource_ids],
+            resource=prod_site, label="Publishing workbook")
 
+    try:
+        results = dag.run()
     except Exception as e:
-        logger.error(f"❌ Workbook migration failed: {e}", exc_info=True)
-        if progress_store is not None and task_id in progress_store:
-            progress_store[task_id].update({
-                "stage": -1,
-                "message": f"Workbook migration failed: {str(e)}",
-                "status": "failed"
-            })
+        failed = [node.label for node in dag.nodes.values() if node.state == FAILED]
+        logger.error(f"❌ Migration failed at {', '.join(failed)}: {e}", exc_info=True)
+        publish_progress(progress_channel, task_id, {
+            "stage": -1,
+            "message": f"Failed at {', '.join(failed) or 'migration'}: {str(e)}",
+            "status": "failed"
+        })
         raise
+    finally:
+        # Downloaded and rewritten files are only needed until they are published
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    workbook_url = results["publish_wb"]
+    workbook_name = unquote_plus(results["rewrite_wb"].stem)
+    datasource_mapping = build_mapping(results)
+
+    # FINAL SUCCESS
+    publish_progress(progress_channel, task_id, {
+        "stage": 100,
+        "status": "completed",
+        "message": "Migration completed successfully",
+        "workbook_url": workbook_url,
+        "web_url": workbook_url,
+        "timestamp": datetime.now().isoformat()
+    })
+
+    logger.info("\n" + "=" * 80)
+    logger.info("✅ MIGRATION COMPLETE")
+    logger.info("=" * 80)
+
+    return workbook_url, workbook_name, datasource_mapping
+
+
+def _publish_node_progress(progress_channel, task_id, dag, node, done, total):
+    """Per-step progress: overall stage from the finished step count, plus every step's state."""
+    suffix = {RUNNING: "...", DONE: " - done", FAILED: " - failed"}.get(node.state, "")
+    publish_progress(progress_channel, task_id, {
+        "stage": 10 + int(85 * done / total),
+        "message": f"{node.label}{suffix}",
+        "status": "in_progress",
+        "current_step": node.name,
+        "steps": {name: {"label": step.label, "state": step.state} for name, step in dag.nodes.items()},
+    })
 
 from datetime import datetime
 
@@ -236,7 +231,7 @@ def full_migration(
     prod_project_id: str,
     datasource_db_configs: Dict[str, Dict[str, str]],
     task_id: str,
-    progress_store: dict
+    progress_channel
 ):
     """
     Entry point for FastAPI thread.
@@ -245,9 +240,10 @@ def full_migration(
 
     logger.info(f"[API] Migration started for task {task_id}")
 
-    if progress_store is not None and task_id in progress_store:
-        progress_store[task_id]["stage"] = 10
-        progress_store[task_id]["message"] = "Starting datasource migration"
+    publish_progress(progress_channel, task_id, {
+        "stage": 10,
+        "message": "Starting datasource migration"
+    })
 
     workbook_url, workbook_name, datasource_mapping = (
         migrate_multiple_datasources_and_workbook_interactive(
@@ -256,18 +252,17 @@ def full_migration(
             prod_project_id=prod_project_id,
             datasource_db_configs=datasource_db_configs,
             task_id=task_id,
-            progress_store=progress_store
+            progress_channel=progress_channel
         )
     )
 
-    progress_store[task_id] = {
+    publish_progress(progress_channel, task_id, {
         "stage": 100,
         "status": "completed",
         "message": "Migration completed successfully",
         "workbook_url": workbook_url,
         "timestamp": datetime.now().isoformat()
-
-    }
+    }, replace=True)
     # Summary
     logger.info("\n" + "=" * 60)
     logger.info(f"✅ MIGRATION COMPLETE: {workbook_name}")
@@ -288,7 +283,7 @@ def run_migration_from_api(
     prod_project_id: str,
     datasource_db_configs: Dict[str, Dict[str, str]],
     task_id: str,
-    progress_store: dict
+    progress_channel
 ):
     return full_migration(
         dev_datasource_ids=dev_datasource_ids,
@@ -296,7 +291,7 @@ def run_migration_from_api(
         prod_project_id=prod_project_id,
         datasource_db_configs=datasource_db_configs,
         task_id=task_id,
-        progress_store=progress_store
+        progress_channel=progress_channel
     )
 
 
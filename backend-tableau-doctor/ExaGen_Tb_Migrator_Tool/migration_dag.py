@@ -0,0 +1,162 @@
+"""
+Dependency-aware executor for migration steps
+
+A migration is a small DAG: downloads depend on nothing, a datasource publish
+depends on its download, its connection update on the publish, the workbook
+reference rewrite on the workbook download and every datasource publish, and
+the workbook publish on the rewrite and every connection update.
+`MigrationDag` runs each node as soon as its dependencies have finished, on a
+bounded thread pool, with an optional per-resource concurrency cap (e.g. at
+most N REST calls against one Tableau site at a time).
+
+- A node's function receives the results of its dependencies ({name: result}).
+- The first failing node stops the run: nothing new is started, running nodes
+  are waited for and the error is re-raised.
+- Resource caps must be at least 1; a run that ends with steps that never
+  started raises RuntimeError instead of returning partial results.
+- `on_update(node, done, total)` is called whenever a node starts, finishes or
+  fails (progress reporting).
+
+Usage:
+    dag = MigrationDag(max_workers=4, resource_limits={'site-a': 2})
+    dag.add('download', download_fn, resource='site-a')
+    dag.add('publish', publish_fn, deps=['download'], resource='site-a')
+    results = dag.run()      # {name: result}
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class DagNode:
+    """One migration step"""
+    __slots__ = ("name", "fn", "deps", "resource", "label", "state", "result")
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Iterable[str],
+                 resource: Optional[str], label: Optional[str]):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.resource = resource
+        self.label = label or name
+        self.state = PENDING
+        self.result = None
+
+
+class MigrationDag:
+    """Runs DagNodes in dependency order, in parallel where possible"""
+
+    def __init__(self, max_workers: int = 4, resource_limits: Optional[Dict[str, int]] = None,
+                 on_update: Optional[Callable[[DagNode, int, int], None]] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.resource_limits = dict(resource_limits or {})
+        for resource, limit in self.resource_limits.items():
+            # A cap below 1 would never let the resource's steps start
+            if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+                raise ValueError(f"Concurrency cap for {resource} must be an integer >= 1, got {limit!r}")
+        self.on_update = on_update
+        self.nodes: Dict[str, DagNode] = {}
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = (),
+            resource: Optional[str] = None, label: Optional[str] = None) -> DagNode:
+        """Register a step; `fn(dep_results)` runs once every node in `deps` is done"""
+        if name in self.nodes:
+            raise ValueError(f"Duplicate migration step: {name}")
+        node = self.nodes[name] = DagNode(name, fn, deps, resource, label)
+        return node
+
+    def _check(self):
+        # Unknown dependencies and cycles are programming errors: fail before anything runs
+        for node in self.nodes.values():
+            missing = [dep for dep in node.deps if dep not in self.nodes]
+            if missing:
+                raise ValueError(f"Step {node.name} depends on unknown steps {missing}")
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Migration steps form a cycle through {name}")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def _notify(self, node: DagNode, done: int):
+        if self.on_update is not None:
+            try:
+                self.on_update(node, done, len(self.nodes))
+            except Exception as e:
+                logger.warning(f"Progress callback failed for {node.name}: {e}")
+
+    def _startable(self, node: DagNode, in_flight: Dict[str, int]) -> bool:
+        if node.state != PENDING:
+            return False
+        if any(self.nodes[dep].state != DONE for dep in node.deps):
+            return False
+        limit = self.resource_limits.get(node.resource)
+        return limit is None or in_flight.get(node.resource, 0) < limit
+
+    def run(self) -> Dict[str, Any]:
+        """Run every step; returns {name: result} or raises the first step error"""
+        self._check()
+        done = 0
+        error = None
+        in_flight: Dict[str, int] = {}  # resource -> running steps
+        futures = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="migration") as pool:
+            while True:
+                # Start every step whose dependencies are done, within the worker / resource caps
+                if error is None:
+                    for node in self.nodes.values():
+                        if len(futures) >= self.max_workers:
+                            break
+                        if self._startable(node, in_flight):
+                            node.state = RUNNING
+                            in_flight[node.resource] = in_flight.get(node.resource, 0) + 1
+                            dep_results = {dep: self.nodes[dep].result for dep in node.deps}
+                            futures[pool.submit(node.fn, dep_results)] = node
+                            logger.info(f"▶ {node.label}")
+                            self._notify(node, done)
+
+                if not futures:
+                    break
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = futures.pop(future)
+                    in_flight[node.resource] -= 1
+                    try:
+                        node.result = future.result()
+                    except Exception as e:
+                        node.state = FAILED
+                        logger.error(f"❌ {node.label} failed: {e}")
+                        if error is None:
+                            error = e
+                    else:
+                        node.state = DONE
+                        done += 1
+                        logger.info(f"✓ {node.label}")
+                    self._notify(node, done)
+
+        if error is not None:
+            raise error
+        stuck = [node.label for node in self.nodes.values() if node.state != DONE]
+        if stuck:
+            raise RuntimeError(f"Migration steps never ran: {', '.join(stuck)}")
+        return {name: node.result for name, node in self.nodes.items()}
@@ -0,0 +1,95 @@
+"""
+Streaming multipart/mixed request bodies for publish calls
+
+Tableau's publish endpoints take a multipart/mixed body: the XML request
+payload, then the .twbx / .tdsx file, then the closing boundary. Building it
+as one `bytes` object holds the whole file in memory twice (the file, then
+the concatenated body). `MultipartMixedBody` yields the same bytes in pieces
+instead, reading the file in `chunk_size` blocks, so memory use stays constant
+whatever the artifact size.
+
+- The body knows its length, so it is sent with a Content-Length header and
+  streamed by requests / urllib3 without buffering.
+- It is re-iterable: every iteration re-opens the file, so a transport retry
+  or the re-authenticated retry of `TableauClient.request` re-sends the full
+  body instead of an exhausted generator.
+- `offset` / `length` restrict the file part to a byte range (one part of a
+  fileUploads session); without a file the body is the XML part alone (the
+  publish call that commits an upload session).
+
+Usage:
+    body = MultipartMixedBody(boundary, xml_request, "tableau_workbook", file_path)
+    client.post(endpoint, data=body, custom_headers={"Content-Type": body.content_type, ...})
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class MultipartMixedBody:
+    """Lazily produced multipart/mixed body: XML payload part + file part"""
+
+    def __init__(self, boundary: str, xml_request: str, file_field: Optional[str] = None,
+                 file_path: Optional[Path] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 offset: int = 0, length: Optional[int] = None):
+        self.boundary = boundary
+        self.file_path = Path(file_path) if file_path is not None else None
+        self.chunk_size = chunk_size
+        # Byte range of the file carried by the body (a fileUploads part), whole file by default
+        self.offset = offset
+        self.length = length
+        head = (
+            f'--{boundary}\r\n'
+            'Content-Disposition: name="request_payload"\r\n'
+            'Content-Type: text/xml\r\n'
+            '\r\n'
+            f'{xml_request}\r\n'
+        )
+        if self.file_path is not None:
+            head += (
+                f'--{boundary}\r\n'
+                f'Content-Disposition: name="{file_field}"; filename="{self.file_path.name}"\r\n'
+                'Content-Type: application/octet-stream\r\n'
+                '\r\n'
+            )
+            self._tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+        else:
+            self._tail = f'--{boundary}--\r\n'.encode('utf-8')
+        self._head = head.encode('utf-8')
+
+    @property
+    def content_type(self) -> str:
+        # Critical: multipart/mixed (not multipart/form-data!)
+        return f"multipart/mixed; boundary={self.boundary}"
+
+    @property
+    def file_size(self) -> int:
+        return self.file_path.stat().st_size if self.file_path is not None else 0
+
+    @property
+    def part_size(self) -> int:
+        if self.file_path is None:
+            return 0
+        if self.length is not None:
+            return self.length
+        return self.file_size - self.offset
+
+    def __len__(self) -> int:
+        return len(self._head) + self.part_size + len(self._tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        if self.file_path is not None:
+            remaining = self.part_size
+            with open(self.file_path, "rb") as f:
+                f.seek(self.offset)
+                while remaining > 0:
+                    chunk = f.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        yield self._tail
@@ -0,0 +1,90 @@
+"""
+Environment-scoped Tableau sessions for migrations
+
+Every migration step used to open its own `TableauClient`, i.e. a full PAT
+sign-in and a sign-out per step. Signing in with a PAT also invalidates the
+other sessions of that PAT, so concurrent migrations kept logging each other
+out. `TableauSessionManager` keeps ONE signed-in client per environment
+(server, site, PAT) and hands the same client to every step and every
+concurrent migration of that environment.
+
+- A client whose token is about to expire is signed in again before it is
+  handed out (`refresh_margin_seconds`; lifetime from the sign-in response,
+  capped by `max_session_seconds`).
+- A request answered with 401 signs in again transparently and is retried
+  once (`TableauClient.request`); concurrent threads holding the same stale
+  token trigger a single sign-in.
+- Sessions are signed out by `close_all()` on application shutdown.
+
+Usage:
+    dev_client = tableau_sessions.get('dev')
+    DatasourceManager(dev_client).download_datasource(...)
+"""
+
+import logging
+import threading
+from typing import Dict, Tuple
+
+from util.config_managers.tableau_reader import TableauConfigManager
+from util.http_session import get_http_session
+
+from .config import Config
+from .tableau_client import TableauClient
+
+
+logger = logging.getLogger(__name__)
+
+
+class TableauSessionManager:
+    """Shared, self-refreshing TableauClient per environment"""
+
+    def __init__(self, refresh_margin_seconds: float = 300, max_session_seconds: float = 7200):
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.max_session_seconds = max_session_seconds
+        self._clients: Dict[Tuple, TableauClient] = {}
+        self._locks: Dict[Tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(environment: str, config: Config) -> Tuple:
+        return environment, config.server_url, config.site_content_url, config.pat_name
+
+    def get(self, environment: str) -> TableauClient:
+        """Signed-in client of an environment ('dev', 'prod', ...), shared by all callers"""
+        config = Config.from_env(environment)
+        key = self._key(environment, config)
+        with self._lock:
+            env_lock = self._locks.setdefault(key, threading.Lock())
+
+        with env_lock:  # one sign-in per environment, however many migrations ask at once
+            client = self._clients.get(key)
+            if client is None:
+                client = TableauClient(config, session=get_http_session(),
+                                       max_session_seconds=self.max_session_seconds)
+                self._clients[key] = client
+                logger.info(f"Opened shared {environment} session for {config.server_url}")
+            elif client.expires_within(self.refresh_margin_seconds):
+                client.reauthenticate(client.token)
+        return client
+
+    def close_all(self):
+        """Sign out every shared session (application shutdown)"""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.sign_out()
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._clients),
+                "sign_ins": sum(client.sign_in_count for client in self._clients.values()),
+            }
+
+
+_settings = TableauConfigManager().get_migration_session_settings()
+tableau_sessions = TableauSessionManager(
+    refresh_margin_seconds=_settings['refresh_margin_seconds'],
+    max_session_seconds=_settings['max_session_seconds'],
+)
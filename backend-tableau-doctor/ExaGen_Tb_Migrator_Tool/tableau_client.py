@@ -4,6 +4,8 @@ Base Tableau Server API Client
 
 import requests
 import logging
+import threading
+import time
 from typing import Dict, Any, Optional
 # from config import Config
 
@@ -14,14 +16,31 @@ from .config import Config
 logger = logging.getLogger(__name__)
 
 
+def _parse_expiration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a sign-in 'estimatedTimeToExpiration' value ("HHH:MM:SS"), or None"""
+    try:
+        hours, minutes, seconds = (int(part) for part in value.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
 class TableauClient:
     """Base client for Tableau Server REST API"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, session: Optional[requests.Session] = None,
+                 max_session_seconds: Optional[float] = None):
         self.config = config
+        # Caps the token lifetime reported by sign-in (server idle timeouts can be shorter)
+        self.max_session_seconds = max_session_seconds
+        self.sign_in_count = 0
+        # Pooled keep-alive transport; callers inside the API pass the shared one
+        self.session = session or requests.Session()
         self.token: Optional[str] = None
         self.site_id: Optional[str] = None
         self.user_id: Optional[str] = None
+        self.expires_at: Optional[float] = None  # time.monotonic() deadline of the token
+        self._auth_lock = threading.Lock()
         self._authenticate()
     
     def _authenticate(self):
@@ -43,13 +62,18 @@ class TableauClient:
         
         logger.info(f"Authenticating to {self.config.server_url}...")
         
-        response = requests.post(auth_url, json=auth_payload, headers=headers)
+        response = self.session.post(auth_url, json=auth_payload, headers=headers)
         response.raise_for_status()
         
         auth_data = response.json()
         self.token = auth_data["credentials"]["token"]
         self.site_id = auth_data["credentials"]["site"]["id"]
         self.user_id = auth_data["credentials"]["user"]["id"]
+        lifetime = _parse_expiration(auth_data["credentials"].get("estimatedTimeToExpiration"))
+        if self.max_session_seconds is not None:
+            lifetime = min(lifetime if lifetime is not None else self.max_session_seconds, self.max_session_seconds)
+        self.expires_at = time.monotonic() + lifetime if lifetime is not None else None
+        self.sign_in_count += 1
         
         logger.info("✅ Authentication successful!")
         logger.info(f"   Site ID: {self.site_id}")
@@ -61,56 +85,71 @@ class TableauClient:
             headers["Accept"] = "application/json"
         return headers
     
-    def get(self, endpoint: str, **kwargs) -> requests.Response:
-        """Make authenticated GET request"""
+    def expires_within(self, seconds: float) -> bool:
+        """True when the session token expires in less than `seconds`"""
+        return self.expires_at is not None and time.monotonic() + seconds >= self.expires_at
+    
+    def reauthenticate(self, stale_token: Optional[str]):
+        """
+        Sign in again unless another thread already replaced `stale_token`
+        (concurrent migrations share one client per environment).
+        """
+        with self._auth_lock:
+            if self.token == stale_token:
+                logger.info(f"Session for {self.config.server_url} expired; signing in again")
+                self._authenticate()
+    
+    def request(self, method: str, endpoint: str, custom_headers: Optional[Dict] = None,
+                raise_for_status: bool = True, **kwargs) -> requests.Response:
+        """
+        Make an authenticated request. A 401 (expired / replaced session) triggers
+        one transparent sign-in and a single retry with the new token.
+        """
         url = f"{self.config.server_url}/api/{self.config.api_version}{endpoint}"
-        headers = self._get_headers()
+        headers = custom_headers if custom_headers is not None else self._get_headers()
         
-        response = requests.get(url, headers=headers, **kwargs)
-        response.raise_for_status()
+        token = self.token
+        headers["X-Tableau-Auth"] = token
+        response = self.session.request(method, url, headers=headers, **kwargs)
+        if response.status_code == 401 and not endpoint.startswith("/auth/"):
+            response.close()
+            self.reauthenticate(token)
+            headers["X-Tableau-Auth"] = self.token
+            response = self.session.request(method, url, headers=headers, **kwargs)
+        
+        if raise_for_status:
+            response.raise_for_status()
         return response
     
+    def get(self, endpoint: str, **kwargs) -> requests.Response:
+        """Make authenticated GET request"""
+        return self.request("GET", endpoint, **kwargs)
+    
     def post(self, endpoint: str, json_data: Optional[Dict] = None, 
              data: Optional[bytes] = None, custom_headers: Optional[Dict] = None,
              **kwargs) -> requests.Response:
         """Make authenticated POST request"""
-        url = f"{self.config.server_url}/api/{self.config.api_version}{endpoint}"
-        
         if custom_headers:
             headers = custom_headers
-            headers["X-Tableau-Auth"] = self.token
         else:
             headers = self._get_headers()
             headers["Content-Type"] = "application/json"
         
         if json_data:
-            response = requests.post(url, json=json_data, headers=headers, **kwargs)
+            return self.request("POST", endpoint, custom_headers=headers, json=json_data, **kwargs)
         elif data:
-            response = requests.post(url, data=data, headers=headers, **kwargs)
-        else:
-            response = requests.post(url, headers=headers, **kwargs)
-        
-        response.raise_for_status()
-        return response
+            return self.request("POST", endpoint, custom_headers=headers, data=data, **kwargs)
+        return self.request("POST", endpoint, custom_headers=headers, **kwargs)
     
     def put(self, endpoint: str, json_data: Dict, **kwargs) -> requests.Response:
         """Make authenticated PUT request"""
-        url = f"{self.config.server_url}/api/{self.config.api_version}{endpoint}"
         headers = self._get_headers()
         headers["Content-Type"] = "application/json"
-        
-        response = requests.put(url, json=json_data, headers=headers, **kwargs)
-        response.raise_for_status()
-        return response
+        return self.request("PUT", endpoint, custom_headers=headers, json=json_data, **kwargs)
     
     def delete(self, endpoint: str, **kwargs) -> requests.Response:
         """Make authenticated DELETE request"""
-        url = f"{self.config.server_url}/api/{self.config.api_version}{endpoint}"
-        headers = self._get_headers()
-        
-        response = requests.delete(url, headers=headers, **kwargs)
-        response.raise_for_status()
-        return response
+        return self.request("DELETE", endpoint, **kwargs)
     
     def get_projects(self) -> list:
         """Get all projects on the site"""
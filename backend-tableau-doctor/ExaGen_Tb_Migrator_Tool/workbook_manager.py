@@ -12,6 +12,9 @@ from typing import List, Dict, Optional
 # from tableau_client import TableauClient
 
 from .tableau_client import TableauClient
+from .multipart_body import MultipartMixedBody
+from .file_upload import FileUpload, needs_chunked_upload
+from .workbook_xml import rewrite_workbook_section
 
 
 
@@ -116,34 +119,8 @@ class WorkbookManager:
             '</tsRequest>'
         )
         
-        # Part 1: XML payload
-        xml_part = (
-            f'--{boundary}\r\n'
-            'Content-Disposition: name="request_payload"\r\n'
-            'Content-Type: text/xml\r\n'
-            '\r\n'
-            f'{xml_request}\r\n'
-        )
-        
-        # Part 2: File
-        file_part_header = (
-            f'--{boundary}\r\n'
-            f'Content-Disposition: name="tableau_workbook"; filename="{file_path.name}"\r\n'
-            'Content-Type: application/octet-stream\r\n'
-            '\r\n'
-        )
-        
-        # Read file
-        with open(file_path, "rb") as f:
-            file_content = f.read()
-        
-        # Build complete body
-        body = (
-            xml_part.encode('utf-8') +
-            file_part_header.encode('utf-8') +
-            file_content +
-            f'\r\n--{boundary}--\r\n'.encode('utf-8')
-        )
+        # XML payload, then the file streamed in chunks, then the closing boundary
+        body = MultipartMixedBody(boundary, xml_request, "tableau_workbook", file_path)
         
         # Endpoint with parameters
         endpoint = f"/sites/{self.client.site_id}/workbooks"
@@ -152,16 +129,23 @@ class WorkbookManager:
             params.append("overwrite=true")
         params.append("skipConnectionCheck=true")
         
+        if needs_chunked_upload(body):
+            # Over the single-request limit: upload the file in parts, then publish the upload session
+            upload_session_id = FileUpload(self.client, file_path).upload()
+            params.append(f"uploadSessionId={upload_session_id}")
+            params.append(f"workbookType={file_path.suffix.lstrip('.').lower()}")
+            body = MultipartMixedBody(boundary, xml_request)
+        
         if params:
             endpoint += "?" + "&".join(params)
         
         logger.info(f"Publishing to endpoint: {endpoint}")
-        logger.info(f"File size: {len(file_content)} bytes")
+        logger.info(f"File size: {file_path.stat().st_size} bytes")
         
         # Critical: Use multipart/mixed (not multipart/form-data!)
         headers = {
             "X-Tableau-Auth": self.client.token,
-            "Content-Type": f"multipart/mixed; boundary={boundary}",
+            "Content-Type": body.content_type,
             "Accept": "application/json"
         }
         
@@ -173,7 +157,8 @@ class WorkbookManager:
         logger.info(f"Content-Type: {headers['Content-Type']}")
         
         try:
-            response = requests.post(url, data=body, headers=headers)
+            response = self.client.request("POST", endpoint, custom_headers=headers,
+                                           raise_for_status=False, data=body)
             
             # Log response
             logger.info(f"Response status: {response.status_code}")
@@ -208,124 +193,125 @@ class WorkbookManager:
                                      datasource_mapping: Dict[str, str]):
         """
         Update references using Triple-Check (Path, ID, or DBName)
+        
+        Only the <datasources> section is parsed and rebuilt; the rest of the
+        .twb (or of the .twb inside a .twbx) is streamed through unchanged.
         """
         logger.info(f"--- 🔍 STARTING ROBUST REFERENCE UPDATE ---")
         logger.info(f"Target file: {workbook_path}")
         logger.info(f"Mapping keys: {list(datasource_mapping.keys())}")
         
-        tree = ET.parse(workbook_path)
-        root = tree.getroot()
+        # Mapping order decides between keys matching the same datasource (first key wins)
+        key_rank = {key: rank for rank, key in enumerate(datasource_mapping) if key}
         
-        def clean_tag(tag):
-            return tag.split('}')[-1] if '}' in tag else tag
+        def rewrite(datasources_tag):
+            return self._rewrite_datasources(datasources_tag, datasource_mapping, key_rank)
         
-        changes = 0
+        changes = rewrite_workbook_section(workbook_path, 'datasources', rewrite)
         
-        # Locate datasources wrapper
-        datasources_tag = None
-        for child in root:
-            if clean_tag(child.tag) == 'datasources':
-                datasources_tag = child
-                break
-        
-        if datasources_tag is not None:
-            for ds in datasources_tag:
-                if clean_tag(ds.tag) == 'datasource':
-                    
-                    # 1. Gather all current identifiers for this datasource
-                    repo_loc = None
-                    current_path = ""
-                    current_id = ""
-                    current_dbname = ""
-                    
-                    # Get Repository Location info
-                    for sub in ds:
-                        if clean_tag(sub.tag) == 'repository-location':
-                            repo_loc = sub
-                            current_path = repo_loc.get('path', '')
-                            current_id = repo_loc.get('id', '')
-                            break
-                    
-                    # Get Connection info (to find dbname)
-                    connection = None
-                    for sub in ds:
-                        if clean_tag(sub.tag) == 'connection':
-                            connection = sub
-                            break
-                    # Check nested connection if needed
-                    if connection is None:
-                        for sub in ds:
-                            if clean_tag(sub.tag) == 'connection' or 'named-connection' in sub.tag:
-                                for deep_sub in sub:
-                                    if clean_tag(deep_sub.tag) == 'connection':
-                                        connection = deep_sub
-                                        break
-                                    if connection is not None: break
-                    
-                    if connection is not None:
-                        current_dbname = connection.get('dbname', '')
-
-                    logger.info(f"🔎 Scanning Datasource:")
-                    logger.info(f"   Path:   '{current_path}'")
-                    logger.info(f"   ID:     '{current_id}'")
-                    logger.info(f"   DBName: '{current_dbname}'")
-
-                    # 2. Check for ANY match in the mapping
-                    matched_new_url = None
-                    
-                    for old_key, new_url in datasource_mapping.items():
-                        # TRIPLE CHECK LOGIC
-                        match_found = False
-                        
-                        if old_key in current_path: 
-                            match_found = True
-                            logger.info(f"   ✅ Matched on PATH")
-                        elif old_key == current_id: 
-                            match_found = True
-                            logger.info(f"   ✅ Matched on ID")
-                        elif old_key == current_dbname: 
-                            match_found = True
-                            logger.info(f"   ✅ Matched on DBNAME")
-                            
-                        if match_found:
-                            matched_new_url = new_url
-                            
-                            # Perform Updates
-                            if repo_loc is not None:
-                                # Fix Path (preserve prefix)
-                                if '/datasources/' in current_path:
-                                    prefix = current_path.split('/datasources/')[0]
-                                    new_path = f"{prefix}/datasources/{matched_new_url}"
-                                    repo_loc.set('path', new_path)
-                                else:
-                                    # Fallback if path is weird - try to extract site from current path
-                                    if '/t/' in current_path:
-                                        site_part = current_path.split('/t/')[0]
-                                        site_name = current_path.split('/t/')[1].split('/')[0] if '/t/' in current_path else ''
-                                        repo_loc.set('path', f"{site_part}/t/{site_name}/datasources/{matched_new_url}")
-                                    elif self.client and hasattr(self.client, 'site_id'):
-                                        repo_loc.set('path', f"/t/{self.client.site_id}/datasources/{matched_new_url}")
-                                    else:
-                                        # Last resort - just update the datasource part
-                                        repo_loc.set('path', f"/datasources/{matched_new_url}")
-                                
-                                repo_loc.set('id', matched_new_url)
-                                
-                            if connection is not None:
-                                connection.set('dbname', matched_new_url)
-                                # Sanitize
-                                if connection.get('username'): connection.set('username', '')
-                                if connection.get('password'): del connection.attrib['password']
-                                
-                            changes += 1
-                            break # Stop checking keys for this datasource
-
         if changes > 0:
-            tree.write(workbook_path, encoding='utf-8', xml_declaration=True)
             logger.info(f"✅ SUCCESS! Updated {changes} reference(s).")
         else:
             logger.warning("⚠️ No changes made. Please verify your JSON key matches one of the 'Scanning Datasource' values above.")
     
+    def _rewrite_datasources(self, datasources_tag, datasource_mapping: Dict[str, str],
+                             key_rank: Dict[str, int]) -> int:
+        """Point the datasources of a parsed <datasources> element at their new content URLs"""
+        def clean_tag(tag):
+            return tag.split('}')[-1] if '}' in tag else tag
+        
+        changes = 0
+        
+        for ds in datasources_tag:
+            if clean_tag(ds.tag) != 'datasource':
+                continue
+            
+            # 1. Gather all current identifiers for this datasource
+            repo_loc = None
+            current_path = ""
+            current_id = ""
+            current_dbname = ""
+            
+            # Get Repository Location info
+            for sub in ds:
+                if clean_tag(sub.tag) == 'repository-location':
+                    repo_loc = sub
+                    current_path = repo_loc.get('path', '')
+                    current_id = repo_loc.get('id', '')
+                    break
+            
+            # Get Connection info (to find dbname)
+            connection = None
+            for sub in ds:
+                if clean_tag(sub.tag) == 'connection':
+                    connection = sub
+                    break
+            # Check nested connection if needed
+            if connection is None:
+                for sub in ds:
+                    if 'named-connection' in sub.tag:
+                        for deep_sub in sub:
+                            if clean_tag(deep_sub.tag) == 'connection':
+                                connection = deep_sub
+                                break
+                    if connection is not None:
+                        break
+            
+            if connection is not None:
+                current_dbname = connection.get('dbname', '')
+            
+            logger.info(f"🔎 Scanning Datasource:")
+            logger.info(f"   Path:   '{current_path}'")
+            logger.info(f"   ID:     '{current_id}'")
+            logger.info(f"   DBName: '{current_dbname}'")
+            
+            # 2. Check for ANY match in the mapping: dict lookups on the path segments, the id and the dbname
+            candidates = [segment for segment in current_path.split('/') if segment in key_rank]
+            candidates += [value for value in (current_id, current_dbname) if value in key_rank]
+            if not candidates:
+                continue
+            old_key = min(candidates, key=key_rank.__getitem__)
+            matched_new_url = datasource_mapping[old_key]
+            
+            # TRIPLE CHECK LOGIC
+            if old_key in current_path:
+                logger.info(f"   ✅ Matched on PATH")
+            elif old_key == current_id:
+                logger.info(f"   ✅ Matched on ID")
+            else:
+                logger.info(f"   ✅ Matched on DBNAME")
+            
+            # Perform Updates
+            if repo_loc is not None:
+                # Fix Path (preserve prefix)
+                if '/datasources/' in current_path:
+                    prefix = current_path.split('/datasources/')[0]
+                    new_path = f"{prefix}/datasources/{matched_new_url}"
+                    repo_loc.set('path', new_path)
+                else:
+                    # Fallback if path is weird - try to extract site from current path
+                    if '/t/' in current_path:
+                        site_part = current_path.split('/t/')[0]
+                        site_name = current_path.split('/t/')[1].split('/')[0] if '/t/' in current_path else ''
+                        repo_loc.set('path', f"{site_part}/t/{site_name}/datasources/{matched_new_url}")
+                    elif self.client and hasattr(self.client, 'site_id'):
+                        repo_loc.set('path', f"/t/{self.client.site_id}/datasources/{matched_new_url}")
+                    else:
+                        # Last resort - just update the datasource part
+                        repo_loc.set('path', f"/datasources/{matched_new_url}")
+                
+                repo_loc.set('id', matched_new_url)
+                
+            if connection is not None:
+                connection.set('dbname', matched_new_url)
+                # Sanitize
+                if connection.get('username'): connection.set('username', '')
+                if connection.get('password'): del connection.attrib['password']
+                
+            changes += 1
+        
+        return changes
+    
     def delete_workbook(self, workbook_id: str):
         """Delete a workbook"""
         endpoint = f"/sites/{self.client.site_id}/workbooks/{workbook_id}"
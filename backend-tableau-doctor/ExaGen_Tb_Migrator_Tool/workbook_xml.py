@@ -0,0 +1,230 @@
+"""
+Streaming rewrite of one top-level section of a workbook (.twb / .twbx)
+
+`ET.parse` + `tree.write` loads and re-serializes the whole workbook, although
+a migration only touches `<datasources>`; the `<worksheets>`, `<dashboards>`
+and `<windows>` sections that follow are usually most of the file.
+`rewrite_workbook_section` scans the XML with expat only until the end of the
+requested section, parses and rebuilds that section alone, and copies every
+byte before and after it unchanged. Memory use is bounded by the section, not
+the workbook.
+
+- .twb files are rewritten into a temporary file next to the original, which
+  replaces it only when something changed.
+- .twbx packages: the .twb entry is streamed through the rewriter into a new
+  archive; every other entry (extracts, images) is copied as raw compressed
+  bytes, without decompressing or recompressing it.
+
+Usage:
+    changes = rewrite_workbook_section(path, 'datasources', rewrite)   # rewrite(element) -> changes
+"""
+
+import copy
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Callable
+from xml.parsers import expat
+
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 1024 * 1024
+_LOCAL_HEADER_SIZE = 30
+
+
+class _SectionFound(Exception):
+    """Stops the expat scan once the section has been read"""
+
+
+class _Unchanged(Exception):
+    """The rewrite made no change; the output is discarded"""
+
+
+def _scan_section(src: BinaryIO, section: str):
+    """Read `src` up to the end of the top-level `section`.
+
+    Returns (buffer, start, end, encoding, namespaces): `buffer` holds every
+    byte read so far, `buffer[start:end]` is the section element (start and
+    end are None when the workbook has no such section).
+    """
+    parser = expat.ParserCreate()
+    buffer = bytearray()
+    state = {'depth': 0, 'start': None, 'end': None, 'encoding': 'utf-8', 'namespaces': {}}
+
+    def xml_decl(version, encoding, standalone):
+        if encoding:
+            state['encoding'] = encoding
+
+    def start_element(name, attrs):
+        state['depth'] += 1
+        if state['depth'] == 1:
+            state['namespaces'] = {key: value for key, value in attrs.items()
+                                   if key == 'xmlns' or key.startswith('xmlns:')}
+        elif state['depth'] == 2 and name == section and state['start'] is None:
+            state['start'] = parser.CurrentByteIndex
+
+    def end_element(name):
+        if state['depth'] == 2 and name == section and state['start'] is not None:
+            # Points at '</section' (or at '<section' when the element is empty)
+            state['end'] = buffer.index(b'>', parser.CurrentByteIndex) + 1
+            raise _SectionFound()
+        state['depth'] -= 1
+
+    parser.XmlDeclHandler = xml_decl
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    try:
+        while True:
+            chunk = src.read(READ_CHUNK_SIZE)
+            buffer += chunk
+            parser.Parse(chunk, not chunk)
+            if not chunk:
+                break
+    except _SectionFound:
+        pass
+    return buffer, state['start'], state['end'], state['encoding'], state['namespaces']
+
+
+def _rewrite_stream(src: BinaryIO, dst: BinaryIO, section: str,
+                    rewrite: Callable[[ET.Element], int]) -> int:
+    """Copy `src` to `dst` with `section` rebuilt by `rewrite`; returns its change count.
+
+    Nothing usable is written to `dst` when the count is 0.
+    """
+    buffer, start, end, encoding, namespaces = _scan_section(src, section)
+    if start is None:
+        logger.warning(f"No <{section}> section found in workbook")
+        return 0
+
+    # Parse the section alone, inside a wrapper carrying the root's namespace declarations
+    for key, uri in namespaces.items():
+        if ':' in key:
+            try:
+                ET.register_namespace(key.split(':', 1)[1], uri)
+            except ValueError:
+                pass
+    declarations = ''.join(f' {key}="{uri}"' for key, uri in namespaces.items())
+    wrapper = (f"<?xml version='1.0' encoding='{encoding}'?><wrapper{declarations}>".encode(encoding)
+               + bytes(buffer[start:end]) + b'</wrapper>')
+    element = ET.fromstring(wrapper)[0]
+
+    changes = rewrite(element)
+    if not changes:
+        return 0
+
+    # ET re-declares the namespaces used in the section; the root already declares them
+    rebuilt = ET.tostring(element, encoding=encoding, xml_declaration=False)
+    opening_end = rebuilt.index(b'>')
+    opening = rebuilt[:opening_end]
+    for key, uri in namespaces.items():
+        opening = opening.replace(f' {key}="{uri}"'.encode(encoding), b'')
+
+    dst.write(buffer[:start])
+    dst.write(opening)
+    dst.write(rebuilt[opening_end:])
+    dst.write(buffer[end:])
+    del buffer
+    shutil.copyfileobj(src, dst, READ_CHUNK_SIZE)
+    return changes
+
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    # FileHeader appends a fresh zip64 record when the sizes need one
+    stripped, i = bytearray(), 0
+    while i + 4 <= len(extra):
+        tag, size = struct.unpack('<HH', extra[i:i + 4])
+        if tag != 1:
+            stripped += extra[i:i + 4 + size]
+        i += 4 + size
+    return bytes(stripped)
+
+
+def _copy_raw_entry(raw: BinaryIO, info: zipfile.ZipInfo, zout: zipfile.ZipFile):
+    """Copy one archive entry's compressed bytes as they are"""
+    raw.seek(info.header_offset)
+    header = raw.read(_LOCAL_HEADER_SIZE)
+    if header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    raw.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length)
+
+    entry = copy.copy(info)
+    entry.flag_bits &= ~0x08          # sizes and CRC go in the local header, no data descriptor
+    entry.extra = _strip_zip64_extra(info.extra)
+    entry.header_offset = zout.fp.tell()
+    zout.fp.write(entry.FileHeader())
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = raw.read(min(READ_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated entry {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+    zout.filelist.append(entry)
+    zout.NameToInfo[entry.filename] = entry
+    zout.start_dir = zout.fp.tell()
+
+
+def _workbook_entry(zin: zipfile.ZipFile) -> zipfile.ZipInfo:
+    entries = [info for info in zin.infolist() if info.filename.lower().endswith('.twb')]
+    if not entries:
+        raise FileNotFoundError("No .twb found inside the packaged workbook")
+    # The workbook sits at the root of the package; nested .twb files are assets
+    return min(entries, key=lambda info: info.filename.count('/'))
+
+
+def _rewrite_packaged(workbook_path: Path, tmp: BinaryIO, section: str,
+                      rewrite: Callable[[ET.Element], int]) -> int:
+    changes = 0
+    with zipfile.ZipFile(workbook_path) as zin, open(workbook_path, 'rb') as raw, \
+            zipfile.ZipFile(tmp, 'w') as zout:
+        zout.comment = zin.comment
+        target = _workbook_entry(zin)
+        for info in zin.infolist():
+            if info is not target:
+                _copy_raw_entry(raw, info, zout)
+                continue
+            entry = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            entry.compress_type = info.compress_type
+            entry.external_attr = info.external_attr
+            with zin.open(info) as src, \
+                    zout.open(entry, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT // 2) as dst:
+                changes = _rewrite_stream(src, dst, section, rewrite)
+                if not changes:
+                    raise _Unchanged()
+    return changes
+
+
+def rewrite_workbook_section(workbook_path: Path, section: str,
+                             rewrite: Callable[[ET.Element], int]) -> int:
+    """Rebuild the top-level `section` of a .twb / .twbx in place; returns the change count.
+
+    `rewrite(element)` edits the parsed section and returns how many changes it
+    made; the workbook is only rewritten when that is non-zero.
+    """
+    workbook_path = Path(workbook_path)
+    fd, tmp_name = tempfile.mkstemp(dir=workbook_path.parent, prefix=f".{workbook_path.stem}.",
+                                    suffix=workbook_path.suffix)
+    changes = 0
+    try:
+        with os.fdopen(fd, 'w+b') as tmp:
+            if workbook_path.suffix.lower() == '.twbx':
+                changes = _rewrite_packaged(workbook_path, tmp, section, rewrite)
+            else:
+                with open(workbook_path, 'rb') as src:
+                    changes = _rewrite_stream(src, tmp, section, rewrite)
+    except _Unchanged:
+        changes = 0
+    finally:
+        if changes:
+            shutil.copymode(workbook_path, tmp_name)
+            os.replace(tmp_name, workbook_path)
+        else:
+            os.unlink(tmp_name)
+    return changes
@@ -0,0 +1,146 @@
+"""
+Synthetic Metadata API payloads for the benchmarks.
+
+`workbooks_payload` returns the `data` object of a `query_workbook_metadata`
+response (same keys, nesting and `__typename` aliases as the real Metadata
+API), sized by the arguments so the benchmarks can be scaled up or down.
+Roughly one embedded datasource in three is Custom SQL (referencedByQueries).
+
+Usage Example:
+    data = workbooks_payload(workbooks=50)
+    response = parse_response(WorkbooksResponse, data)
+"""
+
+import argparse
+import time
+import tracemalloc
+
+
+def _field(wb, ds, f, columns):
+    calculated = f % 4 == 0
+    field = {
+        'id': f'field-{wb}-{ds}-{f}',
+        'name': f'Field {f}',
+        'datasource': {'id': f'ds-{wb}-{ds}', 'name': f'Datasource {ds}'},
+        'upstreamColumns': [
+            {
+                'name': f'COLUMN_{c}',
+                'table': {'name': f'TABLE_{c % 3}'},
+                'downstreamWorkbooks': [{'id': f'wb-{wb}'}],
+            }
+            for c in range(columns)
+        ],
+        '__typename': 'CalculatedField' if calculated else 'ColumnField',
+    }
+    if calculated:
+        field['formula'] = f'SUM([COLUMN_{f}]) / COUNTD([COLUMN_0])'
+    return field
+
+
+def _embedded_datasource(wb, ds, fields, columns):
+    custom_sql = ds % 3 == 2
+    upstream_tables = []
+    for t in range(3):
+        table = {
+            'name': f'TABLE_{t}',
+            'referencedByQueries': [],
+            'columns': [
+                {'name': f'COLUMN_{c}', 'downstreamWorkbooks': [{'id': f'wb-{wb}'}]}
+                for c in range(columns)
+            ],
+        }
+        if custom_sql:
+            table['referencedByQueries'] = [{
+                'id': f'query-{wb}-{ds}-{t}',
+                'name': f'Custom SQL Query {t}',
+                'query': f'SELECT *\r\nFROM TABLE_{t}\r\nWHERE REGION = \'WEST\'',
+                'columns': [
+                    {
+                        'name': f'COLUMN_{c}',
+                        'downstreamFields': [_field(wb, ds, c, 0)],
+                        'downstreamWorkbooks': [{'id': f'wb-{wb}', 'name': f'Workbook {wb}'}],
+                    }
+                    for c in range(columns)
+                ],
+            }]
+        upstream_tables.append(table)
+
+    return {
+        'id': f'eds-{wb}-{ds}',
+        'name': f'Datasource {ds}',
+        'createdAt': '2024-01-01T00:00:00Z',
+        'updatedAt': '2024-06-01T00:00:00Z',
+        'hasExtracts': ds % 2 == 0,
+        'fields': [_field(wb, ds, f, columns) for f in range(fields)],
+        'upstreamTables': upstream_tables,
+    }
+
+
+def _workbook(wb, projects, dashboards, sheets, fields, columns, datasources):
+    project = wb % projects
+    return {
+        'name': f'Workbook {wb % (projects * 4)}',  # names repeat across projects, as on real sites
+        'id': f'wb-{wb}',
+        'luid': f'luid-{wb}',
+        'createdAt': '2024-01-01T00:00:00Z',
+        'updatedAt': '2024-06-01T00:00:00Z',
+        'description': f'Synthetic workbook {wb}',
+        'tags': [{'name': 'finance'}, {'name': 'certified'}],
+        'projectName': f'Project {project}',
+        'projectVizportalUrlId': str(1000 + project),
+        'owner': {'id': f'user-{wb % 7}', 'username': f'user{wb % 7}@example.com'},
+        'dashboards': [
+            {
+                'name': f'Dashboard {d}',
+                'id': f'dash-{wb}-{d}',
+                'sheets': [
+                    {
+                        'name': f'Sheet {d}-{s}',
+                        'id': f'sheet-{wb}-{d}-{s}',
+                        'datasourceFields': [_field(wb, s % datasources, f, columns) for f in range(fields)],
+                    }
+                    for s in range(sheets)
+                ],
+            }
+            for d in range(dashboards)
+        ],
+        'embeddedDatasources': [
+            _embedded_datasource(wb, ds, fields, columns) for ds in range(datasources)
+        ],
+    }
+
+
+def workbooks_payload(workbooks=50, projects=5, dashboards=3, sheets=4, fields=12, columns=3, datasources=3):
+    """`data` object of a workbook metadata response with `workbooks` synthetic workbooks."""
+    return {'workbooks': [
+        _workbook(wb, projects, dashboards, sheets, fields, columns, datasources)
+        for wb in range(workbooks)
+    ]}
+
+
+def measure(label, func, repeat=3):
+    """
+    Print the best wall time of `repeat` runs of `func`, then the peak memory
+    traced during one extra run (tracing is kept out of the timed runs).
+    Returns the result of the traced run.
+    """
+    best = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{label:<48} {best * 1000:10.1f} ms {peak / 1024 / 1024:10.1f} MB peak')
+    return result
+
+
+def argument_parser(description, workbooks=50):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workbooks', type=int, default=workbooks, help='synthetic workbooks in the payload')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (best time is reported)')
+    return parser
@@ -0,0 +1,147 @@
+"""
+Benchmark: usage statistics of concurrent requests, threadpool + requests vs asyncio + httpx.
+
+Simulates `--requests` concurrent API calls that each build the usage
+statistics of `--workbooks` workbooks (one GraphQL `luidWithin` query, then one
+REST `/views` call per workbook) against a stub Tableau server answering every
+call with synthetic Metadata API / REST payloads after `--latency-ms`.
+
+- before: sync routes; each request runs `TableauQueryClient.get_usage_stats_wb`
+  on one of Starlette's 40 threadpool threads, fanning out on its own threads.
+- after: async routes; each request awaits `AsyncTableauQueryClient.get_usage_stats_wb`
+  on the event loop, sharing one httpx connection pool.
+
+The site rate limiter is disabled so that only the transport is measured.
+
+Run from backend-tableau-doctor/:
+    python -m benchmarks.bench_async_routes --requests 100 --workbooks 20
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+
+from benchmarks._payloads import argument_parser
+from util.async_http_client import AsyncHttpClient
+from util.auth_clients.tableau_auth import TableauAuthClient, AsyncTableauAuthClient
+from util.config_managers.tableau_reader import TableauConfigManager
+from util.query_clients.tableau_query_client import TableauQueryClient, AsyncTableauQueryClient
+from util.rate_limiter import RateLimiter, _site_limiters
+
+SITE_ID = 'bench-site'
+THREADPOOL_SIZE = 40  # anyio's default limit for run_in_threadpool / sync routes
+_LUIDS = re.compile(r'luidWithin: (\[.*?\])', re.S)
+
+
+def _stub_body(method, url, body):
+    """Synthetic response body of a stubbed Tableau call."""
+    if method == 'POST' and url.endswith('/api/metadata/graphql'):
+        luids = json.loads(_LUIDS.search(json.loads(body)['query']).group(1))
+        return {'data': {'workbooks': [
+            {'id': f'wb-{luid}', 'luid': luid, 'name': f'Workbook {luid}',
+             'projectName': 'Project 1', 'projectVizportalUrlId': '1001'}
+            for luid in luids
+        ]}}
+    return {'views': {'view': [
+        {'id': f'view-{v}', 'name': f'View {v}', 'createdAt': '2024-01-01T00:00:00Z',
+         'updatedAt': '2024-06-01T00:00:00Z', 'usage': {'totalViewCount': str(v * 10)}}
+        for v in range(4)
+    ]}}
+
+
+class StubAdapter(BaseAdapter):
+    """requests transport answering every call after a fixed latency."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def send(self, request, **kwargs):
+        time.sleep(self.latency)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(_stub_body(request.method, request.url, request.body)).encode()
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _async_stub(latency):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json=_stub_body(request.method, str(request.url), request.content))
+    return handler
+
+
+def _luids(request_number, workbooks):
+    return [f'{request_number}-{w}' for w in range(workbooks)]  # distinct queries: nothing is coalesced
+
+
+def run_sync(args, latency):
+    session = requests.Session()
+    session.mount('https://', StubAdapter(latency))
+    config = TableauConfigManager()
+
+    def one_request(request_number):
+        auth = TableauAuthClient(config, auth_token='bench-token', site_id=SITE_ID, session=session)
+        return len(TableauQueryClient(auth, session=session).get_usage_stats_wb(_luids(request_number, args.workbooks)))
+
+    with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as threadpool:
+        return sum(threadpool.map(one_request, range(args.requests)))
+
+
+async def run_async(args, latency):
+    client = AsyncHttpClient(httpx.AsyncClient(transport=httpx.MockTransport(_async_stub(latency))))
+    config = TableauConfigManager()
+
+    async def one_request(request_number):
+        auth = AsyncTableauAuthClient(config, auth_token='bench-token', site_id=SITE_ID, client=client)
+        rows = await AsyncTableauQueryClient(auth, client=client).get_usage_stats_wb(
+            _luids(request_number, args.workbooks))
+        return len(rows)
+
+    try:
+        return sum(await asyncio.gather(*(one_request(n) for n in range(args.requests))))
+    finally:
+        await client.aclose()
+
+
+def _timed(label, func, repeat):
+    best = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        rows = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:<40} {best * 1000:10.1f} ms  {rows} rows')
+    return rows
+
+
+def main():
+    parser = argument_parser(__doc__.strip().splitlines()[0], workbooks=20)
+    parser.add_argument('--requests', type=int, default=100, help='concurrent API requests')
+    parser.add_argument('--latency-ms', type=float, default=50, help='stub server latency per call')
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+    _site_limiters[SITE_ID] = RateLimiter(0)  # rate limiting disabled
+    logging.disable(logging.INFO)  # the clients log every call; keep that out of the timings
+
+    print(f'{args.requests} concurrent requests x {args.workbooks} workbooks, {args.latency_ms:.0f} ms per call')
+    before = _timed('before: threadpool + requests', lambda: run_sync(args, latency), args.repeat)
+    after = _timed('after: asyncio + httpx', lambda: asyncio.run(run_async(args, latency)), args.repeat)
+    assert before == after, (before, after)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark: per-session row storage as ColumnarRows vs a list of dicts.
+
+Builds the Workbook Details and Datasource Details rows of a synthetic Metadata
+API response into the containers kept per session between the metadata
+endpoints and the Excel job, and reports build time, peak memory and the
+time to read every row back.
+
+Run from backend-tableau-doctor/:
+    python -m benchmarks.bench_columnar_rows --workbooks 200
+"""
+
+from benchmarks._payloads import argument_parser, measure, workbooks_payload
+from core.managers.tableau_data_manager import TableauDataManager
+from core.models.tableau_workbook_models import WorkbooksResponse
+from util.json_decoding import parse_response
+
+
+def main():
+    args = argument_parser(__doc__.strip().splitlines()[0]).parse_args()
+    full_workbook_data = parse_response(WorkbooksResponse, workbooks_payload(workbooks=args.workbooks))
+    manager = TableauDataManager(full_workbook_data)
+    manager.lineage  # index once, outside the measurements
+    print(f'{args.workbooks} synthetic workbooks')
+
+    def dict_rows():
+        embd_rows, _ = manager.get_flat_embd_data()
+        return manager.get_flat_wb_data(), embd_rows
+
+    def columnar_rows():
+        embd_rows, _ = manager.get_embd_row_stores()
+        return manager.get_wb_row_store(), embd_rows
+
+    before = measure('before: build list of dicts', dict_rows, args.repeat)
+    after = measure('after: build ColumnarRows', columnar_rows, args.repeat)
+    assert [len(rows) for rows in before] == [len(rows) for rows in after]
+
+    measure('before: read back every row', lambda: sum(len(row) for rows in before for row in rows), args.repeat)
+    measure('after: read back every row', lambda: sum(len(row) for rows in after for row in rows), args.repeat)
+
+    print(f'rows (details, datasources): {tuple(len(rows) for rows in after)}, '
+          f'code buffers: {sum(rows.nbytes() for rows in after) / 1024:.1f} KB')
+
+
+if __name__ == '__main__':
+    main()
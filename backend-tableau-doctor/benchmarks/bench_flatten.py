@@ -0,0 +1,48 @@
+"""
+Benchmark: workbook flattening as row generators vs materialized dict rows.
+
+Compares the streaming path used by the workbook_metadata endpoint
+(`FlatRowSource` over `iter_flat_*_rows`, one tuple at a time) with the
+list-of-dicts view the flatteners used to return (`get_flat_wb_data` /
+`get_flat_embd_data`), on a synthetic Metadata API response.
+
+Run from backend-tableau-doctor/:
+    python -m benchmarks.bench_flatten --workbooks 200
+"""
+
+from benchmarks._payloads import argument_parser, measure, workbooks_payload
+from core.managers.tableau_data_manager import TableauDataManager
+from core.models.tableau_workbook_models import WorkbooksResponse
+from util.json_decoding import parse_response
+
+
+def _consume(rows):
+    """Stream every row once (what the Excel writer does) and return the row count."""
+    return sum(1 for _ in rows)
+
+
+def main():
+    args = argument_parser(__doc__.strip().splitlines()[0]).parse_args()
+    full_workbook_data = parse_response(WorkbooksResponse, workbooks_payload(workbooks=args.workbooks))
+    print(f'{args.workbooks} synthetic workbooks')
+
+    def materialized():
+        manager = TableauDataManager(full_workbook_data)
+        wb_rows = manager.get_flat_wb_data()
+        embd_rows, query_rows = manager.get_flat_embd_data()
+        return len(wb_rows), len(embd_rows), len(query_rows)
+
+    def streamed():
+        manager = TableauDataManager(full_workbook_data)
+        wb_rows = manager.get_flat_wb_rows()
+        embd_rows, query_rows = manager.get_flat_embd_rows()
+        return _consume(wb_rows), _consume(embd_rows), _consume(query_rows)
+
+    before = measure('before: list of dict rows', materialized, args.repeat)
+    after = measure('after: streamed row tuples', streamed, args.repeat)
+    assert before == after, (before, after)
+    print(f'rows (details, datasources, queries): {after}')
+
+
+if __name__ == '__main__':
+    main()
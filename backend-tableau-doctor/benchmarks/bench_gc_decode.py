@@ -0,0 +1,54 @@
+"""
+Benchmark: decoding and validating a large Metadata API response, GC enabled vs paused.
+
+Serializes a synthetic workbook metadata response to JSON bytes (as it comes
+off the wire), then times `json.loads` + `WorkbooksResponse.model_validate`
+with the cyclic garbage collector running against the `util.json_decoding`
+path (`loads` + `parse_response`, collector paused while the tree is built;
+orjson when installed). The middle line pauses the collector around the
+stdlib decoder, to separate the GC effect from the decoder.
+200k long-lived objects are kept alive, as in the API process, so
+every collector pass has real work to rescan.
+
+Run from backend-tableau-doctor/:
+    python -m benchmarks.bench_gc_decode --workbooks 200
+"""
+
+import gc
+import json
+
+from benchmarks._payloads import argument_parser, measure, workbooks_payload
+from core.models.tableau_workbook_models import WorkbooksResponse
+from util.json_decoding import gc_paused, loads, parse_response
+
+
+def main():
+    args = argument_parser(__doc__.strip().splitlines()[0], workbooks=100).parse_args()
+    content = json.dumps({'data': workbooks_payload(workbooks=args.workbooks)}).encode('utf-8')
+    print(f'{args.workbooks} synthetic workbooks, {len(content) / 1024 / 1024:.1f} MB of JSON')
+
+    long_lived = [{'row': i, 'values': [str(i)] * 4} for i in range(200000)]  # noqa: F841 (kept alive)
+    gc.enable()
+
+    def gc_enabled():
+        data = json.loads(content)
+        return WorkbooksResponse.model_validate(data['data'])
+
+    def stdlib_gc_paused():
+        with gc_paused():
+            data = json.loads(content)
+            return WorkbooksResponse.model_validate(data['data'])
+
+    def json_decoding():
+        data = loads(content)
+        return parse_response(WorkbooksResponse, data['data'])
+
+    before = measure('before: json.loads + model_validate', gc_enabled, args.repeat)
+    measure('stdlib json, GC paused', stdlib_gc_paused, args.repeat)
+    after = measure('after: loads + parse_response', json_decoding, args.repeat)
+    assert len(before.workbooks) == len(after.workbooks) == args.workbooks
+    assert gc.isenabled(), 'the collector must be re-enabled after parsing'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: Tableau calls through bare `requests.post` / `requests.get` vs the pooled session.
+
+Starts a local HTTP/1.1 keep-alive stub server on a real socket (loopback),
+answering GraphQL POSTs with a synthetic Metadata API response and REST GETs
+with a views payload. Each call is one POST + one GET, as the query clients
+issue them, either with bare `requests` calls (a new TCP connection per
+request, as before `util.http_session`) or through `get_http_session()`
+(keep-alive connections reused from the pool). The server counts the TCP
+connections it accepted.
+
+Loopback handshakes are far cheaper than to a remote Tableau Server (and no
+TLS is involved): `--connect-ms` holds every new connection for that long
+before serving it, to model the handshake round trips of a real network.
+
+Run from backend-tableau-doctor/:
+    python -m benchmarks.bench_http_session --calls 200 --connect-ms 20
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from benchmarks._payloads import argument_parser, workbooks_payload
+from util.http_session import get_http_session
+
+_QUERY = {'query': '{ workbooks(filter: { idWithin: ["wb-0"] }) { name id } }'}
+_VIEWS = json.dumps({'views': {'view': [
+    {'id': f'view-{v}', 'name': f'View {v}', 'usage': {'totalViewCount': str(v * 10)}} for v in range(4)
+]}}).encode('utf-8')
+
+
+class StubServer(ThreadingHTTPServer):
+    """Keep-alive stub of the Tableau REST and Metadata APIs, counting accepted connections."""
+
+    daemon_threads = True
+
+    def __init__(self, graphql_body, connect_delay):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.graphql_body = graphql_body
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self._count_lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections open between requests
+    disable_nagle_algorithm = True  # headers and body are separate writes: no delayed-ACK stall
+
+    def setup(self):
+        super().setup()
+        with self.server._count_lock:
+            self.server.connections += 1
+        if self.server.connect_delay:
+            time.sleep(self.server.connect_delay)
+
+    def _reply(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(self.server.graphql_body)
+
+    def do_GET(self):
+        self._reply(_VIEWS)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _bare_call(url):
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    requests.post(f'{url}/api/metadata/graphql', json=_QUERY, headers=headers, timeout=30).raise_for_status()
+    requests.get(f'{url}/api/3.19/sites/site/workbooks/wb-0/views', headers=headers, timeout=30).raise_for_status()
+
+
+def _pooled_call(url):
+    session = get_http_session()
+    headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+    session.post(f'{url}/api/metadata/graphql', json=_QUERY, headers=headers).raise_for_status()
+    session.get(f'{url}/api/3.19/sites/site/workbooks/wb-0/views', headers=headers).raise_for_status()
+
+
+def _timed(label, server, call, args):
+    best, connections = None, None
+    with ThreadPoolExecutor(max_workers=max(1, args.threads)) as pool:
+        for _ in range(max(1, args.repeat)):
+            opened = server.connections
+            started = time.perf_counter()
+            list(pool.map(lambda _: call(server.url), range(args.calls)))
+            elapsed = time.perf_counter() - started
+            if best is None or elapsed < best:
+                best, connections = elapsed, server.connections - opened
+    print(f'{label:<40} {best * 1000:10.1f} ms  {best * 1000 / args.calls:6.2f} ms/call  '
+          f'{connections:5d} new connections')
+
+
+def main():
+    parser = argument_parser(__doc__.strip().splitlines()[0], workbooks=1)
+    parser.add_argument('--calls', type=int, default=200, help='POST + GET pairs per measurement')
+    parser.add_argument('--threads', type=int, default=1, help='calls issued concurrently')
+    parser.add_argument('--connect-ms', type=float, default=0, help='extra delay per new connection')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # keep urllib3 / config logging out of the timings
+
+    graphql_body = json.dumps({'data': workbooks_payload(workbooks=args.workbooks)}).encode('utf-8')
+    server = StubServer(graphql_body, args.connect_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f'{args.calls} calls (POST {len(graphql_body) / 1024:.0f} KB + GET) on {args.threads} thread(s), '
+          f'{args.connect_ms:.0f} ms extra per new connection')
+    try:
+        _timed('before: bare requests.post / get', server, _bare_call, args)
+        _pooled_call(server.url)  # the pool is created from tableau.yaml on first use
+        _timed('after: pooled get_http_session()', server, _pooled_call, args)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
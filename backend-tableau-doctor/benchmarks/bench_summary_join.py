@@ -0,0 +1,69 @@
+"""
+Benchmark: Summary sheet join, linear name scan vs id-indexed join with rollups.
+
+Takes the workbook and datasource counts of a synthetic Metadata API response
+(`TableauDataManager.get_workbook_counts` / `get_datasource_counts`) and
+compares the former join, which scanned the datasource counts for the first
+row with the same workbook name (O(W^2), and wrong when names repeat across
+projects), with `build_workbook_summary`, which also builds the project
+rollups and site totals.
+
+Run from backend-tableau-doctor/:
+    python -m benchmarks.bench_summary_join --workbooks 3000
+"""
+
+from benchmarks._payloads import argument_parser, measure, workbooks_payload
+from core.managers.tableau_data_manager import TableauDataManager
+from core.managers.workbook_summary import build_workbook_summary, as_records, SUMMARY_COLUMNS
+from core.models.tableau_workbook_models import WorkbooksResponse
+from util.json_decoding import parse_response
+
+
+def name_scan_join(workbook_counts, datasource_counts):
+    """The former Summary join: first datasource count row with the same workbook name."""
+    rows = []
+    for wb in workbook_counts:
+        ds_match = next((ds for ds in datasource_counts if ds["Workbook"] == wb["Workbook"]), {})
+        rows.append({
+            "Workbook": wb["Workbook"],
+            "Dashboards": wb.get("Dashboards", 0),
+            "Sheets": wb.get("Sheets", 0),
+            "Fields": wb.get("Fields", 0),
+            "Field Types": wb.get("Field Types", 0),
+            "Formula Fields": wb.get("Formula Fields", 0),
+            "Datasources": ds_match.get("Datasources", 0),
+            "Tables": ds_match.get("Tables", 0),
+            "Columns": ds_match.get("Columns", 0),
+            "Custom Queries": ds_match.get("Custom Queries", 0),
+            "Custom Columns": ds_match.get("Custom Columns", 0),
+        })
+    return rows
+
+
+def main():
+    args = argument_parser(__doc__.strip().splitlines()[0], workbooks=3000).parse_args()
+    payload = workbooks_payload(
+        workbooks=args.workbooks, projects=max(1, args.workbooks // 20),
+        dashboards=1, sheets=2, fields=3, columns=1, datasources=3,
+    )
+    for number, workbook in enumerate(payload['workbooks']):
+        # Mostly unique names, one in ten reusing a name from another project; counts differ per workbook
+        workbook['name'] = f'Workbook {number - 1 if number % 10 == 9 else number}'
+        workbook['embeddedDatasources'] = workbook['embeddedDatasources'][:1 + number % 3]
+    manager = TableauDataManager(parse_response(WorkbooksResponse, payload))
+    workbook_counts = manager.get_workbook_counts()
+    datasource_counts = manager.get_datasource_counts()
+    print(f'{len(workbook_counts)} workbooks in {len({c["Project ID"] for c in workbook_counts})} projects')
+
+    before = measure('before: name scan join', lambda: name_scan_join(workbook_counts, datasource_counts),
+                     args.repeat)
+    summary = measure('after: id join + project / site rollups',
+                      lambda: build_workbook_summary(workbook_counts, datasource_counts), args.repeat)
+
+    after = as_records(summary.rows, SUMMARY_COLUMNS)
+    mismatched = sum(1 for old, new in zip(before, after) if old != new)
+    print(f'{len(summary.projects)} project rollups; {mismatched} rows the name scan joined to the wrong workbook')
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,9 @@ from core.models.tableau_dropdown_loader_models import DropdownLoaderResponse
 from core.models.tableau_workbook_models import WorkbooksResponse
 from util.tableau_excel_generator import TableauExcellGenerator
 from core.managers.tableau_data_manager import TableauDataManager
+from core.managers.workbook_summary import (
+    build_workbook_summary, as_records, project_summary_records, SUMMARY_COLUMNS, PROJECT_SUMMARY_COLUMNS,
+)
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -68,11 +71,10 @@ class TableauFlow(QObject):
             This method will load the Projects dropdown, on the BI Tool dropdown change event.
         '''
         try:            
-            query = self.client.query_loader()
-            logging.debug(f'Query Loaded: {query}')
+            workbooks = [wb for page in self.client.iter_workbook_pages() for wb in page]
+            logging.debug(f'Workbooks Loaded: {len(workbooks)}')
             
-            response = self.client.send_request(query=query)    
-            data = DropdownLoaderResponse(**response['data'])
+            data = DropdownLoaderResponse(workbooks=workbooks)
             
             projects_list = []
             seen_projects = set()
@@ -140,12 +142,10 @@ class TableauFlow(QObject):
 
             else:
                 
-                query = self.client.query_loader() 
-                logging.debug(f'Query loaded: {query}')
+                workbooks = [wb for page in self.client.iter_workbook_pages() for wb in page]
+                logging.debug(f'Workbooks loaded: {len(workbooks)}')
                 
-                response = self.client.send_request(query=query) 
-                
-                data = DropdownLoaderResponse(**response['data'])
+                data = DropdownLoaderResponse(workbooks=workbooks)
                 logging.info('Workbook data loaded successfully.')
                 
                 report_list = []
@@ -342,14 +342,13 @@ class TableauFlow(QObject):
     def generate_spreadsheet(self, package):
         '''
             On Downlaod button click this method will be called after the package has been created.
-            This method will then generate the Primary Sheets and then the summary sheet.
-            This method will then format all the sheets.
+            This method will register the summary sheet and then generate it together with
+            the Primary Sheets, formatted, in a single write.
         '''    
         try:
             excell_genrator = TableauExcellGenerator(package=package)
-            excell_genrator.generate_spreadsheet()
-            excell_genrator.format_excel()        
             self.write_summary_counts(excell_generator=excell_genrator)
+            excell_genrator.generate_spreadsheet()
             with open(os.path.join("config", "tableau.yaml"), "r") as f:
                 cfg = yaml.safe_load(f)
             output_dir = cfg["tableau"]["output"]["directory"]
@@ -429,53 +428,10 @@ class TableauFlow(QObject):
             workbook_counts = self.data_manager.get_workbook_counts()
             datasource_counts = self.data_manager.get_datasource_counts()
  
-            # Merge the data into one combined summary list
-            summary_data = []
-            for wb in workbook_counts:
-                workbook_name = wb.get("Workbook")
- 
-                summary_entry = {
-                    "Workbook": workbook_name,
-                    "Dashboards": wb.get("Dashboards", 0),
-                    "Sheets": wb.get("Sheets", 0),
-                    "Fields": wb.get("Fields", 0),
-                    "Field Types": wb.get("Field Types", 0),
-                    "Formula Fields": wb.get("Formula Fields", 0),
-                }
- 
-                # Find matching datasource record
-                ds_match = next((d for d in datasource_counts if d.get("Workbook") == workbook_name), None)
-                if ds_match:
-                    summary_entry["Datasources"] = ds_match.get("Datasources", 0)
-                    summary_entry["Tables"] = ds_match.get("Tables", 0)
-                    summary_entry["Columns"] = ds_match.get("Columns", 0)
-                    summary_entry["Custom Queries"] = ds_match.get("Custom Queries", 0)
-                    summary_entry["Custom Columns"] = ds_match.get("Custom Columns", 0)
-                else:
-                    summary_entry.update({
-                        "Datasources": 0,
-                        "Tables": 0,
-                        "Columns": 0,
-                        "Custom Queries": 0,
-                        "Custom Columns": 0
-                    })
- 
-                summary_data.append(summary_entry)
- 
-            # Define the columns for Excel
-            summary_columns = [
-                "Workbook",
-                "Dashboards",
-                "Sheets",
-                "Fields",
-                "Field Types",
-                "Formula Fields",
-                "Datasources",
-                "Tables",
-                "Columns",
-                "Custom Queries",
-                "Custom Columns"
-            ]
+            # Id-keyed join of the two count lists (with project / site rollups)
+            summary = build_workbook_summary(workbook_counts, datasource_counts)
+            summary_data = as_records(summary.rows, SUMMARY_COLUMNS)
+            summary_columns = SUMMARY_COLUMNS
  
             # Prepare the package for Excel
             package = [{
@@ -484,9 +440,14 @@ class TableauFlow(QObject):
                 "columns": summary_columns
             }]
  
-            # Write the combined summary sheet
-            excell_generator.generate_summary_sheet(unique_counts=summary_data, columns=summary_columns)
-            logging.info("Workbook Summary sheet written successfully.")
+            # Register the combined summary sheet (written first by generate_spreadsheet)
+            excell_generator.add_summary_sheet(unique_counts=summary_data, columns=summary_columns)
+            excell_generator.add_rollup_sheet(
+                "Project Summary",
+                project_summary_records(summary),  # site totals as the last row
+                PROJECT_SUMMARY_COLUMNS
+            )
+            logging.info("Workbook Summary sheet prepared successfully.")
  
         except Exception as e:
             logging.critical(f"Critical Error generating summary sheet: {e}")
@@ -0,0 +1,135 @@
+"""
+ColumnarRows Class
+
+This module defines `ColumnarRows`, a compact column-oriented container for the
+flattened metadata rows kept per session between the metadata endpoints and
+the Excel job. The flattened sheets repeat the same project, workbook, owner,
+dashboard and datasource values on thousands of rows; as a list of dicts every
+row pays for its own dict and key slots.
+
+ColumnarRows dictionary-encodes every column: each distinct value is stored
+once per column and every row only keeps a small integer code per column in an
+`array` buffer. The buffers start at 1 byte per code and are widened to 2 or 4
+bytes only when a column outgrows the smaller type.
+
+Usage Example:
+    rows = ColumnarRows.from_rows(WB_DETAIL_COLUMNS, data_manager.iter_flat_wb_rows())
+    len(rows)                # number of rows
+    for row in rows: ...     # decoded row tuples, in insertion order
+    rows.as_dicts()          # {column: value} dicts for older callers
+"""
+
+from array import array
+
+# Code buffer type codes from narrowest to widest, with the largest code each can hold
+_CODE_TYPES = (('B', 0xFF), ('H', 0xFFFF), ('I', 0xFFFFFFFF))
+
+
+class ColumnarRows:
+    __slots__ = ('columns', '_values', '_index', '_codes', '_limits', '_length')
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        width = len(self.columns)
+        self._values = [[] for _ in range(width)]            # code -> value, per column
+        self._index = [{} for _ in range(width)]             # value -> code, per column
+        self._codes = [array('B') for _ in range(width)]     # row -> code, per column
+        self._limits = [0] * width                           # position in _CODE_TYPES, per column
+        self._length = 0
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """Build a container from an iterable of row tuples ordered like `columns`."""
+        store = cls(columns)
+        store.extend(rows)
+        return store
+
+    def _encode(self, position, value):
+        index = self._index[position]
+        code = index.get(value)
+        if code is None:
+            code = len(self._values[position])
+            index[value] = code
+            self._values[position].append(value)
+            limit = self._limits[position]
+            if code > _CODE_TYPES[limit][1]:
+                # Column outgrew its code type: widen the buffer once
+                limit += 1
+                self._limits[position] = limit
+                self._codes[position] = array(_CODE_TYPES[limit][0], self._codes[position])
+        return code
+
+    def append(self, row):
+        if len(row) != len(self.columns):
+            raise ValueError(f"Row has {len(row)} values, expected {len(self.columns)}")
+        for position, value in enumerate(row):
+            code = self._encode(position, value)  # may swap in a wider buffer
+            self._codes[position].append(code)
+        self._length += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        values = self._values
+        for codes in zip(*self._codes):
+            yield tuple([values[position][code] for position, code in enumerate(codes)])
+
+    def count(self):
+        return self._length
+
+    def is_empty(self):
+        return self._length == 0
+
+    def as_dicts(self):
+        """Yield each row as a {column: value} dict (for callers that still need dicts)."""
+        for row in self:
+            yield dict(zip(self.columns, row))
+
+    def column(self, name):
+        """Yield the decoded values of one column, row by row."""
+        position = self.columns.index(name)
+        values = self._values[position]
+        for code in self._codes[position]:
+            yield values[code]
+
+    def distinct(self, name):
+        """Distinct values of one column, in first-seen order."""
+        return list(self._values[self.columns.index(name)])
+
+    def codes(self, name):
+        """The raw code buffer of one column (indexes into `distinct(name)`)."""
+        return self._codes[self.columns.index(name)]
+
+    def to_state(self):
+        """Plain, serializable form: columns, distinct values and raw code buffers."""
+        return {
+            'columns': list(self.columns),
+            'values': [list(values) for values in self._values],
+            'codes': [(codes.typecode, codes.tobytes()) for codes in self._codes],
+            'length': self._length,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a container from `to_state()` output without re-encoding any row."""
+        store = cls(state['columns'])
+        store._values = [list(values) for values in state['values']]
+        store._index = [{value: code for code, value in enumerate(values)} for values in store._values]
+        store._codes = []
+        store._limits = []
+        for typecode, raw in state['codes']:
+            codes = array(typecode)
+            codes.frombytes(raw)
+            store._codes.append(codes)
+            store._limits.append([code_type for code_type, _ in _CODE_TYPES].index(typecode))
+        store._length = state['length']
+        return store
+
+    def nbytes(self):
+        """Size of the code buffers in bytes (the distinct values are shared objects)."""
+        return sum(codes.itemsize * len(codes) for codes in self._codes)
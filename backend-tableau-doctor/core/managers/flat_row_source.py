@@ -0,0 +1,38 @@
+"""
+FlatRowSource Class
+
+This module defines `FlatRowSource`, a lazy, re-iterable view over the rows
+produced by a flattening generator. Instead of materializing one dict per
+field x upstream column x table, the managers hand out a FlatRowSource that
+knows its column schema and re-runs the generator every time it is iterated,
+so rows are produced and consumed one at a time.
+
+Usage Example:
+    rows = FlatRowSource(WB_DETAIL_COLUMNS, data_manager.iter_flat_wb_rows)
+    rows.count()            # streams once to count
+    for row in rows: ...    # streams again, one tuple at a time
+"""
+
+
+class FlatRowSource:
+    def __init__(self, columns, factory):
+        self.columns = tuple(columns)  # Column schema, in row-tuple order
+        self.factory = factory          # Zero-argument callable returning a fresh row iterator
+        self._count = None
+
+    def __iter__(self):
+        return iter(self.factory())
+
+    def count(self):
+        """Number of rows, computed by streaming once and then remembered."""
+        if self._count is None:
+            self._count = sum(1 for _ in self)
+        return self._count
+
+    def is_empty(self):
+        return next(iter(self), None) is None
+
+    def as_dicts(self):
+        """Yield each row as a {column: value} dict (for callers that still need dicts)."""
+        for row in self:
+            yield dict(zip(self.columns, row))
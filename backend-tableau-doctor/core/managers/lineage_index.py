@@ -0,0 +1,204 @@
+"""
+LineageIndex Class
+
+This module defines `LineageIndex`, the workbook lineage graph built in ONE
+traversal of a `WorkbooksResponse`. The Workbook Details / Datasource Details /
+Query Details flatteners and the workbook / datasource counters of
+`TableauDataManager` are projections of it, instead of each walking the
+workbook -> dashboard -> sheet -> field -> column tree again.
+
+Graph:
+- WorkbookNode: the workbook's row values, its sheet placements
+  (dashboard -> sheet -> fields), its embedded datasources and its counts.
+- FieldNode: field -> upstream columns -> tables, resolved once into the
+  (table_name, column_name, formula) tails of the Workbook Details rows.
+  A field used on several sheets is resolved once and shared (keyed by id).
+
+Usage Example:
+    index = LineageIndex(full_workbook_data)
+    for node in index.workbooks:
+        for placement_values, fields in node.sheets: ...
+"""
+
+import logging
+
+from util.json_decoding import gc_paused
+
+
+class FieldNode:
+    __slots__ = ('values', 'column_rows')
+
+    def __init__(self, datasource_field):
+        field_type = datasource_field.field_type
+        datasource = datasource_field.datasource
+        # If the field is a calculated field the get the formula
+        formula = datasource_field.formula if field_type == 'CalculatedField' else None
+        self.values = (
+            datasource_field.id or '',
+            datasource_field.name or '',
+            field_type or '',
+            (datasource.id if datasource else None) or '',
+            (datasource.name if datasource else None) or '',
+        )
+
+        if len(datasource_field.upstreamColumns) == 0:
+            self.column_rows = (('', '', formula),)
+        else:
+            column_rows = []
+            table_name = ''  # carried over to columns without a table, as before
+            for field_column in datasource_field.upstreamColumns:
+                for table in field_column.table or []:
+                    table_name = table.name
+                column_rows.append((table_name or '', field_column.name or '', formula))
+            self.column_rows = tuple(column_rows)
+
+
+class EmbeddedDatasourceNode:
+    __slots__ = ('datasource', 'values', 'has_referenced_queries')
+
+    def __init__(self, embedded_datasource):
+        self.datasource = embedded_datasource
+        self.values = (
+            embedded_datasource.id or '',
+            '',
+            embedded_datasource.name or '',
+            embedded_datasource.createdAt or '',
+            embedded_datasource.updatedAt or '',
+            '', '', '',
+            embedded_datasource.hasExtracts if embedded_datasource.hasExtracts is not None else False,
+        )
+        # Decide ONCE per embedded datasource
+        self.has_referenced_queries = any(
+            ut.referencedByQueries
+            for ut in embedded_datasource.upstreamTables or []
+        )
+
+
+class WorkbookNode:
+    __slots__ = (
+        'workbook', 'detail_values', 'catalog_values', 'last_sheet_values',
+        'sheets', 'embedded_datasources', 'workbook_counts', 'datasource_counts',
+    )
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+        # Prefix of the Workbook Details rows
+        self.detail_values = (
+            workbook.projectVizportalUrlId or '',
+            workbook.projectName or '',
+            workbook.id or '',
+            workbook.name or '',
+            workbook.owner.id or '',
+            workbook.owner.username or '',
+        )
+        # Prefix of the Datasource Details rows
+        self.catalog_values = (
+            workbook.projectVizportalUrlId or '',
+            workbook.projectName or '',
+            workbook.id or '',
+            workbook.luid or '',
+            workbook.name or '',
+            workbook.createdAt or '',
+            workbook.updatedAt or '',
+            ', '.join([t.name for t in workbook.tags]) if workbook.tags else '',
+            workbook.description or '',
+        )
+        self.sheets = []  # (dashboard_values + sheet_values, [FieldNode, ...]) in document order
+        self.embedded_datasources = []
+
+
+class LineageIndex:
+    def __init__(self, full_workbook_data):
+        self.workbooks = []
+        self._fields = {}  # field id -> FieldNode
+
+        with gc_paused():  # the graph is acyclic and freshly allocated
+            for workbook in full_workbook_data.workbooks:
+                self.workbooks.append(self._index_workbook(workbook))
+        logging.info(f'Indexed lineage of {len(self.workbooks)} workbook(s), {len(self._fields)} distinct field(s)')
+
+    def _field_node(self, datasource_field):
+        if not datasource_field.id:
+            return FieldNode(datasource_field)
+        node = self._fields.get(datasource_field.id)
+        if node is None:
+            node = self._fields[datasource_field.id] = FieldNode(datasource_field)
+        return node
+
+    def _index_workbook(self, workbook):
+        node = WorkbookNode(workbook)
+
+        # ---- dashboards -> sheets -> fields (and the Workbook Details counts) ----
+        dashboards = set()
+        sheets = set()
+        fields = set()
+        field_types = set()
+        formulas = set()
+        sheet_id = sheet_name = dashboard_id = dashboard_name = None
+        for dashboard in workbook.dashboards:
+            dashboard_id = dashboard.id
+            dashboard_name = dashboard.name
+            dashboards.add(dashboard.name)
+            dashboard_values = (dashboard.id or '', dashboard.name or '')
+            for sheet in dashboard.sheets:
+                sheet_id = sheet.id
+                sheet_name = sheet.name
+                sheets.add(sheet.name)
+                field_nodes = []
+                for datasource_field in sheet.datasourceFields:
+                    fields.add(datasource_field.name)
+                    field_types.add(datasource_field.field_type)
+                    # Check if calculated field
+                    if datasource_field.field_type == 'CalculatedField':
+                        formulas.add(datasource_field.formula)
+                    field_nodes.append(self._field_node(datasource_field))
+                node.sheets.append((dashboard_values + (sheet.id or '', sheet.name or ''), field_nodes))
+
+        # Datasource Details rows report the workbook's LAST sheet / dashboard
+        node.last_sheet_values = (sheet_id or '', sheet_name or '', dashboard_id or '', dashboard_name or '')
+        # Workbook / project ids are the join and rollup keys of the summary (core.managers.workbook_summary)
+        summary_keys = {
+            "Workbook ID": workbook.id,
+            "Project ID": workbook.projectVizportalUrlId,
+            "Project": workbook.projectName,
+        }
+        node.workbook_counts = {
+            **summary_keys,
+            "Workbook": workbook.name,
+            "Dashboards": len(dashboards),
+            "Sheets": len(sheets),
+            "Fields": len(fields),
+            "Field Types": len(field_types),
+            "Formula Fields": len(formulas)
+        }
+
+        # ---- embedded datasources -> upstream tables (and the Datasource counts) ----
+        datasources = set()
+        tables = set()
+        columns = set()
+        custom_table_columns = set()
+        queries = set()
+        for embedded_datasource in workbook.embeddedDatasources:
+            node.embedded_datasources.append(EmbeddedDatasourceNode(embedded_datasource))
+            datasources.add(embedded_datasource.name)
+            for upstream_table in embedded_datasource.upstreamTables:
+                tables.add(upstream_table.name)
+                if not upstream_table.referencedByQueries:
+                    for column in upstream_table.columns:
+                        columns.add(column.name)
+                else:
+                    for referenced_by_query in upstream_table.referencedByQueries:
+                        queries.add(referenced_by_query.query)
+                        for column in referenced_by_query.columns:
+                            custom_table_columns.add(column.name)
+
+        node.datasource_counts = {
+            **summary_keys,
+            "Workbook": workbook.name,
+            "Datasources": len(datasources),
+            "Tables": len(tables),
+            "Columns": len(columns),
+            "Custom Columns": len(custom_table_columns),
+            "Custom Queries": len(queries)
+        }
+        return node
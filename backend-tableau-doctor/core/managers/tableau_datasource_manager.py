@@ -1,8 +1,28 @@
 import logging
+from core.managers.columnar_rows import ColumnarRows
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+# Column schemas of the flattened row tuples (same keys the dict rows used to carry)
+DS_DETAIL_COLUMNS = (
+    "DSProject ID", "DSProject", "Datasource ID", "datasource_luid", "Datasource",
+    "CreatedDate", "UpdatedDate", "ContainsExtract", "Tags", "DataSorceType",
+    "FieldID", "FieldName", "FieldType", "Formula", "Column", "Table",
+    "Sheet ID", "Sheet", "UsedInSheet", "Dashboard ID", "Dashboard",
+    "Workbook ID", "Workbook", "WorkbookLUID", "WBCreatedDate", "WBUpdatedDate",
+    "WBTags", "Description", "WBProject", "WBProjectID", "CustomQueryID", "Flag",
+)
+
+DS_QUERY_COLUMNS = (
+    "project_id", "project_name", "workbook_id", "workbook_name",
+    "custom_query_id", "custom_query_name", "query", "Flag",
+)
+
+# Workbook values of a row whose column is not used by any sheet
+_NO_WORKBOOK = ("",) * 9
+
+
 class TableauDatasourceDataManager:
     """
     Flattens Tableau Datasource Metadata returned from GraphQL
@@ -14,230 +34,100 @@ class TableauDatasourceDataManager:
     # -------------------------------------------------------
     # FLATTEN DATASOURCE → FIELDS → SHEETS → WORKBOOKS
     # -------------------------------------------------------
-    def get_flat_datasource_details(self):
-        flat_datasource_data = []
-        
+    def iter_flat_datasource_rows(self):
+        """Yield DS_DETAIL_COLUMNS tuples, one per field x column x sheet x dashboard."""
         for ds in self.datasource_metadata_response.publishedDatasources:
             # Datasource level attributes - ensure proper string conversion
-            ds_project_id = str(ds.projectVizportalUrlId) if ds.projectVizportalUrlId else ""
-            ds_project = str(ds.projectName) if ds.projectName else ""
-            datasource_id = str(ds.id) if ds.id else ""
-            datasource_luid = str(ds.luid) if ds.luid else ""
-            datasource_name = str(ds.name) if ds.name else ""
-            created_date_ds = str(ds.createdAt) if ds.createdAt else ""
-            updated_date_ds = str(ds.updatedAt) if ds.updatedAt else ""
-            contains_extract = str(ds.hasExtracts) if ds.hasExtracts is not None else ""
-            tags_ds = ", ".join([str(t.name) for t in ds.tags]) if ds.tags else ""
-            datasource_type = str(ds.field_type) if ds.field_type else ""
-            
+            datasource_values = (
+                str(ds.projectVizportalUrlId) if ds.projectVizportalUrlId else "",
+                str(ds.projectName) if ds.projectName else "",
+                str(ds.id) if ds.id else "",
+                str(ds.luid) if ds.luid else "",
+                str(ds.name) if ds.name else "",
+                str(ds.createdAt) if ds.createdAt else "",
+                str(ds.updatedAt) if ds.updatedAt else "",
+                str(ds.hasExtracts) if ds.hasExtracts is not None else "",
+                ", ".join([str(t.name) for t in ds.tags]) if ds.tags else "",
+                str(ds.field_type) if ds.field_type else "",
+            )
+
             # Build table->column mapping for custom query tracking
             table_column_query_map = {}
             for upstream_table in ds.upstreamTables:
                 table_name = upstream_table.name
-                if upstream_table.referencedByQueries and len(upstream_table.referencedByQueries) > 0:
-                    for query in upstream_table.referencedByQueries:
-                        query_id = query.id
-                        for col in query.columns:
-                            col_name = col.name
-                            table_column_query_map[(table_name, col_name)] = query_id
-            
+                for query in upstream_table.referencedByQueries or []:
+                    for col in query.columns:
+                        table_column_query_map[(table_name, col.name)] = query.id
+
             # Iterate through fields in the datasource
             for field in ds.fields:
-                field_id = str(field.id) if field.id else ""
-                field_name = str(field.name) if field.name else ""
-                field_type = str(field.field_type) if field.field_type else ""
-                formula = str(field.formula) if field.formula else ""
-                
+                field_values = datasource_values + (
+                    str(field.id) if field.id else "",
+                    str(field.name) if field.name else "",
+                    str(field.field_type) if field.field_type else "",
+                    str(field.formula) if field.formula else "",
+                )
+
+                if not field.upstreamColumns:
+                    # Field has no upstream columns
+                    yield field_values + ("", "", "", "", "N", "", "") + _NO_WORKBOOK + ("", "Datasource")
+                    continue
+
                 # Get upstream columns and their tables' downstream sheets
-                if field.upstreamColumns and len(field.upstreamColumns) > 0:
-                    for upstream_col in field.upstreamColumns:
-                        col_name = str(upstream_col.name) if upstream_col.name else ""
-                        table_name = str(upstream_col.table.name) if upstream_col.table and upstream_col.table.name else ""
-                        # Check if this column comes from a custom query
-                        query_id = str(table_column_query_map.get((table_name, col_name), ""))
-                        
-                        # Check if the table exists and has downstream sheets
-                        if upstream_col.table and upstream_col.table.downstreamSheets and len(upstream_col.table.downstreamSheets) > 0:
-                            # Loop through each sheet that uses this table
-                            for sheet in upstream_col.table.downstreamSheets:
-                                sheet_id = str(sheet.id) if sheet.id else ""
-                                sheet_name = str(sheet.name) if sheet.name else ""
-                                used_in_sheet = "Y"
-                                
-                                # ===== CRITICAL FIX: Check if workbook exists =====
-                                if sheet.workbook:
-                                    workbook = sheet.workbook
-                                    workbook_id = str(workbook.id) if workbook.id else ""
-                                    workbook_name = str(workbook.name) if workbook.name else ""
-                                    workbook_luid = str(workbook.luid) if workbook.luid else ""
-                                    created_date_wb = str(workbook.createdAt) if workbook.createdAt else ""
-                                    updated_date_wb = str(workbook.updatedAt) if workbook.updatedAt else ""
-                                    tags_wb = ", ".join([str(t.name) for t in workbook.tags]) if workbook.tags else ""
-                                    description = str(workbook.description) if workbook.description else ""
-                                    wb_project = str(workbook.projectName) if workbook.projectName else ""
-                                    wb_project_id = str(workbook.projectVizportalUrlId) if workbook.projectVizportalUrlId else ""
-                                else:
-                                    # Workbook is None - use empty values
-                                    logging.warning(f"Sheet {sheet_id} ({sheet_name}) has no workbook information")
-                                    workbook_id = workbook_name = workbook_luid = ""
-                                    created_date_wb = updated_date_wb = tags_wb = description = ""
-                                    wb_project = wb_project_id = ""
-                                
-                                # Check if sheet is in dashboards
-                                if sheet.containedInDashboards and len(sheet.containedInDashboards) > 0:
-                                    # Loop through each dashboard containing this sheet
-                                    for dashboard in sheet.containedInDashboards:
-                                        dashboard_id = str(dashboard.id) if dashboard.id else ""
-                                        dashboard_name = str(dashboard.name) if dashboard.name else ""
-                                        
-                                        flat_datasource_data.append({
-                                            "DSProject ID": ds_project_id,
-                                            "DSProject": ds_project,
-                                            "Datasource ID": datasource_id,
-                                            "datasource_luid":datasource_luid,
-                                            "Datasource": datasource_name,
-                                            "CreatedDate": created_date_ds,
-                                            "UpdatedDate": updated_date_ds,
-                                            "ContainsExtract": contains_extract,
-                                            "Tags": tags_ds,
-                                            "DataSorceType": datasource_type,
-                                            "FieldID": field_id,
-                                            "FieldName": field_name,
-                                            "FieldType": field_type,
-                                            "Formula": formula,
-                                            "Column": col_name,
-                                            "Table": table_name,
-                                            "Sheet ID": sheet_id,
-                                            "Sheet": sheet_name,
-                                            "UsedInSheet": used_in_sheet,
-                                            "Dashboard ID": dashboard_id,
-                                            "Dashboard": dashboard_name,
-                                            "Workbook ID": workbook_id,
-                                            "Workbook": workbook_name,
-                                            "WorkbookLUID": workbook_luid,
-                                            "WBCreatedDate": created_date_wb,
-                                            "WBUpdatedDate": updated_date_wb,
-                                            "WBTags": tags_wb,
-                                            "Description": description,
-                                            "WBProject": wb_project,
-                                            "WBProjectID": wb_project_id,
-                                            "CustomQueryID": query_id,
-                                            "Flag": "Datasource"
-                                        })
-                                else:
-                                    # Sheet not in any dashboard
-                                    flat_datasource_data.append({
-                                        "DSProject ID": ds_project_id,
-                                        "DSProject": ds_project,
-                                        "Datasource ID": datasource_id,
-                                        "datasource_luid":datasource_luid,
-                                        "Datasource": datasource_name,
-                                        "CreatedDate": created_date_ds,
-                                        "UpdatedDate": updated_date_ds,
-                                        "ContainsExtract": contains_extract,
-                                        "Tags": tags_ds,
-                                        "DataSorceType": datasource_type,
-                                        "FieldID": field_id,
-                                        "FieldName": field_name,
-                                        "FieldType": field_type,
-                                        "Formula": formula,
-                                        "Column": col_name,
-                                        "Table": table_name,
-                                        "Sheet ID": sheet_id,
-                                        "Sheet": sheet_name,
-                                        "UsedInSheet": used_in_sheet,
-                                        "Dashboard ID": "",
-                                        "Dashboard": "",
-                                        "Workbook ID": workbook_id,
-                                        "Workbook": workbook_name,
-                                        "WorkbookLUID": workbook_luid,
-                                        "WBCreatedDate": created_date_wb,
-                                        "WBUpdatedDate": updated_date_wb,
-                                        "WBTags": tags_wb,
-                                        "Description": description,
-                                        "WBProject": wb_project,
-                                        "WBProjectID": wb_project_id,
-                                        "CustomQueryID": query_id,
-                                        "Flag": "Datasource"
-                                    })
+                for upstream_col in field.upstreamColumns:
+                    col_name = str(upstream_col.name) if upstream_col.name else ""
+                    table = upstream_col.table
+                    table_name = str(table.name) if table and table.name else ""
+                    # Check if this column comes from a custom query
+                    query_id = str(table_column_query_map.get((table_name, col_name), ""))
+                    column_values = field_values + (col_name, table_name)
+
+                    if not (table and table.downstreamSheets):
+                        # Upstream column exists but its table has no downstream sheets
+                        yield column_values + ("", "", "N", "", "") + _NO_WORKBOOK + (query_id, "Datasource")
+                        continue
+
+                    # Loop through each sheet that uses this table
+                    for sheet in table.downstreamSheets:
+                        sheet_id = str(sheet.id) if sheet.id else ""
+                        sheet_name = str(sheet.name) if sheet.name else ""
+
+                        # ===== CRITICAL FIX: Check if workbook exists =====
+                        workbook = sheet.workbook
+                        if workbook:
+                            workbook_values = (
+                                str(workbook.id) if workbook.id else "",
+                                str(workbook.name) if workbook.name else "",
+                                str(workbook.luid) if workbook.luid else "",
+                                str(workbook.createdAt) if workbook.createdAt else "",
+                                str(workbook.updatedAt) if workbook.updatedAt else "",
+                                ", ".join([str(t.name) for t in workbook.tags]) if workbook.tags else "",
+                                str(workbook.description) if workbook.description else "",
+                                str(workbook.projectName) if workbook.projectName else "",
+                                str(workbook.projectVizportalUrlId) if workbook.projectVizportalUrlId else "",
+                            )
                         else:
-                            # Upstream column exists but its table has no downstream sheets
-                            flat_datasource_data.append({
-                                "DSProject ID": ds_project_id,
-                                "DSProject": ds_project,
-                                "Datasource ID": datasource_id,
-                                "datasource_luid": datasource_luid,
-                                "Datasource": datasource_name,
-                                "CreatedDate": created_date_ds,
-                                "UpdatedDate": updated_date_ds,
-                                "ContainsExtract": contains_extract,
-                                "Tags": tags_ds,
-                                "DataSorceType": datasource_type,
-                                "FieldID": field_id,
-                                "FieldName": field_name,
-                                "FieldType": field_type,
-                                "Formula": formula,
-                                "Column": col_name,
-                                "Table": table_name,
-                                "Sheet ID": "",
-                                "Sheet": "",
-                                "UsedInSheet": "N",
-                                "Dashboard ID": "",
-                                "Dashboard": "",
-                                "Workbook ID": "",
-                                "Workbook": "",
-                                "WorkbookLUID": "",
-                                "WBCreatedDate": "",
-                                "WBUpdatedDate": "",
-                                "WBTags": "",
-                                "Description": "",
-                                "WBProject": "",
-                                "WBProjectID": "",
-                                "CustomQueryID": query_id,
-                                "Flag": "Datasource"
-                            })
-                else:
-                    # Field has no upstream columns
-                    flat_datasource_data.append({
-                        "DSProject ID": ds_project_id,
-                        "DSProject": ds_project,
-                        "Datasource ID": datasource_id,
-                        "datasource_luid": datasource_luid,
-                        "Datasource": datasource_name,
-                        "CreatedDate": created_date_ds,
-                        "UpdatedDate": updated_date_ds,
-                        "ContainsExtract": contains_extract,
-                        "Tags": tags_ds,
-                        "DataSorceType": datasource_type,
-                        "FieldID": field_id,
-                        "FieldName": field_name,
-                        "FieldType": field_type,
-                        "Formula": formula,
-                        "Column": "",
-                        "Table": "",
-                        "Sheet ID": "",
-                        "Sheet": "",
-                        "UsedInSheet": "N",
-                        "Dashboard ID": "",
-                        "Dashboard": "",
-                        "Workbook ID": "",
-                        "Workbook": "",
-                        "WorkbookLUID": "",
-                        "WBCreatedDate": "",
-                        "WBUpdatedDate": "",
-                        "WBTags": "",
-                        "Description": "",
-                        "WBProject": "",
-                        "WBProjectID": "",
-                        "CustomQueryID": "",
-                        "Flag": "Datasource"
-                    })
-    
+                            # Workbook is None - use empty values
+                            logging.warning(f"Sheet {sheet_id} ({sheet_name}) has no workbook information")
+                            workbook_values = _NO_WORKBOOK
+
+                        sheet_values = column_values + (sheet_id, sheet_name, "Y")
+                        row_tail = workbook_values + (query_id, "Datasource")
+
+                        # Loop through each dashboard containing this sheet (or none)
+                        if sheet.containedInDashboards:
+                            for dashboard in sheet.containedInDashboards:
+                                yield sheet_values + (
+                                    str(dashboard.id) if dashboard.id else "",
+                                    str(dashboard.name) if dashboard.name else "",
+                                ) + row_tail
+                        else:
+                            yield sheet_values + ("", "") + row_tail
+
         logging.info("Flattened: Datasource Details at Datasource Level")
-        return flat_datasource_data
 
-    def get_flat_ds_custom_queries(self):
-        flat_query_data = []
+    def iter_flat_ds_query_rows(self):
+        """Yield DS_QUERY_COLUMNS tuples, one per (custom query, downstream workbook)."""
         seen = set() # deduplicate tracker
 
         for ds in self.datasource_metadata_response.publishedDatasources:
@@ -245,33 +135,43 @@ class TableauDatasourceDataManager:
             project_name = ds.projectName
             for upstream_tables in ds.upstreamTables:
                 # ONLY TABLES WITH CUSTOM QUERIES
-                if upstream_tables.referencedByQueries:
-                    for query in upstream_tables.referencedByQueries:
-                        query_text = (
-                            query.query.replace("\r\n", " ")
-                            if query.query else None
-                        )
-                        for col in query.columns:
-                            for wb in col.downstreamWorkbooks:
-                                key = (query.id, wb.id)  # deduplicate key
-
-                                if key in seen:
-                                    continue
-
-                                seen.add(key)
-                                flat_query_data.append({
-                                    "project_id": project_id,
-                                    "project_name": project_name,
-                                    "workbook_id": wb.id,
-                                    "workbook_name": wb.name,
-                                    "custom_query_id": query.id,
-                                    "custom_query_name": query.name,
-                                    "query": query_text,
-                                    "Flag": "Datasource"
-                                })
+                for query in upstream_tables.referencedByQueries or []:
+                    query_text = (
+                        query.query.replace("\r\n", " ")
+                        if query.query else None
+                    )
+                    for col in query.columns:
+                        for wb in col.downstreamWorkbooks:
+                            key = (query.id, wb.id)  # deduplicate key
+
+                            if key in seen:
+                                continue
+
+                            seen.add(key)
+                            yield (
+                                project_id, project_name, wb.id, wb.name,
+                                query.id, query.name, query_text, "Datasource",
+                            )
 
         logging.info("Flattened: Custom queries used in Datasources")
-        return flat_query_data
+
+    # -------------------------------------------------------
+    # COMPACT STORES (kept per session until the Excel job runs)
+    # -------------------------------------------------------
+    def get_datasource_row_store(self):
+        return ColumnarRows.from_rows(DS_DETAIL_COLUMNS, self.iter_flat_datasource_rows())
+
+    def get_ds_query_row_store(self):
+        return ColumnarRows.from_rows(DS_QUERY_COLUMNS, self.iter_flat_ds_query_rows())
+
+    # -------------------------------------------------------
+    # MATERIALIZED (list of dicts) VIEWS
+    # -------------------------------------------------------
+    def get_flat_datasource_details(self):
+        return [dict(zip(DS_DETAIL_COLUMNS, row)) for row in self.iter_flat_datasource_rows()]
+
+    def get_flat_ds_custom_queries(self):
+        return [dict(zip(DS_QUERY_COLUMNS, row)) for row in self.iter_flat_ds_query_rows()]
 
 
     # -------------------------------------------------------
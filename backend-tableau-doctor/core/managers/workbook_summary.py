@@ -0,0 +1,119 @@
+"""
+Workbook Summary Builder
+
+This module joins the per-workbook counts of `TableauDataManager`
+(`get_workbook_counts` and `get_datasource_counts`) into the typed
+`WorkbookSummary` behind the 'Summary' and 'Project Summary' sheets.
+
+The datasource counts are indexed once by workbook id, so the join is a single
+linear pass (a workbook name is not unique across projects). Count dicts
+without ids, e.g. from sessions stored before the ids were added, fall back to
+the workbook name and keep the first match, as the name lookup always did.
+Project rollups and site totals are accumulated in the same pass.
+
+Usage Example:
+    summary = build_workbook_summary(workbook_counts, datasource_counts)
+    summary.rows        # [WorkbookSummaryRow, ...] in workbook order
+    summary.projects    # [ProjectSummaryRow, ...] in first-seen order
+    summary.site        # SiteSummary
+    project_summary_records(summary)   # rows of the 'Project Summary' sheet, site totals last
+"""
+
+from core.models.tableau_summary_models import (
+    SummaryCounts, WorkbookSummaryRow, ProjectSummaryRow, SiteSummary, WorkbookSummary,
+)
+
+# Columns of the 'Summary' sheet (the table under the totals)
+SUMMARY_COLUMNS = [
+    "Workbook",
+    "Dashboards",
+    "Sheets",
+    "Fields",
+    "Field Types",
+    "Formula Fields",
+    "Datasources",
+    "Tables",
+    "Columns",
+    "Custom Queries",
+    "Custom Columns"
+]
+
+PROJECT_SUMMARY_COLUMNS = [
+    "Project ID",
+    "Project",
+    "Workbooks",
+    "Dashboards",
+    "Sheets",
+    "Fields",
+    "Formula Fields",
+    "Datasources",
+    "Tables",
+    "Columns",
+    "Custom Queries",
+    "Custom Columns"
+]
+
+_ADDITIVE_FIELDS = tuple(SummaryCounts.model_fields)
+_WORKBOOK_COUNT_KEYS = ("Dashboards", "Sheets", "Fields", "Field Types", "Formula Fields")
+_DATASOURCE_COUNT_KEYS = ("Datasources", "Tables", "Columns", "Custom Queries", "Custom Columns")
+
+
+def _join_key(counts):
+    workbook_id = counts.get("Workbook ID")
+    return ("id", workbook_id) if workbook_id else ("name", counts.get("Workbook"))
+
+
+def as_records(models, columns):
+    """Dicts keyed by the Excel headers, in `columns` order (data sheets take their column order from it)."""
+    records = []
+    for model in models:
+        values = model.model_dump(by_alias=True)
+        records.append({column: values[column] for column in columns})
+    return records
+
+
+def project_summary_records(summary):
+    """Rows of the 'Project Summary' sheet: one per project, then the site totals."""
+    records = as_records(summary.projects, PROJECT_SUMMARY_COLUMNS)
+    site = summary.site.model_dump(by_alias=True)
+    totals = {column: site.get(column) for column in PROJECT_SUMMARY_COLUMNS}
+    totals["Project"] = f"Site total ({summary.site.projects} projects)"
+    records.append(totals)
+    return records
+
+
+def build_workbook_summary(workbook_counts, datasource_counts):
+    """Join workbook and datasource counts by workbook id and roll them up per project and site."""
+    datasource_index = {}
+    for counts in datasource_counts:
+        datasource_index.setdefault(_join_key(counts), counts)
+
+    rows = []
+    projects = {}  # project key -> ProjectSummaryRow
+    site = SiteSummary()
+    for wb in workbook_counts:
+        ds_match = datasource_index.get(_join_key(wb)) or {}
+        values = {key: wb.get(key, 0) for key in _WORKBOOK_COUNT_KEYS}
+        values.update({key: ds_match.get(key, 0) for key in _DATASOURCE_COUNT_KEYS})
+        row = WorkbookSummaryRow(
+            workbook_id=wb.get("Workbook ID"),
+            workbook=wb.get("Workbook"),
+            project_id=wb.get("Project ID"),
+            project=wb.get("Project"),
+            **values,
+        )
+        rows.append(row)
+
+        project_key = (row.project_id, row.project)
+        project = projects.get(project_key)
+        if project is None:
+            project = projects[project_key] = ProjectSummaryRow(project_id=row.project_id, project=row.project)
+        project.workbooks += 1
+        site.workbooks += 1
+        for name in _ADDITIVE_FIELDS:
+            value = getattr(row, name)
+            setattr(project, name, getattr(project, name) + value)
+            setattr(site, name, getattr(site, name) + value)
+
+    site.projects = len(projects)
+    return WorkbookSummary(rows=rows, projects=list(projects.values()), site=site)
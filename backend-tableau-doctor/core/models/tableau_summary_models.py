@@ -0,0 +1,51 @@
+"""
+This module defines Pydantic data models for the workbook summary: one row per
+workbook (workbook counts joined with datasource counts), the per-project
+rollups and the site-level totals. Field aliases are the Excel column headers.
+"""
+
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+
+
+class SummaryCounts(BaseModel):
+    # Counts shared by workbook rows and rollups (additive across workbooks)
+    model_config = ConfigDict(populate_by_name=True)
+
+    dashboards: int = Field(0, alias="Dashboards")
+    sheets: int = Field(0, alias="Sheets")
+    fields: int = Field(0, alias="Fields")
+    formula_fields: int = Field(0, alias="Formula Fields")
+    datasources: int = Field(0, alias="Datasources")
+    tables: int = Field(0, alias="Tables")
+    columns: int = Field(0, alias="Columns")
+    custom_queries: int = Field(0, alias="Custom Queries")
+    custom_columns: int = Field(0, alias="Custom Columns")
+
+
+class WorkbookSummaryRow(SummaryCounts):
+    # One workbook of the 'Summary' sheet
+    workbook_id: Optional[str] = Field(None, alias="Workbook ID")
+    workbook: Optional[str] = Field(None, alias="Workbook")
+    project_id: Optional[str] = Field(None, alias="Project ID")
+    project: Optional[str] = Field(None, alias="Project")
+    field_types: int = Field(0, alias="Field Types")  # distinct per workbook, not additive
+
+
+class ProjectSummaryRow(SummaryCounts):
+    # Rollup of the workbooks of one project
+    project_id: Optional[str] = Field(None, alias="Project ID")
+    project: Optional[str] = Field(None, alias="Project")
+    workbooks: int = Field(0, alias="Workbooks")
+
+
+class SiteSummary(SummaryCounts):
+    # Rollup of every workbook in the export
+    projects: int = Field(0, alias="Projects")
+    workbooks: int = Field(0, alias="Workbooks")
+
+
+class WorkbookSummary(BaseModel):
+    rows: List[WorkbookSummaryRow] = []
+    projects: List[ProjectSummaryRow] = []
+    site: SiteSummary = Field(default_factory=SiteSummary)
@@ -3,10 +3,18 @@ from fastapi import FastAPI, HTTPException, logger
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI, HTTPException, Response, Cookie
 import requests
-from util.auth_clients.tableau_auth import TableauAuthClient
-from util.query_clients.tableau_query_client import TableauQueryClient
+from util.auth_clients.tableau_auth import TableauAuthClient, AsyncTableauAuthClient
+from util.query_clients.tableau_query_client import TableauQueryClient, AsyncTableauQueryClient
 from util.config_managers.tableau_reader import TableauConfigManager
 from util.tableau_excel_generator import TableauExcellGenerator
+from util.http_session import get_http_session
+from util.async_http_client import get_async_http_client, close_async_http_client
+from starlette.concurrency import run_in_threadpool
+import httpx
+from util.catalog_cache import workbook_catalog_cache
+from util.single_flight import caller_scope
+from util.snapshot_cache import get_snapshot_cache
+from util.json_decoding import parse_response
 from core.models.tableau_dropdown_loader_models import DropdownLoaderResponse
 from core.models.tableau_workbook_models import WorkbooksResponse
 from core.models.tableau_datasource_models import DatasourceMetadataResponse
@@ -15,6 +23,7 @@ from core.managers.tableau_datasource_manager import TableauDatasourceDataManage
 from pydantic import BaseModel
 from typing import List, Optional
 from ExaGen_Tb_Migrator_Tool.migrate_to_prod import run_migration_from_api
+from ExaGen_Tb_Migrator_Tool.session_manager import tableau_sessions
 from sse_starlette.sse import EventSourceResponse
 import asyncio
 import json
@@ -24,6 +33,14 @@ import psycopg2
 import mysql.connector
 import threading
 from util.s3_uploader import upload_excel_to_s3
+from util.export_builder import (
+    EXPORT_FORMATS, build_export_files, remove_export_files,
+    write_summary_counts, write_summary_counts_from_data,
+)
+from util.session_store import get_session_store
+from util.bounded_store import BoundedStore
+from util.job_scheduler import JobScheduler, QueueFullError
+from util.progress_channel import build_progress_channel, TERMINAL_STATUSES
 import os
 
 
@@ -37,7 +54,13 @@ app = FastAPI()
 def health():
     return {"status": "ok"}
 # Add this line after app initialization
-progress_store = {}
+memory_limits = TableauConfigManager().get_memory_limit_settings()
+progress_store = BoundedStore(
+    "deploy_progress",
+    max_bytes=memory_limits["progress_max_bytes"],
+    ttl_seconds=memory_limits["progress_ttl_seconds"],
+)
+progress_channel = build_progress_channel(progress_store)
 #deployment_results = {} # Store final results of deployments (url)
 
 app.add_middleware(
@@ -52,10 +75,25 @@ app.add_middleware(
 
 def init_clients( token_name=None, token_value=None,tableau_token: str | None = None,site_id: str | None = None):
     config = TableauConfigManager()
-    auth_client = TableauAuthClient(config=config, token_name=token_name, token_value=token_value,auth_token=tableau_token,site_id=site_id)
-    query_client = TableauQueryClient(auth_client)
+    session = get_http_session()
+    auth_client = TableauAuthClient(config=config, token_name=token_name, token_value=token_value,auth_token=tableau_token,site_id=site_id, session=session)
+    query_client = TableauQueryClient(auth_client, session=session)
+    return auth_client, query_client
+
+def init_async_clients(token_name=None, token_value=None, tableau_token: str | None = None, site_id: str | None = None):
+    """Async clients for the async routes; they share the event loop's httpx connection pool."""
+    config = TableauConfigManager()
+    client = get_async_http_client()
+    auth_client = AsyncTableauAuthClient(config=config, token_name=token_name, token_value=token_value, auth_token=tableau_token, site_id=site_id, client=client)
+    query_client = AsyncTableauQueryClient(auth_client, client=client)
     return auth_client, query_client
 
+@app.on_event("shutdown")
+async def close_http_clients():
+    await close_async_http_client()
+    # Sign out the shared migration sessions (one per environment)
+    await run_in_threadpool(tableau_sessions.close_all)
+
 # # 1) Test JWT generation
 # @app.get("/auth/jwt")
 # def generate_jwt():
@@ -63,13 +101,13 @@ def init_clients( token_name=None, token_value=None,tableau_token: str | None =
 
 # 2) Test Tableau login
 @app.post("/bi/auth/login")
-def login(req: LoginRequest,response: Response):
+async def login(req: LoginRequest,response: Response):
     try:
-        auth_client, _ = init_clients(
+        auth_client, _ = init_async_clients(
             token_name=req.token_name,
             token_value=req.token_value
         )
-        auth_token, site_id, username = auth_client.sign_in()
+        auth_token, site_id, username = await auth_client.sign_in()
         # ✅ set secure cookie
         response.set_cookie(
             key="tableau_token",
@@ -94,17 +132,17 @@ def auth_me(tableau_token: str | None = Cookie(default=None)):
         raise HTTPException(status_code=401, detail="Not authenticated")
     return {"authenticated": True}
         
-def refresh_tableau_session(response: Response, token_name: str, token_value: str):
+async def refresh_tableau_session(response: Response, token_name: str, token_value: str):
     """
     Force a fresh Tableau REST sign-in and overwrite cookies.
     Used ONLY when metadata token is invalidated.
     """
-    auth_client, _ = init_clients(
+    auth_client, _ = init_async_clients(
         token_name=token_name,
         token_value=token_value
     )
 
-    new_token, new_site_id, username = auth_client.sign_in()
+    new_token, new_site_id, username = await auth_client.sign_in()
 
     # overwrite cookies
     response.set_cookie("tableau_token", new_token, httponly=True, max_age=7200)
@@ -115,9 +153,25 @@ def refresh_tableau_session(response: Response, token_name: str, token_value: st
 
     return new_token, new_site_id        
 # 3) Test workbook dropdown loader
+async def load_workbook_catalog(token, site_id, refresh=False):
+    """Return the cached site catalog, fetching every workbook only on a cache miss."""
+    async def fetch_workbooks():
+        auth_client, qc = init_async_clients(
+            tableau_token=token,
+            site_id=site_id
+        )
+        # Stream the site page by page, the catalog only keeps its indexes
+        async for page in qc.iter_workbook_pages():
+            for wb in page:
+                yield wb
+
+    # Catalogs are permission-filtered: one per user session, never shared across users
+    return await workbook_catalog_cache.aget(site_id, fetch_workbooks, refresh=refresh, owner=caller_scope(token))
+
 @app.get("/bi/tableau/projects")
-def load_projects(
+async def load_projects(
     response: Response,
+    refresh: bool = False,
     tableau_token: str | None = Cookie(default=None),
     tableau_site_id: str | None = Cookie(default=None),
     tableau_token_name: str | None = Cookie(default=None),
@@ -126,19 +180,11 @@ def load_projects(
     if not tableau_token or not tableau_site_id:
         raise HTTPException(401, "Not authenticated")
 
-    def fetch_projects(token, site_id):
-        auth_client, qc = init_clients(
-            tableau_token=token,
-            site_id=site_id
-        )
-        query = qc.query_loader()
-        return qc.send_request(query)
-
     try:
         # First attempt
-        result = fetch_projects(tableau_token, tableau_site_id)
+        catalog = await load_workbook_catalog(tableau_token, tableau_site_id, refresh)
 
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         #  THIS IS THE IMPORTANT PART
         if e.response is not None and e.response.status_code == 401:
             logging.warning(" Metadata token invalidated. Re-authenticating...")
@@ -147,85 +193,50 @@ def load_projects(
                 raise HTTPException(401, "Session expired. Please login again.")
 
             # Re-login and overwrite cookies
-            new_token, new_site_id = refresh_tableau_session(
+            new_token, new_site_id = await refresh_tableau_session(
                 response,
                 tableau_token_name,
                 tableau_token_value
             )
 
             # Retry ONCE
-            result = fetch_projects(new_token, new_site_id)
+            catalog = await load_workbook_catalog(new_token, new_site_id, refresh)
         else:
             raise
 
-    workbooks = result.get("data", {}).get("workbooks", [])
-    project_map = {}
-
-    for wb in workbooks:
-        if wb.get("projectLuid") and wb.get("projectName") and wb.get("projectVizportalUrlId"):
-            project_map[wb["projectLuid"]] = {
-                "project_name": wb["projectName"],
-                "projectvizporturl_id": wb["projectVizportalUrlId"]
-            }
+    return catalog.get_projects()
 
-    return [
-        {
-            "project_luid": k,
-            "project_name": v["project_name"],
-            "projectvizporturl_id": v["projectvizporturl_id"]
-        }
-        for k, v in project_map.items()
-    ]
 @app.get("/bi/tableau/workbooks")
-def get_workbooks_for_project(
+async def get_workbooks_for_project(
     project_luid: str,
+    refresh: bool = False,
     tableau_token: str | None = Cookie(default=None),
     tableau_site_id: str | None = Cookie(default=None),
 ):
     if not tableau_token or not tableau_site_id:
         raise HTTPException(401, "Not authenticated")
 
-    auth_client, qc = init_clients(
-        tableau_token=tableau_token,
-        site_id=tableau_site_id
-    )
-    # Workbook query
-    query = qc.query_loader()
-    result = qc.send_request(query)
-    workbooks = result.get("data", {}).get("workbooks", [])
-
-    #  FILTER + DISTINCT for workbook details(based on projectLuid)
-    seen = set()
-    filtered_workbooks = []
+    # Workbooks of the project (DISTINCT by luid) come straight from the catalog index
+    catalog = await load_workbook_catalog(tableau_token, tableau_site_id, refresh)
+    return catalog.get_workbooks(project_luid)
 
-    for wb in workbooks:
-        if wb.get("projectLuid") != project_luid:
-            continue
-
-        luid = wb.get("luid")
-        if not luid or luid in seen:
-            continue
-
-        seen.add(luid)
-        
-        datasources = []
-        for ds in wb.get("upstreamDatasources", []):
-            datasources.append({
-                "luid": ds.get("luid"),
-                "name": ds.get("name")
-            })
-
-        filtered_workbooks.append({
-            "id": wb.get("id"),
-            "luid": wb.get("luid"),
-            "name": wb.get("name"),
-            "datasources": datasources
-        })
+@app.post("/bi/tableau/catalog/invalidate")
+async def invalidate_workbook_catalog(
+    tableau_token: str | None = Cookie(default=None),
+    tableau_site_id: str | None = Cookie(default=None),
+):
+    if not tableau_token or not tableau_site_id:
+        raise HTTPException(401, "Not authenticated")
 
-    return filtered_workbooks
+    workbook_catalog_cache.invalidate(tableau_site_id)
+    snapshot_cache = get_snapshot_cache()
+    if snapshot_cache is not None:
+        # Next metadata run re-fetches every workbook / datasource of the site
+        await run_in_threadpool(snapshot_cache.invalidate, f"{TableauConfigManager().get_server_url()}|{tableau_site_id}")
+    return {"status": "success", "message": "Workbook catalog invalidated"}
 
 @app.get("/bi/tableau/datasources")
-def get_datasources_for_project(
+async def get_datasources_for_project(
     project_vizportal_url_id: str,
     tableau_token: str | None = Cookie(default=None),
     tableau_site_id: str | None = Cookie(default=None),
@@ -233,33 +244,29 @@ def get_datasources_for_project(
     if not tableau_token or not tableau_site_id:
         raise HTTPException(401, "Not authenticated")
 
-    auth_client, qc = init_clients(
+    auth_client, qc = init_async_clients(
         tableau_token=tableau_token,
         site_id=tableau_site_id
     )
-    # Datasource query
-    datasource_query = qc.query_datasource()
-    datasource_result = qc.send_request(datasource_query)
-
-    # FILTER + DISTINCT for datasource details (based on projectVizportalUrlId)
-    datasources = datasource_result.get("data", {}).get("publishedDatasources", [])
-    logging.info(f"datasources retrieved: {datasources}")
+    # Datasource query, filtered to the project on the server and read page by page
     ds_seen = set()
     filtered_datasources = []
 
-    for ds in datasources:
-        if ds.get("projectVizportalUrlId") != project_vizportal_url_id:
-            continue
-        ds_id = ds.get("id")
-        if not ds_id or ds_id in ds_seen:
-            continue
-
-        ds_seen.add(ds_id)
-        filtered_datasources.append({
-            "id": ds.get("id"),
-            "luid": ds.get("luid"),
-            "name": ds.get("name")
-        })
+    async for page in qc.iter_datasource_pages(project_vizportal_url_id=project_vizportal_url_id):
+        logging.info(f"datasources retrieved: {len(page)}")
+        for ds in page:
+            if ds.get("projectVizportalUrlId") != project_vizportal_url_id:
+                continue
+            ds_id = ds.get("id")
+            if not ds_id or ds_id in ds_seen:
+                continue
+
+            ds_seen.add(ds_id)
+            filtered_datasources.append({
+                "id": ds.get("id"),
+                "luid": ds.get("luid"),
+                "name": ds.get("name")
+            })
 
     return filtered_datasources
 
@@ -289,30 +296,22 @@ from typing import List, Dict, Any
 import logging
 from threading import Lock
 
-# ============ GLOBAL STORAGE ============
-# Thread-safe storage for metadata
-metadata_storage: Dict[str, Dict[str, Any]] = {}
-storage_lock = Lock()
-
+# ============ SESSION STORAGE ============
+# Session metadata lives in the configured session store (memory or Redis),
+# so the metadata and Excel endpoints may be served by different workers.
 def store_metadata(session_key: str, metadata_type: str, data: Any):
-    """Thread-safe storage of metadata"""
-    with storage_lock:
-        if session_key not in metadata_storage:
-            metadata_storage[session_key] = {}
-        metadata_storage[session_key][metadata_type] = data
-        logging.info(f"Stored {metadata_type} for session {session_key}")
+    """Store one metadata type of a session"""
+    get_session_store().set(session_key, metadata_type, data)
+    logging.info(f"Stored {metadata_type} for session {session_key}")
 
 def get_metadata(session_key: str) -> Dict[str, Any]:
-    """Thread-safe retrieval of metadata"""
-    with storage_lock:
-        return metadata_storage.get(session_key, {})
+    """Retrieve all stored metadata of a session"""
+    return get_session_store().get(session_key)
 
 def clear_metadata(session_key: str):
-    """Thread-safe cleanup of metadata"""
-    with storage_lock:
-        if session_key in metadata_storage:
-            del metadata_storage[session_key]
-            logging.info(f"Cleared metadata for session {session_key}")
+    """Cleanup of a session's metadata"""
+    if get_session_store().clear(session_key):
+        logging.info(f"Cleared metadata for session {session_key}")
 
 
 # ============ MODELS ============
@@ -330,11 +329,12 @@ class DsMetadataRequest(BaseModel):
 
 class GenerateExcelRequest(BaseModel):
     session_key: str  # Only need session key now
+    formats: List[str] = ["xlsx"]  # any of EXPORT_FORMATS
 
 
 # ============ WORKBOOK METADATA ENDPOINT ============
 @app.post("/bi/tableau/workbook_metadata")
-def get_workbooks_metadata_for_project(
+async def get_workbooks_metadata_for_project(
     req: MetadataRequest, 
     tableau_token: str | None = Cookie(default=None),
     tableau_site_id: str | None = Cookie(default=None)
@@ -343,43 +343,45 @@ def get_workbooks_metadata_for_project(
         if not tableau_token or not tableau_site_id:
             raise HTTPException(401, "Not authenticated")
 
-        auth_client, qc = init_clients(
+        auth_client, qc = init_async_clients(
             tableau_token=tableau_token,
             site_id=tableau_site_id
         )
         
         logging.info(f"Processing workbook metadata for session: {req.session_key}")
         
-        query = qc.query_workbook_metadata(req.workbook_ids)
-        raw_metadata = qc.send_request(query)
-
-        # Convert raw response → WorkbooksResponse model
-        full_workbook_data = WorkbooksResponse.parse_obj(
-            raw_metadata["data"]
+        # Large selections are split into node-bounded chunks and merged
+        # Metadata chunks and usage-statistics calls are in flight together
+        raw_metadata, usage_stats_response = await asyncio.gather(
+            qc.fetch_workbook_metadata(req.workbook_ids),
+            qc.get_usage_stats_wb(workbook_luids=req.workbook_luids),
         )
 
-        # Initialize DataManager (FLATTENING happens here)
-        data_manager = TableauDataManager(full_workbook_data)
-
-        flat_data_wb = data_manager.get_flat_wb_data()
-        flat_data_embd, flat_data_query = data_manager.get_flat_embd_data()
+        def process_workbooks():
+            # CPU-bound parsing / flattening runs off the event loop
+            full_workbook_data = parse_response(WorkbooksResponse, raw_metadata["data"])
+
+            # Initialize DataManager (FLATTENING happens here)
+            data_manager = TableauDataManager(full_workbook_data)
+
+            # Dictionary-encoded row stores: kept per session until the Excel job runs
+            flat_data_wb = data_manager.get_wb_row_store()
+            flat_data_embd, flat_data_query = data_manager.get_embd_row_stores()
+
+            # STORE IN GLOBAL VARIABLE instead of returning
+            workbook_processed_data = {
+                "workbook_details": flat_data_wb,
+                "datasource_details": flat_data_embd,
+                "custom_query_details": flat_data_query,
+                "usage_statistics": usage_stats_response,
+                "workbook_counts": data_manager.get_workbook_counts(),
+                "datasource_counts": data_manager.get_datasource_counts()
+            }
 
-        # Fetch usage stats
-        usage_stats_response = qc.get_usage_stats_wb(
-            workbook_luids=req.workbook_luids
-        )
+            store_metadata(req.session_key, "workbook", workbook_processed_data)
+            return flat_data_wb, flat_data_embd, flat_data_query
 
-        # STORE IN GLOBAL VARIABLE instead of returning
-        workbook_processed_data = {
-            "workbook_details": flat_data_wb,
-            "datasource_details": flat_data_embd,
-            "custom_query_details": flat_data_query,
-            "usage_statistics": usage_stats_response,
-            "workbook_counts": data_manager.get_workbook_counts(),
-            "datasource_counts": data_manager.get_datasource_counts()
-        }
-        
-        store_metadata(req.session_key, "workbook", workbook_processed_data)
+        flat_data_wb, flat_data_embd, flat_data_query = await run_in_threadpool(process_workbooks)
         
         logging.info(f"Workbook data stored: {len(flat_data_wb)} rows")
 
@@ -403,7 +405,7 @@ def get_workbooks_metadata_for_project(
 
 # ============ DATASOURCE METADATA ENDPOINT ============
 @app.post("/bi/tableau/datasource_metadata")
-def get_datasource_metadata_for_project(
+async def get_datasource_metadata_for_project(
     req: DsMetadataRequest, 
     tableau_token: str | None = Cookie(default=None),
     tableau_site_id: str | None = Cookie(default=None)
@@ -412,37 +414,39 @@ def get_datasource_metadata_for_project(
         if not tableau_token or not tableau_site_id:
             raise HTTPException(401, "Not authenticated")
 
-        auth_client, qc = init_clients(
+        auth_client, qc = init_async_clients(
             tableau_token=tableau_token,
             site_id=tableau_site_id
         )
         
         logging.info(f"Processing datasource metadata for session: {req.session_key}")
         
-        ds_query = qc.query_datasource_metadata(req.datasource_ids)
-        raw_metadata_ds = qc.send_request(ds_query)
+        # Large selections are split into node-bounded chunks and merged
+        raw_metadata_ds = await qc.fetch_datasource_metadata(req.datasource_ids)
 
-        # Convert raw response → DatasourceMetadataResponse model
-        full_datasource_data = DatasourceMetadataResponse.parse_obj(
-            raw_metadata_ds["data"]
-        )
+        def process_datasources():
+            # CPU-bound parsing / flattening runs off the event loop
+            full_datasource_data = parse_response(DatasourceMetadataResponse, raw_metadata_ds["data"])
 
-        # Initialize DataManager (FLATTENING happens here)
-        ds_data_manager = TableauDatasourceDataManager(full_datasource_data)
+            # Initialize DataManager (FLATTENING happens here)
+            ds_data_manager = TableauDatasourceDataManager(full_datasource_data)
+
+            flat_datasource_details = ds_data_manager.get_datasource_row_store()
+            flat_datasource_custom_query = ds_data_manager.get_ds_query_row_store()
+
+            # STORE IN GLOBAL VARIABLE instead of returning
+            datasource_processed_data = {
+                "datasource_details": flat_datasource_details,
+                "custom_query_details": flat_datasource_custom_query,
+            }
+
+            store_metadata(req.session_key, "datasource", datasource_processed_data)
+            return flat_datasource_details, flat_datasource_custom_query
+
+        flat_datasource_details, flat_datasource_custom_query = await run_in_threadpool(process_datasources)
 
-        flat_datasource_details = ds_data_manager.get_flat_datasource_details()
-        flat_datasource_custom_query = ds_data_manager.get_flat_ds_custom_queries()
-        
         logging.info(f"Flattened {len(flat_datasource_details)} datasource rows")
         logging.info(f"Flattened {len(flat_datasource_custom_query)} custom query rows")
-
-        # STORE IN GLOBAL VARIABLE instead of returning
-        datasource_processed_data = {
-            "datasource_details": flat_datasource_details,
-            "custom_query_details": flat_datasource_custom_query,
-        }
-        
-        store_metadata(req.session_key, "datasource", datasource_processed_data)
         
         # Return minimal response
         return {
@@ -593,11 +597,18 @@ def get_datasource_metadata_for_project(
 #         raise HTTPException(500, f"Excel generation error: {str(e)}")
 
 # ============ EXCEL JOB STATUS ============
-excel_job_status: Dict[str, Dict[str, Any]] = {}
+excel_job_status = BoundedStore(
+    "excel_jobs",
+    max_bytes=memory_limits["job_status_max_bytes"],
+    ttl_seconds=memory_limits["job_status_ttl_seconds"],
+)
 excel_status_lock = Lock()
 
-def generate_excel_worker(session_key: str):
-    excel_generator = None
+EXPORT_BUCKET = "tableau-doctor-output"
+
+def generate_excel_worker(job, formats: List[str] = ("xlsx",)):
+    session_key = job.key
+    files = {}
     with excel_status_lock:
         excel_job_status[session_key] = {
             "status": "processing",
@@ -610,108 +621,53 @@ def generate_excel_worker(session_key: str):
         session_data = get_metadata(session_key)
         if not session_data:
             raise Exception(f"No metadata found for session {session_key}")
-        
+
         wb_processed = session_data.get("workbook", {})
         ds_processed = session_data.get("datasource", {})
 
         if not wb_processed:
             raise Exception("Workbook metadata not found")
-        
+
         if not ds_processed:
             raise Exception("Datasource metadata not found")
-        
+
         logging.info(f"Retrieved workbook data: {len(wb_processed.get('workbook_details', []))} rows")
         logging.info(f"Retrieved datasource data: {len(ds_processed.get('datasource_details', []))} rows")
 
-        # ============ COMBINED EXCEL PACKAGE ============
-        package = [
-            {
-                "sheet_name": "WB_Dashboard Details",
-                "payload": wb_processed.get("workbook_details", []),
-                'columns': [
-                    'Project ID', 'Project', 'Workbook ID', 'Workbook',
-                    'Workbook Owner ID', 'Workbook Owner Username',
-                    'Dashboard ID', 'Dashboard', 'Sheet ID', 'Sheet',
-                    'Field ID', 'Field', 'Field Type',
-                    'Datasource ID', 'Datasource', 'Table Name',
-                    'Column Name', 'Formula'
-                ],
-            },
-            {
-                "sheet_name": "WB_Datasource Details",
-                "payload": wb_processed.get("datasource_details", []),
-                 'columns': [
-                    'WB_Project ID', 'WB_Project', 'Workbook ID', 'Workbook LUID', 'Workbook', 'WB_Created Date', 'WB_Updated Date', 'WB_Tags', 'Description',
-                    'Datasource ID', 'datasource_luid', 'Datasource', 'DS_Created Date', 'DS_Updated Date', 'DS_Project ID', 'DS_Project', 'DS_Tags', 'Contains Extract', 'DataSource Type',
-                    'Field ID', 'Field Name', 'Field Type', 'Formula', 'Table', 'Column', 'Sheet ID', 'Sheet', 'Used In Sheet', 'Dashboard ID', 'Dashboard', 'Custom Query', 'Flag'
-                ],
-            },
-            {
-                "sheet_name": "WB_Custom Query Details",
-                "payload": wb_processed.get("custom_query_details", []),
-                'columns': [
-                    'Project ID', 'Project', 'Workbook ID', 'Workbook',
-                    'Custom Query ID', 'Custom Query', 'Query', 'Flag'
-                ],
-            },
-            {
-                "sheet_name": "WB_Usage Statistics",
-                "payload": wb_processed.get("usage_statistics", []),
-                'columns': [
-                    'Project ID', 'project', 'workbook ID', 'Workbook',
-                    'View ID', 'View', 'created_at', 'updated_at', 'Total Views'
-                ],
-            },
-            {
-                "sheet_name": "DS_Datasource Details",
-                "payload": ds_processed.get("datasource_details", []),
-                "columns": [
-                    "DS_Project ID", "DS_Project", "Datasource ID","datasource_luid", "Datasource", "DS_Created Date", "DS_Updated Date", "Contains Extract",
-                    "DS_Tags", "DataSource Type", "Field ID", "Field Name", "Field Type", "Formula", "Column", "Table", "Sheet ID", "Sheet",
-                    "Used In Sheet", "Dashboard ID", "Dashboard", "Workbook ID", "Workbook", "Workbook LUID", "WB_Created Date", "WB_Updated Date",
-                    "WB_Tags", "Description", "WB_Project", "WB_Project ID", "Custom Query", "Flag"
-                ],
-            },
-            {
-                "sheet_name": "DS_Custom Query Details",
-                "payload": ds_processed.get("custom_query_details", []),
-                'columns': [
-                    'Project ID', 'Project', 'Workbook ID', 'Workbook',
-                    'Custom Query ID', 'Custom Query', 'Query', "Flag"
-                ],
-            },
-        ]
+        # Build the files in the worker process pool
+        files = excel_scheduler.run_in_pool(build_export_files, session_data, list(formats))
 
-        logging.info("Package created, generating Excel...")
-        
-        # Generate Excel
-        excel_generator = TableauExcellGenerator(package=package)
-        excel_generator.generate_spreadsheet()
-        excel_generator.format_excel()
-        
-        # Generate summary sheet with combined counts
-        workbook_counts = wb_processed.get("workbook_counts", [])
-        datasource_counts = wb_processed.get("datasource_counts", [])
-        
-        write_summary_counts_from_data(
-            excel_generator, 
-            workbook_counts, 
-            datasource_counts
-        )
+        # A running build cannot be interrupted; a cancelled job stops before uploading
+        if job.cancelled:
+            with excel_status_lock:
+                excel_job_status[session_key] = {
+                    "status": "cancelled",
+                    "message": "Excel generation cancelled"
+                }
+            logging.info(f"[THREAD] Excel job cancelled for session {session_key}")
+            return
 
         # Upload to S3
-        s3_key = upload_excel_to_s3(
-            local_file_path=excel_generator.file_path,
-            bucket="tableau-doctor-output"
-        )
+        download_urls = {}
+        for file_format, paths in files.items():
+            if file_format == "xlsx":
+                s3_key = upload_excel_to_s3(local_file_path=paths, bucket=EXPORT_BUCKET)
+                download_urls["xlsx"] = f"https://{EXPORT_BUCKET}.s3.amazonaws.com/{s3_key}"
+            else:
+                download_urls[file_format] = [
+                    f"https://{EXPORT_BUCKET}.s3.amazonaws.com/"
+                    + upload_excel_to_s3(local_file_path=path, bucket=EXPORT_BUCKET)
+                    for path in paths
+                ]
+
         #  mark completed
         with excel_status_lock:
             excel_job_status[session_key] = {
                 "status": "completed",
-                "download_url": f"https://tableau-doctor-output.s3.amazonaws.com/{s3_key}"
+                "download_url": download_urls.get("xlsx"),
+                "download_urls": download_urls
             }
 
-        logging.info("[THREAD] Excel generated & uploaded")
         logging.info("[THREAD] Excel generated & uploaded successfully")
 
     except Exception as e:
@@ -727,11 +683,21 @@ def generate_excel_worker(session_key: str):
         clear_metadata(session_key)
 
         # Cleanup disk
-        if excel_generator and os.path.exists(excel_generator.file_path):
-            os.remove(excel_generator.file_path)
+        remove_export_files(files)
 
         logging.info(f"[THREAD] Cleanup completed for session {session_key}")
 
+
+excel_job_settings = TableauConfigManager().get_excel_job_settings()
+excel_scheduler = JobScheduler(
+    "excel",
+    runner=generate_excel_worker,
+    max_workers=excel_job_settings["max_workers"],
+    max_queue=excel_job_settings["max_queued_jobs"],
+    use_processes=excel_job_settings["use_processes"],
+)
+
+
 @app.post("/bi/tableau/generate_combined_excel")
 def generate_combined_excel(
     req: GenerateExcelRequest,
@@ -741,23 +707,43 @@ def generate_combined_excel(
     if not tableau_token or not tableau_site_id:
         raise HTTPException(401, "Not authenticated")
 
-    logging.info(f"Received Excel request for session: {req.session_key}")
+    formats = list(dict.fromkeys(req.formats or ["xlsx"]))
+    unsupported = [f for f in formats if f not in EXPORT_FORMATS]
+    if unsupported:
+        raise HTTPException(400, f"Unsupported export formats: {unsupported}. Use any of {list(EXPORT_FORMATS)}")
 
-    thread = threading.Thread(
-        target=generate_excel_worker,
-        args=(req.session_key,),
-        daemon=True
-    )
-    thread.start()
+    logging.info(f"Received Excel request for session: {req.session_key} (formats: {formats})")
+
+    try:
+        job, created = excel_scheduler.submit(req.session_key, formats)
+    except QueueFullError as e:
+        raise HTTPException(429, f"Too many Excel jobs queued, try again later ({e})")
+
+    if not created:
+        return {
+            "status": "attached",
+            "message": f"Excel generation already {job.state} for this session",
+            "session_key": req.session_key,
+            "queue_position": excel_scheduler.position(req.session_key)
+        }
 
     return {
         "status": "started",
         "message": "Excel generation started",
-        "session_key": req.session_key
+        "session_key": req.session_key,
+        "queue_position": excel_scheduler.position(req.session_key)
     }
 
 @app.get("/bi/tableau/excel/status")
 def get_excel_status(session_key: str):
+    position = excel_scheduler.position(session_key)
+    if position:
+        return {
+            "status": "queued",
+            "message": f"Waiting for a free worker (position {position})",
+            "queue_position": position
+        }
+
     with excel_status_lock:
         status = excel_job_status.get(session_key)
 
@@ -768,21 +754,43 @@ def get_excel_status(session_key: str):
         }
 
     return status
+
+@app.post("/bi/tableau/excel/cancel")
+def cancel_excel_job(session_key: str):
+    result = excel_scheduler.cancel(session_key)
+    if result is None:
+        raise HTTPException(404, "No queued or running Excel job for this session")
+
+    if result == "cancelled":
+        # Never started: the worker's cleanup will not run for it
+        clear_metadata(session_key)
+        with excel_status_lock:
+            excel_job_status[session_key] = {
+                "status": "cancelled",
+                "message": "Excel generation cancelled"
+            }
+        return {"status": "cancelled", "session_key": session_key}
+
+    return {
+        "status": "cancelling",
+        "message": "The running build will be discarded before upload",
+        "session_key": session_key
+    }
 # 5) sign out
 @app.post("/bi/auth/logout")
-def logout(
+async def logout(
     response: Response,
     tableau_token: str | None = Cookie(default=None),
     tableau_site_id: str | None = Cookie(default=None),
 ):
     try:
         if tableau_token and tableau_site_id:
-            auth_client, _ = init_clients(
+            auth_client, _ = init_async_clients(
                 tableau_token=tableau_token,
                 site_id=tableau_site_id
             )
             # Sign out from Tableau server
-            auth_client.sign_out()
+            await auth_client.sign_out()
 
         # Clear cookies (VERY IMPORTANT)
         response.delete_cookie("tableau_token")
@@ -920,12 +928,12 @@ async def deploy_full_migration(req: DeployRequest):
         task_id = str(uuid.uuid4())
         
         # ✅ CHANGE 1: Initialize progress BEFORE thread starts
-        progress_store[task_id] = {
+        progress_channel.publish(task_id, {
             'stage': 0,
             'message': 'Initializing deployment...',
             'status': 'started',
             'timestamp': datetime.now().isoformat()
-        }
+        }, replace=True)
         
         # ✅ CHANGE 2: Add verification logging
         print(f"✅ [DEPLOY] Task {task_id} initialized")
@@ -955,7 +963,7 @@ async def deploy_full_migration(req: DeployRequest):
                     req.target_project_luid,
                     datasource_db_configs,
                     task_id,
-                    progress_store
+                    progress_channel
                 )
 
                                 
@@ -967,13 +975,12 @@ async def deploy_full_migration(req: DeployRequest):
                 traceback.print_exc()
                 
                 # ✅ CHANGE 3: Update progress store with error
-                if task_id in progress_store:
-                    progress_store[task_id] = {
-                        'stage': -1,
-                        'message': f'Migration failed: {str(e)}',
-                        'status': 'failed',
-                        'timestamp': datetime.now().isoformat()
-                    }
+                progress_channel.publish(task_id, {
+                    'stage': -1,
+                    'message': f'Migration failed: {str(e)}',
+                    'status': 'failed',
+                    'timestamp': datetime.now().isoformat()
+                }, replace=True)
                 
         thread = threading.Thread(target=run_with_result_capture)
         thread.daemon = True
@@ -1000,27 +1007,16 @@ async def deploy_full_migration(req: DeployRequest):
 
 
 async def progress_generator(task_id: str):
-    """SSE generator for progress updates"""
+    """SSE generator for progress updates, pushed by the progress channel as they are published"""
+    finished = False
     try:
-        # ✅ CHANGE 5: Add detailed logging
-        print(f"🔌 [SSE] Client connected for task: {task_id}")
-        print(f"🔍 [SSE] Available tasks: {list(progress_store.keys())}")
-        
-        # Wait for task to be initialized
-        timeout = 30
-        waited = 0
-        while task_id not in progress_store and waited < timeout:
-            await asyncio.sleep(0.1)
-            waited += 0.1
-            
-            # ✅ CHANGE 6: Log waiting status every 2 seconds
-            if int(waited * 10) % 20 == 0:
-                print(f"[SSE] Waiting for task {task_id}... ({waited:.1f}s)")
-        
-        if task_id not in progress_store:
-            print(f"❌ [SSE] Task {task_id} NOT FOUND after {timeout}s")
-            
-            # ✅ CHANGE 7: Use event-based SSE format
+        logging.debug(f"[SSE] Client connected for task: {task_id}")
+
+        # Wait for task to be initialized (replays the last event if it already ran)
+        progress = await progress_channel.wait_for_task(task_id, timeout=30)
+        if progress is None:
+            logging.warning(f"[SSE] Task {task_id} not found after 30s")
+
             yield {
                 "event": "error",
                 "data": json.dumps({
@@ -1031,74 +1027,43 @@ async def progress_generator(task_id: str):
                 })
             }
             return
-        
-        print(f"✅ [SSE] Task {task_id} found!")
-        
-        last_stage = -1
-        last_message = ""
-        consecutive_same = 0
-        iterations = 0
-        max_iterations = 600  # 5 minutes max
-        
-        while iterations < max_iterations:
-            iterations += 1
-            
-            if task_id in progress_store:
-                progress = progress_store[task_id]
-                current_stage = progress.get('stage', 0)
-                current_message = progress.get('message', '')
-                status = progress.get('status', 'in_progress')
-                
-                # Send update if stage OR message changed
-                if current_stage != last_stage or current_message != last_message:
-                    # ✅ CHANGE 8: Send keepalive ping to prevent timeout
-                    yield {
-                        "event": "ping",
-                        "data": ""
-                    }
-                    
-                    # ✅ CHANGE 9: Send progress with event type
-                    yield {
-                        "event": "progress",
-                        "data": json.dumps(progress)
-                    }
-                    
-                    last_stage = current_stage
-                    last_message = current_message
-                    consecutive_same = 0
-                    
-                    print(f"[SSE] Sent: Stage {current_stage} - {current_message}")
-                else:
-                    consecutive_same += 1
-                    
-                    # ✅ CHANGE 10: Send periodic keepalive (every 10 iterations of no change)
-                    if consecutive_same % 10 == 0:
-                        yield {
-                            "event": "keepalive",
-                            "data": json.dumps({"timestamp": datetime.now().isoformat()})
-                        }
-                
-                # Check if completed or failed
-                if status in ['completed', 'failed']:
-                    print(f"🏁 [SSE] Task {task_id} finished with status: {status}")
-                    
-                    # ✅ CHANGE 11: Send completion with event type
-                    yield {
-                        "event": "complete",
-                        "data": json.dumps(progress)
-                    }
-                    
-                    await asyncio.sleep(2)
+
+        logging.debug(f"[SSE] Task {task_id} found")
+
+        deadline = asyncio.get_running_loop().time() + 300  # 5 minutes max
+        async for progress in progress_channel.subscribe(task_id, idle_timeout=3):
+            if progress is None:
+                if asyncio.get_running_loop().time() >= deadline:
                     break
-            else:
-                print(f"⚠️ [SSE] Task {task_id} disappeared from store")
+                # Periodic keepalive while nothing changes
+                yield {
+                    "event": "keepalive",
+                    "data": json.dumps({"timestamp": datetime.now().isoformat()})
+                }
+                continue
+
+            yield {
+                "event": "progress",
+                "data": json.dumps(progress)
+            }
+            logging.debug(f"[SSE] Sent: Stage {progress.get('stage', 0)} - {progress.get('message', '')}")
+
+            status = progress.get('status', 'in_progress')
+            if status in TERMINAL_STATUSES:
+                logging.debug(f"[SSE] Task {task_id} finished with status: {status}")
+                yield {
+                    "event": "complete",
+                    "data": json.dumps(progress)
+                }
+                finished = True
+                await asyncio.sleep(2)
                 break
-            
-            await asyncio.sleep(0.3)
-        
-        # ✅ CHANGE 12: Handle timeout
-        if iterations >= max_iterations:
-            print(f"⏱️ [SSE] Task {task_id} timed out")
+
+            if asyncio.get_running_loop().time() >= deadline:
+                break
+
+        if not finished and task_id in progress_store:
+            logging.warning(f"[SSE] Task {task_id} timed out")
             yield {
                 "event": "error",
                 "data": json.dumps({
@@ -1108,12 +1073,12 @@ async def progress_generator(task_id: str):
                     "timestamp": datetime.now().isoformat()
                 })
             }
-            
+        elif not finished:
+            logging.debug(f"[SSE] Task {task_id} disappeared from store")
+
     except Exception as e:
-        print(f"❌ [SSE] Error for {task_id}: {e}")
-        import traceback
-        traceback.print_exc()
-        
+        logging.error(f"[SSE] Error for {task_id}: {e}", exc_info=True)
+
         yield {
             "event": "error",
             "data": json.dumps({
@@ -1124,17 +1089,19 @@ async def progress_generator(task_id: str):
             })
         }
     finally:
-        # Cleanup
-        await asyncio.sleep(3)
-        if task_id in progress_store:
-            print(f"🧹 [SSE] Cleaning up task {task_id}")
-            del progress_store[task_id]
+        # Cleanup once the task has finished; a client leaving mid-task (or another tab
+        # watching it) must not wipe the snapshot, which the store's TTL expires anyway
+        if finished:
+            await asyncio.sleep(3)
+            if task_id in progress_store:
+                logging.debug(f"[SSE] Cleaning up task {task_id}")
+                progress_channel.forget(task_id)
 
 
 @app.get("/bi/deploy/progress/{task_id}")
 async def stream_progress(task_id: str):
     """SSE endpoint for real-time progress"""
-    print(f"🔌 [SSE] Connection request for task: {task_id}")
+    logging.debug(f"[SSE] Connection request for task: {task_id}")
     
     # ✅ CHANGE 13: AWS-optimized headers
     return EventSourceResponse(
@@ -1155,18 +1122,36 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "active_tasks": len(progress_store)
+        "active_tasks": len(progress_store),
+        "stores": store_metrics()
     }
 
 
+def store_metrics():
+    """Entries / bytes / eviction counters of the in-process stores."""
+    return {
+        "sessions": get_session_store().metrics(),
+        "excel_jobs": excel_job_status.metrics(),
+        "excel_queue": excel_scheduler.metrics(),
+        "deploy_progress": progress_store.metrics(),
+        "migration_sessions": tableau_sessions.metrics(),
+    }
+
+
+@app.get("/bi/stores/metrics")
+async def get_store_metrics():
+    return store_metrics()
+
+
 # ✅ CHANGE 16: Add debug endpoint to check task status
 @app.get("/bi/deploy/status/{task_id}")
 async def get_task_status(task_id: str):
     """Check if task exists in progress store"""
-    if task_id in progress_store:
+    progress = progress_store.get(task_id)
+    if progress is not None:
         return {
             "exists": True,
-            "progress": progress_store[task_id]
+            "progress": progress
         }
     else:
         return {
@@ -1183,119 +1168,9 @@ async def list_active_tasks():
     return {
         "count": len(progress_store),
         "tasks": list(progress_store.keys()),
-        "details": progress_store
+        "details": dict(progress_store.items())
     }
 
-def write_summary_counts(excel_generator, data_manager):
-    """
-    Generate a combined summary sheet showing workbook-level counts
-    for dashboards, sheets, fields, datasources, tables, and columns.
-    
-    Used when you have DataManager objects (backward compatible).
-    
-    Args:
-        excel_generator: TableauExcellGenerator instance
-        data_manager: Workbook data manager
-    """
-    try:
-        # Retrieve both sets of data
-        workbook_counts = data_manager.get_workbook_counts()
-        datasource_counts = data_manager.get_datasource_counts()
-        
-        # Generate the summary using the internal function
-        _generate_summary_sheet(excel_generator, workbook_counts, datasource_counts)
-        
-        print("Workbook Summary sheet written successfully.")
-
-    except Exception as e:
-        logging.critical(f"Critical Error generating summary sheet: {e}")
-        raise e
-
-
-def write_summary_counts_from_data(excel_generator, workbook_counts, datasource_counts):
-    """
-    Generate a combined summary sheet from pre-computed count data.
-    
-    Used when you already have the count dictionaries (e.g., from API responses).
-    
-    Args:
-        excel_generator: TableauExcellGenerator instance
-        workbook_counts: List of workbook count dictionaries
-        datasource_counts: List of datasource count dictionaries
-    """
-    try:
-        # Generate the summary using the internal function
-        _generate_summary_sheet(excel_generator, workbook_counts, datasource_counts)
-        
-        print("Workbook Summary sheet written successfully from provided data.")
-
-    except Exception as e:
-        logging.critical(f"Critical Error generating summary sheet: {e}")
-        raise e
-
-
-def _generate_summary_sheet(excel_generator, workbook_counts, datasource_counts):
-    """
-    Internal function to generate the actual summary sheet.
-    Shared by both write_summary_counts and write_summary_counts_from_data.
-    
-    Args:
-        excel_generator: TableauExcellGenerator instance
-        workbook_counts: List of workbook count dictionaries
-        datasource_counts: List of datasource count dictionaries
-    """
-    # Merge the data into one combined summary list
-    summary_data = []
-    for wb in workbook_counts:
-        workbook_name = wb.get("Workbook")
-
-        summary_entry = {
-            "Workbook": workbook_name,
-            "Dashboards": wb.get("Dashboards", 0),
-            "Sheets": wb.get("Sheets", 0),
-            "Fields": wb.get("Fields", 0),
-            "Field Types": wb.get("Field Types", 0),
-            "Formula Fields": wb.get("Formula Fields", 0),
-        }
-
-        # Find matching datasource record
-        ds_match = next((d for d in datasource_counts if d.get("Workbook") == workbook_name), None)
-        if ds_match:
-            summary_entry["Datasources"] = ds_match.get("Datasources", 0)
-            summary_entry["Tables"] = ds_match.get("Tables", 0)
-            summary_entry["Columns"] = ds_match.get("Columns", 0)
-            summary_entry["Custom Queries"] = ds_match.get("Custom Queries", 0)
-            summary_entry["Custom Columns"] = ds_match.get("Custom Columns", 0)
-        else:
-            summary_entry.update({
-                "Datasources": 0,
-                "Tables": 0,
-                "Columns": 0,
-                "Custom Queries": 0,
-                "Custom Columns": 0
-            })
-
-        summary_data.append(summary_entry)
-
-    # Define the columns for Excel
-    summary_columns = [
-        "Workbook",
-        "Dashboards",
-        "Sheets",
-        "Fields",
-        "Field Types",
-        "Formula Fields",
-        "Datasources",
-        "Tables",
-        "Columns",
-        "Custom Queries",
-        "Custom Columns"
-    ]
-
-    # Write the combined summary sheet
-    excel_generator.generate_summary_sheet(unique_counts=summary_data, columns=summary_columns)
-
-
 # Additional Tableau endpoints(using TSC library)
 from project_workbook_list import TableauCloudClient
 
@@ -1414,11 +1289,11 @@ async def get_tableau_token(
             }
         )
         logging.info(f"Generated JWT token: {encoded_token}")
-        auth_client, _ = init_clients(
+        auth_client, _ = init_async_clients(
             token_name=tableau_token,
             token_value=tableau_site_id
         )
-        auth_jwt_token, site_id = auth_client.jwt_sign_in(encoded_token)
+        auth_jwt_token, site_id = await auth_client.jwt_sign_in(encoded_token)
         
         dashboard_url = f"{TABLEAU_SERVER_URL}/t/exavalu/views/WorkbookSummary_17683044081920/WorkbookSummary"
         
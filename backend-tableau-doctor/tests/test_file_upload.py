@@ -0,0 +1,182 @@
+"""
+Tests for ExaGen_Tb_Migrator_Tool.file_upload against stub fileUploads
+endpoints: in-order parts, retried parts, restarted sessions (part applied
+twice, expired session), resume after `UploadInterrupted`, and the size check.
+"""
+
+import pytest
+import requests
+
+from ExaGen_Tb_Migrator_Tool import file_upload
+from ExaGen_Tb_Migrator_Tool.file_upload import MB, FileUpload, UploadInterrupted
+
+
+class _Response:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.exceptions.HTTPError(f"{status_code} error", response=response)
+
+
+class StubUploadServer:
+    """Stands in for TableauClient: POST opens an upload session, PUT appends a part.
+
+    `faults` maps the 1-based number of a PUT call to what goes wrong on it:
+    'timeout', 503, 400 (nothing appended), 'lost' (appended, then the response
+    is lost) or 'expire' (the session is gone: 404).
+    """
+
+    site_id = 'site'
+    token = 'token'
+
+    def __init__(self, faults=None):
+        self.faults = dict(faults or {})
+        self.sessions = {}
+        self.opened = 0
+        self.puts = []  # (session, offset) of every PUT call
+
+    def post(self, endpoint):
+        assert endpoint == '/sites/site/fileUploads'
+        self.opened += 1
+        session = f'session-{self.opened}'
+        self.sessions[session] = bytearray()
+        return _Response({'fileUpload': {'uploadSessionId': session, 'fileSize': '0'}})
+
+    def request(self, method, endpoint, custom_headers=None, data=None):
+        assert method == 'PUT'
+        assert custom_headers['X-Tableau-Auth'] == 'token'
+        session = endpoint.rsplit('/', 1)[1]
+        self.puts.append((session, data.offset))
+        fault = self.faults.pop(len(self.puts), None)
+        if fault == 'expire':
+            self.sessions.pop(session, None)
+        if session not in self.sessions:
+            raise _http_error(404)
+        if fault == 'timeout':
+            raise requests.exceptions.Timeout('read timed out')
+        if isinstance(fault, int):
+            raise _http_error(fault)
+
+        body = b''.join(data)
+        self.sessions[session] += body[len(data._head):len(body) - len(data._tail)]
+        if fault == 'lost':
+            raise requests.exceptions.ConnectionError('connection reset')
+        return _Response({'fileUpload': {'uploadSessionId': session,
+                                         'fileSize': str(len(self.sessions[session]) // MB)}})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(file_upload.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    path = tmp_path / 'Sales.tdsx'
+    path.write_bytes(bytes(range(256)) * (7 * MB // 512))  # 3.5 MB: 4 parts of 1 MB
+    return path
+
+
+def _upload(server, path, **kwargs):
+    kwargs.setdefault('max_part_retries', 3)
+    return FileUpload(server, path, chunk_size=MB, retry_backoff_seconds=1, **kwargs)
+
+
+def test_parts_are_appended_in_order(artifact, sleeps):
+    server = StubUploadServer()
+    session = _upload(server, artifact).upload()
+
+    assert session == 'session-1'
+    assert server.sessions[session] == artifact.read_bytes()
+    assert [offset for _, offset in server.puts] == [0, MB, 2 * MB, 3 * MB]
+    assert sleeps == []
+
+
+def test_transient_part_failures_are_retried_with_backoff(artifact, sleeps):
+    server = StubUploadServer(faults={2: 'timeout', 3: 503})
+    upload = _upload(server, artifact)
+    session = upload.upload()
+
+    assert server.sessions[session] == artifact.read_bytes()
+    assert [offset for _, offset in server.puts] == [0, MB, MB, MB, 2 * MB, 3 * MB]
+    assert sleeps == [1, 2]
+    assert upload.restarts == 0
+
+
+def test_part_applied_twice_restarts_in_a_new_session(artifact, sleeps):
+    # Part 2 is appended but its response is lost: the retry appends it again
+    server = StubUploadServer(faults={2: 'lost'})
+    upload = _upload(server, artifact)
+    session = upload.upload()
+
+    assert session == 'session-2'
+    assert upload.restarts == 1
+    assert len(server.sessions['session-1']) == 3 * MB
+    assert server.sessions[session] == artifact.read_bytes()
+
+
+def test_expired_session_restarts_the_upload(artifact, sleeps):
+    server = StubUploadServer(faults={3: 'expire'})
+    upload = _upload(server, artifact)
+    session = upload.upload()
+
+    assert session == 'session-2'
+    assert upload.restarts == 1
+    assert server.sessions[session] == artifact.read_bytes()
+    assert [s for s, _ in server.puts].count('session-2') == 4
+
+
+def test_restarts_are_bounded(artifact, sleeps):
+    server = StubUploadServer(faults={1: 'expire', 2: 'expire', 3: 'expire'})
+    with pytest.raises(UploadInterrupted):
+        _upload(server, artifact, max_part_retries=2).upload()
+    assert len(server.sessions) == 0
+    assert len(server.puts) == 3
+
+
+def test_interrupted_upload_resumes_after_the_last_acknowledged_part(artifact, sleeps):
+    server = StubUploadServer(faults={2: 503, 3: 503, 4: 503})
+    with pytest.raises(UploadInterrupted) as interrupted:
+        _upload(server, artifact, max_part_retries=2).upload()
+    upload = interrupted.value.upload
+    assert upload.acknowledged_parts == 1
+    assert isinstance(interrupted.value.cause, requests.exceptions.HTTPError)
+
+    session = upload.upload()
+    assert session == 'session-1'
+    assert server.sessions[session] == artifact.read_bytes()
+    assert [offset for _, offset in server.puts][4:] == [MB, 2 * MB, 3 * MB]
+
+
+def test_non_transient_error_is_raised(artifact, sleeps):
+    server = StubUploadServer(faults={2: 400})
+    with pytest.raises(requests.exceptions.HTTPError):
+        _upload(server, artifact).upload()
+    assert sleeps == []
+
+
+def test_size_check_allows_only_megabyte_rounding(tmp_path):
+    path = tmp_path / 'Sales.twbx'
+    path.write_bytes(b'\0' * (5 * MB))
+    upload = FileUpload(StubUploadServer(), path, chunk_size=3 * MB // 2)
+
+    upload.acknowledged_parts = 1  # 1.5 MB: either rounding
+    assert upload._size_matches(1) and upload._size_matches(2) and upload._size_matches(1.5)
+    assert not upload._size_matches(0) and not upload._size_matches(3)
+
+    upload.acknowledged_parts = 2  # 3 MB: on the boundary, exact only
+    assert upload._size_matches(3)
+    assert not upload._size_matches(2) and not upload._size_matches(4) and not upload._size_matches(3.5)
+
+    upload.acknowledged_parts = 4  # the whole file, 5 MB
+    assert upload._size_matches(5) and not upload._size_matches(6)
+    assert upload._size_matches(None)
@@ -0,0 +1,120 @@
+"""
+Tests for util.session_store: payload serialization, TTL refresh and clear,
+for the in-memory backend and the Redis backend (against fakeredis).
+"""
+
+import fakeredis
+import pytest
+
+from core.managers.columnar_rows import ColumnarRows
+from util import bounded_store
+from util.session_store import MemorySessionStore, RedisSessionStore, dumps, loads
+
+COLUMNS = ('project_id', 'workbook_id', 'workbook_name', 'field_name', 'formula')
+
+
+def _rows(count=600):
+    # > 255 distinct workbook ids, so one code buffer is widened from 'B' to 'H'
+    return ColumnarRows.from_rows(COLUMNS, (
+        (str(1000 + i % 5), f'wb-{i}', f'Workbook {i % 40}', f'Field {i % 12}', None if i % 3 else 'SUM([Sales])')
+        for i in range(count)
+    ))
+
+
+def _payload():
+    return {
+        'flat_wb_data': _rows(),
+        'workbook_counts': [{'Workbook ID': 'wb-1', 'Workbook': 'Sales', 'Dashboards': 3}],
+        'usage': [],
+    }
+
+
+@pytest.fixture
+def redis_store():
+    return RedisSessionStore(fakeredis.FakeRedis(), ttl_seconds=60, key_prefix='test:session:')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(bounded_store.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_columnar_rows_round_trip():
+    payload = _payload()
+    restored = loads(dumps(payload))
+
+    rows = restored['flat_wb_data']
+    assert isinstance(rows, ColumnarRows)
+    assert rows.columns == COLUMNS
+    assert list(rows) == list(payload['flat_wb_data'])
+    assert [codes.typecode for codes in (rows.codes(name) for name in COLUMNS)] == \
+           [codes.typecode for codes in (payload['flat_wb_data'].codes(name) for name in COLUMNS)]
+    assert restored['workbook_counts'] == payload['workbook_counts']
+    assert restored['usage'] == []
+
+
+def test_round_trip_rows_stay_appendable():
+    rows = loads(dumps({'rows': _rows(10)}))['rows']
+    rows.append(('1000', 'wb-new', 'Workbook 0', 'Field 0', None))
+    assert len(rows) == 11
+    assert rows.distinct('workbook_name').count('Workbook 0') == 1
+
+
+def test_unknown_payload_type_is_rejected():
+    with pytest.raises(TypeError):
+        dumps({'bad': object()})
+
+
+def test_redis_set_get_round_trip(redis_store):
+    payload = _payload()
+    redis_store.set('abc', 'workbook', payload)
+    redis_store.set('abc', 'datasource', {'flat_ds_data': _rows(5)})
+
+    session = redis_store.get('abc')
+    assert set(session) == {'workbook', 'datasource'}
+    assert list(session['workbook']['flat_wb_data']) == list(payload['flat_wb_data'])
+    assert len(session['datasource']['flat_ds_data']) == 5
+
+
+def test_redis_ttl_refreshed_on_every_write(redis_store):
+    redis_store.set('abc', 'workbook', {'usage': []})
+    key = redis_store._key('abc')
+    assert 0 < redis_store.client.ttl(key) <= 60
+
+    redis_store.client.expire(key, 5)
+    redis_store.set('abc', 'datasource', {'usage': []})
+    assert redis_store.client.ttl(key) > 5
+
+
+def test_redis_clear(redis_store):
+    redis_store.set('abc', 'workbook', {'usage': []})
+    redis_store.set('other', 'workbook', {'usage': []})
+
+    assert redis_store.clear('abc') is True
+    assert redis_store.get('abc') == {}
+    assert redis_store.clear('abc') is False
+    assert set(redis_store.get('other')) == {'workbook'}
+
+
+def test_memory_ttl_refreshed_on_every_write(clock):
+    store = MemorySessionStore(ttl_seconds=60, max_bytes=10 * 1024 * 1024)
+    store.set('abc', 'workbook', {'usage': []})
+
+    clock[0] += 50
+    store.set('abc', 'datasource', {'usage': []})
+    clock[0] += 50  # 100s after the first write, 50s after the last
+    assert set(store.get('abc')) == {'workbook', 'datasource'}
+
+    clock[0] += 11
+    assert store.get('abc') == {}
+
+
+def test_memory_clear():
+    store = MemorySessionStore(ttl_seconds=60, max_bytes=10 * 1024 * 1024)
+    store.set('abc', 'workbook', {'flat_wb_data': _rows(5)})
+
+    assert store.clear('abc') is True
+    assert store.get('abc') == {}
+    assert store.clear('abc') is False
@@ -0,0 +1,132 @@
+"""
+Module: async_http_client
+
+This module owns the shared `httpx.AsyncClient` used by the async Tableau
+clients (`AsyncTableauAuthClient`, `AsyncTableauQueryClient`). It is the
+asyncio counterpart of `http_session`: one connection pool per event loop, so
+a single worker can keep hundreds of Metadata / REST calls in flight without
+tying up a thread per call.
+
+Key Features:
+- Connection pooling with the same `http` settings as the sync session
+  (`pool_maxsize` keep-alive connections per host, `pool_connections` hosts).
+- Default (connect, read) timeouts.
+- Retries of connection errors, 429 and 5xx responses with exponential
+  backoff, honouring `Retry-After` (same policy as the sync session: only
+  idempotent methods, unless the caller passes `retry=True` for a read-only POST).
+- No shared cookies between users.
+
+Usage Example:
+    client = get_async_http_client()
+    response = await client.post(url, json=payload, headers=headers)
+    ...
+    await close_async_http_client()   # on application shutdown
+"""
+
+import asyncio
+import logging
+from http.cookiejar import DefaultCookiePolicy
+
+import httpx
+
+from util.config_managers.tableau_reader import TableauConfigManager
+from util.http_session import RETRY_METHODS, RETRY_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpClient:
+    """Pooled httpx.AsyncClient plus the retry policy of the sync session."""
+
+    def __init__(self, client, retries=3, backoff_factor=0.5):
+        self.client = client
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    @property
+    def is_closed(self):
+        return self.client.is_closed
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff_factor * (2 ** attempt)
+
+    async def request(self, method, url, retry=None, **kwargs):
+        """
+        Send a request, retrying 429 / 5xx responses and transport errors with
+        backoff. The last response is returned (callers use raise_for_status()).
+
+        Only idempotent methods are retried by default; pass `retry=True` for a
+        POST that is known to be read-only (GraphQL queries).
+        """
+        if retry is None:
+            retry = method.upper() in RETRY_METHODS
+        retries = self.retries if retry else 0
+        for attempt in range(retries + 1):
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                delay = self._retry_delay(None, attempt)
+                logger.warning(f"{method} {url} failed ({e}); retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                    return response
+                delay = self._retry_delay(response, attempt)
+                logger.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, retry=None, **kwargs):
+        return await self.request('POST', url, retry=retry, **kwargs)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def build_async_http_client(pool_connections=10, pool_maxsize=20, host_pool_maxsize=None,
+                            connect_timeout=10, read_timeout=120, retries=3,
+                            backoff_factor=0.5):
+    """
+    Build a pooled AsyncHttpClient from the `http` settings.
+
+    httpx pools per client rather than per host, so `host_pool_maxsize`
+    overrides are added to the overall connection limit.
+    """
+    max_connections = pool_connections * pool_maxsize + sum((host_pool_maxsize or {}).values())
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+    )
+    client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))  # never store cookies
+    return AsyncHttpClient(client, retries=retries, backoff_factor=backoff_factor)
+
+
+_clients = {}  # event loop -> AsyncClient (an AsyncClient must stay on the loop that created it)
+
+
+def get_async_http_client():
+    """Return the shared AsyncClient of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        settings = TableauConfigManager().get_http_settings()
+        client = build_async_http_client(**settings)
+        _clients[loop] = client
+        logger.info("Shared async HTTP client created.")
+    return client
+
+
+async def close_async_http_client():
+    """Close the running loop's shared client (application shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -12,6 +12,10 @@ Dependencies:
 
 Class: TableauAuthClient
     - Handles authentication and session management for Tableau's REST API.
+
+Class: AsyncTableauAuthClient
+    - Same API with awaitable sign_in / sign_out / get_current_user, sharing the
+      async connection pool (used by the async FastAPI routes); also jwt_sign_in.
     
 Methods:
     - __init__: Initializes the TableauAuthClient with configuration details.
@@ -35,9 +39,12 @@ Logging:
 """
 
 import requests
+import httpx
 import json
 import logging
 from util.config_managers.tableau_reader import TableauConfigManager
+from util.http_session import get_http_session
+from util.async_http_client import AsyncHttpClient, get_async_http_client
 
 # Set up basic logging configuration
 logging.basicConfig(level=logging.INFO)
@@ -45,8 +52,9 @@ logger = logging.getLogger(__name__)
 
 class TableauAuthClient:
     def __init__(self, config: TableauConfigManager, token_name=None, token_value=None,auth_token: str | None = None,
-        site_id: str | None = None):
+        site_id: str | None = None, session: requests.Session | None = None):
         self.configFile = config
+        self.session = session or get_http_session()  # Pooled keep-alive transport
 
         self.server_url = self.configFile.get_server_url()
         self.api_version = self.configFile.get_api_version()
@@ -94,7 +102,7 @@ class TableauAuthClient:
                 }
             }
 
-            response = requests.post(url, json=payload, headers=self.headers)  # Sign-in request
+            response = self.session.post(url, json=payload, headers=self.headers)  # Sign-in request
             logger.info("Sign-in request sent.")  # Log request sent
 
             if response.status_code == 200:
@@ -137,7 +145,7 @@ class TableauAuthClient:
             }
             logger.info(f"Attempting JWT sign-in... site: {self.site_id}")  # Log sign-in attempt
 
-            response = requests.post(url, json=payload, headers=self.headers)  # Sign-in request
+            response = self.session.post(url, json=payload, headers=self.headers)  # Sign-in request
             logger.info("Sign-in request sent.")  # Log request sent
 
             if response.status_code == 200:
@@ -171,7 +179,7 @@ class TableauAuthClient:
 
             url = f"{self.server_url}/api/{self.api_version}/auth/signout"  # Sign-out URL
             self.headers['X-Tableau-Auth'] = self.auth_token  # Add auth token to headers
-            response = requests.post(url, headers=self.headers)  # Sign-out request
+            response = self.session.post(url, headers=self.headers)  # Sign-out request
             logger.info("Sign-out request sent.")  # Log request sent
             response.raise_for_status()  # Raise error for failed requests
 
@@ -195,7 +203,7 @@ class TableauAuthClient:
             headers = self.headers.copy()
             headers['X-Tableau-Auth'] = self.auth_token
             
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             
             if response.status_code == 200:
                 user_data = response.json()
@@ -208,4 +216,135 @@ class TableauAuthClient:
                 
         except Exception as e:
             logger.error(f"Error retrieving username: {e}")
-            return None        
\ No newline at end of file
+            return None        
+
+class AsyncTableauAuthClient(TableauAuthClient):
+    """
+    asyncio variant of TableauAuthClient for async route handlers. Requests go
+    through the shared `httpx.AsyncClient` pool instead of the requests session.
+    """
+
+    def __init__(self, config: TableauConfigManager, token_name=None, token_value=None, auth_token: str | None = None,
+        site_id: str | None = None, client: AsyncHttpClient | None = None):
+        super().__init__(config, token_name=token_name, token_value=token_value,
+                         auth_token=auth_token, site_id=site_id)
+        self.client = client or get_async_http_client()  # Pooled async transport
+
+    async def sign_in(self):
+        try:
+            url = f"{self.server_url}/api/{self.api_version}/auth/signin"  # Sign-in URL
+            payload = {
+                'credentials': {
+                    'personalAccessTokenName': self.pat_token_name,
+                    'personalAccessTokenSecret': self.pat_token,
+                    'site': {
+                        'contentUrl': self.site_id
+                    }
+                }
+            }
+
+            response = await self.client.post(url, json=payload, headers=self.headers)  # Sign-in request
+            logger.info("Sign-in request sent.")
+
+            if response.status_code == 200:
+                credentials = response.json()['credentials']
+                self.auth_token = credentials['token']  # Extract auth token
+                self.site_id = credentials['site']['id']  # Extract site ID
+                self.user_id = credentials['user']['id']
+                logger.info(f"Signed in successfully as user ID: {self.user_id}")
+                self.username = await self.get_current_user()
+                logger.info(f"Signed in successfully as user: {self.username}")
+                return self.auth_token, self.site_id, self.username
+            else:
+                logger.error("Failed to sign in with status code: %s", response.status_code)
+                response.raise_for_status()
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error making request: {e}")
+            raise
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing JSON response: {e}")
+            raise
+        except KeyError as e:
+            logger.error(f"Error accessing JSON response: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+            raise
+
+    async def jwt_sign_in(self, encoded_token):
+        self.jwt_token = encoded_token
+        try:
+            url = f"{self.server_url}/api/{self.api_version}/auth/signin"  # Sign-in URL
+            payload = {
+                'credentials': {
+                    "jwt": self.jwt_token,
+                    'site': {
+                        'contentUrl': self.site_id
+                    }
+                }
+            }
+            logger.info(f"Attempting JWT sign-in... site: {self.site_id}")
+
+            response = await self.client.post(url, json=payload, headers=self.headers)
+            logger.info("Sign-in request sent.")
+
+            if response.status_code == 200:
+                credentials = response.json()['credentials']
+                self.auth_jwt_token = credentials['token']
+                self.site_id = credentials['site']['id']
+                logger.info("Signed in successfully.")
+                return self.auth_jwt_token, self.site_id
+            else:
+                logger.error("Failed to sign in with status code: %s", response.status_code)
+                response.raise_for_status()
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error making request: {e}")
+            raise
+        except (json.JSONDecodeError, KeyError) as e:
+            logger.error(f"Error reading sign-in response: {e}")
+            raise
+
+    async def sign_out(self):
+        try:
+            if self.auth_token is None:
+                logger.warning("You are not signed in.")
+                return
+
+            url = f"{self.server_url}/api/{self.api_version}/auth/signout"  # Sign-out URL
+            self.headers['X-Tableau-Auth'] = self.auth_token
+            response = await self.client.post(url, headers=self.headers)
+            logger.info("Sign-out request sent.")
+            response.raise_for_status()
+
+            self.auth_token = None
+            self.site_id = None
+            logger.info("Signed out successfully.")
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error making request: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"An unexpected error occurred: {e}")
+
+    async def get_current_user(self):
+        """Fetch the current user's name using the user ID from sign-in."""
+        try:
+            url = f"{self.server_url}/api/{self.api_version}/sites/{self.site_id}/users/{self.user_id}"
+            headers = self.headers.copy()
+            headers['X-Tableau-Auth'] = self.auth_token
+
+            response = await self.client.get(url, headers=headers)
+
+            if response.status_code == 200:
+                username = response.json()['user']['name']
+                logger.info(f"Retrieved username: {username}")
+                return username
+            else:
+                logger.warning(f"Failed to retrieve username. Status code: {response.status_code}")
+                return None
+
+        except Exception as e:
+            logger.error(f"Error retrieving username: {e}")
+            return None
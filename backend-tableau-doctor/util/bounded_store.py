@@ -0,0 +1,197 @@
+"""
+Module: bounded_store
+
+This module provides `BoundedStore`, a thread-safe in-memory mapping with a
+byte budget, size-aware LRU eviction and per-entry TTL. It backs the
+process-local stores of the API (session metadata, Excel job status and
+migration progress) so a long-running container keeps a flat memory profile
+even when clients never come back for their data.
+
+Key Features:
+- dict-like (MutableMapping): existing `store[key]`, `key in store`,
+  `store.get(...)`, `del store[key]` code keeps working.
+- Each entry's size is estimated when it is written; least recently used
+  entries are evicted until the total fits `max_bytes`.
+- Entries expire `ttl_seconds` after their last write (per-entry override via
+  `set(key, value, ttl_seconds=...)`).
+- `metrics()` reports entries, bytes, hits, misses, evictions and expirations.
+- `on_evict(key)` is called for every entry dropped by eviction or expiry, so
+  owners can release bookkeeping kept outside the store.
+
+Usage Example:
+    jobs = BoundedStore("excel_jobs", max_bytes=8 * 1024 * 1024, ttl_seconds=86400)
+    jobs[session_key] = {"status": "processing"}
+    jobs.metrics()
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from core.managers.columnar_rows import ColumnarRows
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(obj, _seen=None):
+    """Approximate deep size of a payload in bytes (shared objects counted once)."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, ColumnarRows):
+        return obj.nbytes() + sum(
+            estimate_size(value, seen) for name in obj.columns for value in obj.distinct(name))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, seen) + estimate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+
+class BoundedStore(MutableMapping):
+    """
+    Thread-safe mapping bounded by `max_bytes` (LRU eviction) and `ttl_seconds`
+    (per-entry expiry). Values mutated in place keep the size measured at write
+    time until `touch(key)` is called.
+    """
+
+    def __init__(self, name, max_bytes, ttl_seconds=None, sizer=estimate_size, on_evict=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.sizer = sizer
+        self.on_evict = on_evict  # called (lock held) with the key of each evicted / expired entry
+        self._entries = OrderedDict()  # key -> [value, size, expires_at], least recently used first
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    # ---------------- internal helpers (lock held) ----------------
+    def _expired(self, entry, now):
+        return entry[2] is not None and entry[2] <= now
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+        return entry
+
+    def _released(self, key):
+        if self.on_evict is not None:
+            try:
+                self.on_evict(key)
+            except Exception as e:
+                logger.warning(f"[{self.name}] on_evict failed for {key}: {e}")
+
+    def _purge_expired(self, now):
+        for key in [k for k, entry in self._entries.items() if self._expired(entry, now)]:
+            self._drop(key)
+            self._stats["expirations"] += 1
+            self._released(key)
+
+    def _evict_to_budget(self, keep):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            size = self._drop(key)[1]
+            self._stats["evictions"] += 1
+            self._released(key)
+            logger.info(f"[{self.name}] Evicted {key} ({size} bytes) to stay within {self.max_bytes} bytes")
+        if self._bytes > self.max_bytes:
+            logger.warning(f"[{self.name}] Entry {keep} alone exceeds the {self.max_bytes} byte budget")
+
+    # ---------------- MutableMapping ----------------
+    def set(self, key, value, ttl_seconds=None):
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        size = self.sizer(value)
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = [value, size, now + ttl if ttl else None]
+            self._bytes += size
+            self._evict_to_budget(keep=key)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry, time.monotonic()):
+                if entry is not None:
+                    self._drop(key)
+                    self._stats["expirations"] += 1
+                    self._released(key)
+                self._stats["misses"] += 1
+                raise KeyError(key)
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._drop(key)
+
+    _MISSING = object()
+
+    def pop(self, key, default=_MISSING):
+        """Remove and return an entry in one locked step (MutableMapping.pop reads, then deletes)."""
+        with self._lock:
+            try:
+                value = self[key]
+            except KeyError:
+                if default is self._MISSING:
+                    raise
+                return default
+            self._drop(key)
+            return value
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry, time.monotonic())
+
+    def __iter__(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return iter(list(self._entries))
+
+    def __len__(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return len(self._entries)
+
+    # ---------------- extras ----------------
+    def touch(self, key):
+        """Re-measure an entry whose value was mutated in place (e.g. a progress dict)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = self.sizer(entry[0])
+            self._bytes += size - entry[1]
+            entry[1] = size
+            self._evict_to_budget(keep=key)
+
+    def metrics(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+            }
@@ -0,0 +1,172 @@
+"""
+Module: catalog_cache
+
+This module keeps an in-process catalog of workbooks per site and user so
+that the project and workbook dropdowns do not re-download every workbook on
+the site for each click in the UI. The Metadata API only returns what the
+caller may see, so a catalog is never shared between users (`owner`).
+
+Classes:
+- WorkbookCatalog: Prebuilt indexes over the site's workbooks
+  (project -> workbooks, workbook luid -> upstream datasources).
+- WorkbookCatalogCache: Thread-safe cache of WorkbookCatalog objects keyed by
+  (site id, owner), with a TTL and explicit invalidation.
+
+Usage Example:
+    owner = caller_scope(auth_token)
+    catalog = workbook_catalog_cache.get(site_id, loader=lambda: fetch_workbooks(), owner=owner)
+    catalog.get_projects()
+    catalog.get_workbooks(project_luid)
+    workbook_catalog_cache.invalidate(site_id)   # every user's catalog of the site
+    catalog = await workbook_catalog_cache.aget(site_id, loader=lambda: aiter_workbooks(), owner=owner)
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from util.config_managers.tableau_reader import TableauConfigManager
+
+logger = logging.getLogger(__name__)
+
+
+class WorkbookCatalog:
+    """Indexes built once from the raw `workbooks` GraphQL nodes of a site."""
+
+    def __init__(self, workbooks):
+        self.projects = {}                 # project luid -> project row
+        self.workbooks_by_project = {}     # project luid -> [workbook row]
+        self.datasources_by_workbook = {}  # workbook luid -> [datasource row]
+        self.loaded_at = time.monotonic()
+
+        for wb in workbooks:
+            self.add_workbook(wb)
+
+    def add_workbook(self, wb):
+        """Index a single raw workbook node (duplicates by luid are ignored)."""
+        project_luid = wb.get("projectLuid")
+        if project_luid and wb.get("projectName") and wb.get("projectVizportalUrlId"):
+            self.projects[project_luid] = {
+                "project_luid": project_luid,
+                "project_name": wb["projectName"],
+                "projectvizporturl_id": wb["projectVizportalUrlId"]
+            }
+
+        luid = wb.get("luid")
+        if not luid or luid in self.datasources_by_workbook:
+            return
+
+        datasources = [
+            {"luid": ds.get("luid"), "name": ds.get("name")}
+            for ds in wb.get("upstreamDatasources") or []
+        ]
+        self.datasources_by_workbook[luid] = datasources
+
+        if project_luid:
+            self.workbooks_by_project.setdefault(project_luid, []).append({
+                "id": wb.get("id"),
+                "luid": luid,
+                "name": wb.get("name"),
+                "datasources": datasources
+            })
+
+    def get_projects(self):
+        return list(self.projects.values())
+
+    def get_workbooks(self, project_luid):
+        return self.workbooks_by_project.get(project_luid, [])
+
+    def get_datasources(self, workbook_luid):
+        return self.datasources_by_workbook.get(workbook_luid, [])
+
+
+class WorkbookCatalogCache:
+    """Per-site, per-user WorkbookCatalog cache with TTL expiry and explicit invalidation."""
+
+    def __init__(self, ttl_seconds=None):
+        if ttl_seconds is None:
+            ttl_seconds = TableauConfigManager().get_catalog_settings()["ttl_seconds"]
+        self.ttl_seconds = ttl_seconds
+        self._catalogs = {}
+        self._lock = threading.Lock()
+        self._site_locks = {}
+        self._async_site_locks = {}
+
+    def _site_lock(self, key):
+        with self._lock:
+            return self._site_locks.setdefault(key, threading.Lock())
+
+    def _fresh(self, catalog):
+        return catalog is not None and time.monotonic() - catalog.loaded_at < self.ttl_seconds
+
+    def _store(self, key, catalog):
+        """Keep a loaded catalog and drop expired ones (user sessions come and go)."""
+        with self._lock:
+            self._catalogs[key] = catalog
+            for stale in [k for k, c in self._catalogs.items() if not self._fresh(c)]:
+                del self._catalogs[stale]
+                lock = self._site_locks.get(stale)
+                if lock is not None and not lock.locked():
+                    del self._site_locks[stale]
+                async_lock = self._async_site_locks.get(stale)
+                if async_lock is not None and not async_lock.locked():
+                    del self._async_site_locks[stale]
+
+    def get(self, site_id, loader, refresh=False, owner=None):
+        """
+        Return the catalog of a site as seen by `owner`, calling `loader()` to rebuild
+        it when it is missing, expired or `refresh` is requested. `loader` returns raw
+        workbook nodes. Concurrent misses for the same site and owner wait for a single load.
+        """
+        key = (site_id, owner)
+        catalog = self._catalogs.get(key)
+        if not refresh and self._fresh(catalog):
+            return catalog
+
+        with self._site_lock(key):
+            catalog = self._catalogs.get(key)
+            if not refresh and self._fresh(catalog):
+                return catalog  # another request loaded it while we waited
+
+            catalog = WorkbookCatalog(loader())
+            self._store(key, catalog)
+            logger.info(f"Workbook catalog loaded for site {site_id}")
+            return catalog
+
+    async def aget(self, site_id, loader, refresh=False, owner=None):
+        """
+        Async counterpart of `get`: `loader()` returns an async iterator of raw
+        workbook nodes. Concurrent misses for the same site and owner await a single load.
+        """
+        key = (site_id, owner)
+        catalog = self._catalogs.get(key)
+        if not refresh and self._fresh(catalog):
+            return catalog
+
+        with self._lock:
+            site_lock = self._async_site_locks.setdefault(key, asyncio.Lock())
+        async with site_lock:
+            catalog = self._catalogs.get(key)
+            if not refresh and self._fresh(catalog):
+                return catalog
+
+            catalog = WorkbookCatalog([])
+            async for wb in loader():
+                catalog.add_workbook(wb)
+            self._store(key, catalog)
+            logger.info(f"Workbook catalog loaded for site {site_id}")
+            return catalog
+
+    def invalidate(self, site_id=None):
+        """Drop every user's catalog of one site, or of every site when site_id is None."""
+        with self._lock:
+            if site_id is None:
+                self._catalogs.clear()
+            else:
+                for key in [key for key in self._catalogs if key[0] == site_id]:
+                    del self._catalogs[key]
+        logger.info(f"Workbook catalog invalidated for site {site_id or 'ALL'}")
+
+
+workbook_catalog_cache = WorkbookCatalogCache()
@@ -0,0 +1,164 @@
+"""
+Module: columnar_export
+
+This module writes the sheets of a combined export package (the same package
+list `TableauExcellGenerator` takes) as columnar / flat files, for sheets that
+overflow Excel's 1,048,576-row limit and for downstream analytics that should
+not have to parse XLSX.
+
+Supported formats:
+- 'parquet': one Parquet file per sheet (pyarrow, written batch by batch).
+- 'arrow':   one Arrow IPC file per sheet (pyarrow, written batch by batch).
+- 'csv.gz':  one gzip-compressed CSV file per sheet (stdlib csv + gzip).
+
+Rows are streamed from the payload (ColumnarRows, FlatRowSource or a list of
+dicts) in batches of `batch_size`, so no format needs the whole sheet in memory
+at once. pyarrow is only imported when a Parquet or Arrow file is requested.
+
+Usage Example:
+    exporter = ColumnarExporter(package, output_directory, 'Tableau_Metadata_20240101_120000')
+    paths = exporter.export('parquet')   # -> list of written file paths
+"""
+
+import csv
+import gzip
+import logging
+import os
+import re
+from itertools import islice
+
+import pandas as pd
+
+from core.managers.columnar_rows import ColumnarRows
+from core.managers.flat_row_source import FlatRowSource
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = ('parquet', 'arrow', 'csv.gz')
+DEFAULT_BATCH_SIZE = 50000
+
+
+def _file_stem(sheet_name):
+    return re.sub(r'[^A-Za-z0-9]+', '_', sheet_name).strip('_')
+
+
+def _unique_names(headers):
+    # Parquet/Arrow readers expect distinct column names
+    seen = {}
+    names = []
+    for header in headers:
+        name = str(header)
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(name if count == 0 else f"{name}_{count}")
+    return names
+
+
+def _payload_rows(payload):
+    """(row tuples, width, values per column or None) of a payload, or None when empty."""
+    if isinstance(payload, ColumnarRows):
+        if payload.is_empty():
+            return None
+        return payload, len(payload.columns), [payload.distinct(name) for name in payload.columns]
+    if isinstance(payload, FlatRowSource):
+        return None if payload.is_empty() else (payload, len(payload.columns), None)
+    if not payload:
+        return None
+    df = pd.DataFrame(payload)
+    if df.empty:
+        return None
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.itertuples(index=False, name=None), len(df.columns), [df[column].tolist() for column in df.columns]
+
+
+class ColumnarExporter:
+    def __init__(self, package, output_directory, file_prefix, batch_size=DEFAULT_BATCH_SIZE):
+        self.package_list = package
+        self.output_directory = output_directory
+        self.file_prefix = file_prefix
+        self.batch_size = batch_size
+
+    def export(self, file_format):
+        """Write every non-empty sheet of the package in `file_format`; return the file paths."""
+        if file_format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported export format: {file_format}")
+
+        os.makedirs(self.output_directory, exist_ok=True)
+        paths = []
+        for package in self.package_list:
+            sheet_name = package['sheet_name']
+            source = _payload_rows(package['payload'])
+            if source is None:
+                logger.info(f"Skipping empty sheet: {sheet_name}")
+                continue
+            rows, width, column_values = source
+            headers = _unique_names(package['columns'])
+            if len(headers) != width:
+                logger.warning(f"Skipping sheet {sheet_name}: {width} columns but {len(headers)} headers")
+                continue
+
+            path = os.path.join(
+                self.output_directory, f"{self.file_prefix}_{_file_stem(sheet_name)}.{file_format}")
+            logger.info(f"Writing {file_format} export of {sheet_name}: {path}")
+            if file_format == 'csv.gz':
+                self._write_csv_gz(path, headers, rows)
+            else:
+                self._write_arrow(path, file_format, headers, rows, column_values)
+            paths.append(path)
+        return paths
+
+    def _batches(self, rows):
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _write_csv_gz(self, path, headers, rows):
+        with gzip.open(path, 'wt', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(headers)
+            for batch in self._batches(rows):
+                writer.writerows(batch)
+
+    @staticmethod
+    def _arrow_type(pa, values):
+        """Narrowest Arrow type for a column's values (strings unless all bool / all numeric)."""
+        present = [value for value in values if value is not None]
+        if present and all(isinstance(value, bool) for value in present):
+            return pa.bool_()
+        if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+            return pa.int64()
+        if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            return pa.float64()
+        return pa.string()
+
+    def _write_arrow(self, path, file_format, headers, rows, column_values):
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        if column_values is None:
+            types = [pa.string()] * len(headers)
+        else:
+            types = [self._arrow_type(pa, values) for values in column_values]
+        schema = pa.schema([pa.field(name, data_type) for name, data_type in zip(headers, types)])
+        as_text = [data_type == pa.string() for data_type in types]
+
+        if file_format == 'parquet':
+            writer = pa.parquet.ParquetWriter(path, schema, compression='snappy')
+        else:
+            writer = pa.ipc.new_file(path, schema)
+        try:
+            for batch in self._batches(rows):
+                columns = []
+                for position, data_type in enumerate(types):
+                    values = [row[position] for row in batch]
+                    if as_text[position]:
+                        values = [value if value is None or isinstance(value, str) else str(value)
+                                  for value in values]
+                    columns.append(pa.array(values, type=data_type))
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+        finally:
+            writer.close()
@@ -128,6 +128,122 @@ class TableauConfigManager:
             logger.error("Output path not found in config file")
             raise
         
+    # Read an optional `tableau.<section>` mapping, filling missing keys from defaults
+    def _get_optional_section(self, section, defaults):
+        settings = dict(defaults)
+        settings.update((self.config.get('tableau') or {}).get(section) or {})
+        logger.info("Retrieved %s settings: %s", section, settings)
+        return settings
+
+    # Getter for the shared HTTP transport settings (pool sizes, timeouts, retries)
+    def get_http_settings(self):
+        return self._get_optional_section('http', {
+            'pool_connections': 10,
+            'pool_maxsize': 20,
+            'host_pool_maxsize': {},
+            'connect_timeout': 10,
+            'read_timeout': 120,
+            'retries': 3,
+            'backoff_factor': 0.5,
+        })
+
+    # Getter for fan-out settings (worker count, per-site request rate, request coalescing)
+    def get_concurrency_settings(self):
+        return self._get_optional_section('concurrency', {
+            'max_workers': 8,
+            'requests_per_second': 10,
+            'coalesce_scope': 'user',  # identical in-flight metadata queries shared per 'user' (or per 'site': permission-unsafe)
+        })
+
+    # Getter for the site workbook catalog cache settings
+    def get_catalog_settings(self):
+        return self._get_optional_section('catalog', {
+            'ttl_seconds': 300,
+            'page_size': 200,
+        })
+
+    # Getter for the Excel export settings (rows sampled for column widths)
+    def get_excel_settings(self):
+        return self._get_optional_section('excel', {
+            'width_sample_rows': 10000,
+        })
+
+    # Getter for the Excel job scheduler (concurrent builds, queue depth, process pool)
+    def get_excel_job_settings(self):
+        return self._get_optional_section('excel_jobs', {
+            'max_workers': 2,
+            'max_queued_jobs': 20,
+            'use_processes': True,
+        })
+
+    # Getter for chunked publishing through the fileUploads API (single-request limit, part size, part retries)
+    def get_file_upload_settings(self):
+        return self._get_optional_section('file_uploads', {
+            'single_request_max_mb': 64,
+            'chunk_size_mb': 32,
+            'max_part_retries': 3,
+            'retry_backoff_seconds': 2,
+        })
+
+    # Getter for the migration step executor (parallel steps, concurrent REST calls per Tableau site)
+    def get_migration_dag_settings(self):
+        return self._get_optional_section('migration_dag', {
+            'max_workers': 4,
+            'max_site_concurrency': 2,
+        })
+
+    # Getter for the shared migration sessions per environment (refresh margin, max session lifetime)
+    def get_migration_session_settings(self):
+        return self._get_optional_section('migration_sessions', {
+            'refresh_margin_seconds': 300,
+            'max_session_seconds': 7200,
+        })
+
+    # Getter for the migration progress pub/sub channel (backend, Redis URL, replay TTL)
+    def get_progress_channel_settings(self):
+        return self._get_optional_section('progress_channel', {
+            'backend': 'memory',
+            'url': 'redis://localhost:6379/0',
+            'channel_prefix': 'tableau-doctor:progress:',
+            'replay_ttl_seconds': 86400,
+        })
+
+    # Getter for the idWithin query planner (node budget and estimated node cost per id, deep and probe queries)
+    def get_query_planner_settings(self):
+        return self._get_optional_section('query_planner', {
+            'node_budget': 20000,
+            'workbook_node_cost': 1500,
+            'datasource_node_cost': 2000,
+            'probe_node_cost': 10,
+        })
+
+    # Getter for the persistent per-site metadata snapshot cache (incremental refresh)
+    def get_snapshot_cache_settings(self):
+        return self._get_optional_section('snapshot_cache', {
+            'enabled': True,
+            'path': '/tmp/metadata_cache/metadata_snapshots.sqlite3',
+            'max_age_seconds': 604800,
+        })
+
+    # Getter for the byte budgets / TTLs of the in-process stores (sessions, Excel jobs, progress)
+    def get_memory_limit_settings(self):
+        return self._get_optional_section('memory_limits', {
+            'session_max_bytes': 1024 * 1024 * 1024,
+            'job_status_max_bytes': 8 * 1024 * 1024,
+            'job_status_ttl_seconds': 86400,
+            'progress_max_bytes': 8 * 1024 * 1024,
+            'progress_ttl_seconds': 86400,
+        })
+
+    # Getter for the session metadata store (backend, Redis URL, session TTL)
+    def get_session_store_settings(self):
+        return self._get_optional_section('session_store', {
+            'backend': 'memory',
+            'url': 'redis://localhost:6379/0',
+            'ttl_seconds': 3600,
+            'key_prefix': 'tableau-doctor:session:',
+        })
+
     # Getter for Tableau output path directory
     def get_logo_path(self):
         try:
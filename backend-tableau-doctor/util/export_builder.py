@@ -0,0 +1,229 @@
+"""
+Module: export_builder
+
+This module builds the combined export files of a session (the formatted
+Excel workbook and the Parquet / Arrow / gzip CSV files) from its stored
+metadata. `build_export_files` is what the Excel job scheduler runs in its
+process pool; pool workers are started with the `spawn` method and import
+this module by name, so it must stay free of import-time side effects (no
+FastAPI app, stores, sessions or progress channel, unlike `main`).
+
+Key Features:
+- `build_export_package`: the sheet definitions (name, payload, columns) of
+  the combined export.
+- `build_export_files`: writes the requested formats and returns their paths.
+- `write_summary_counts*`: register the 'Summary' and 'Project Summary'
+  sheets (project rollups, then the site totals) on a TableauExcellGenerator.
+
+Usage Example:
+    files = excel_scheduler.run_in_pool(build_export_files, session_data, ["xlsx", "parquet"])
+    ...
+    remove_export_files(files)
+"""
+
+import logging
+import os
+import uuid
+from typing import Any, Dict, List
+
+from core.managers.workbook_summary import (
+    build_workbook_summary, as_records, project_summary_records, SUMMARY_COLUMNS, PROJECT_SUMMARY_COLUMNS,
+)
+from util.columnar_export import ColumnarExporter, COLUMNAR_FORMATS
+from util.tableau_excel_generator import TableauExcellGenerator
+
+EXPORT_FORMATS = ("xlsx",) + COLUMNAR_FORMATS
+
+
+def build_export_package(wb_processed: Dict[str, Any], ds_processed: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Sheet definitions (name, payload, columns) of the combined export of a session."""
+    return [
+        {
+            "sheet_name": "WB_Dashboard Details",
+            "payload": wb_processed.get("workbook_details", []),
+            'columns': [
+                'Project ID', 'Project', 'Workbook ID', 'Workbook',
+                'Workbook Owner ID', 'Workbook Owner Username',
+                'Dashboard ID', 'Dashboard', 'Sheet ID', 'Sheet',
+                'Field ID', 'Field', 'Field Type',
+                'Datasource ID', 'Datasource', 'Table Name',
+                'Column Name', 'Formula'
+            ],
+        },
+        {
+            "sheet_name": "WB_Datasource Details",
+            "payload": wb_processed.get("datasource_details", []),
+             'columns': [
+                'WB_Project ID', 'WB_Project', 'Workbook ID', 'Workbook LUID', 'Workbook', 'WB_Created Date', 'WB_Updated Date', 'WB_Tags', 'Description',
+                'Datasource ID', 'datasource_luid', 'Datasource', 'DS_Created Date', 'DS_Updated Date', 'DS_Project ID', 'DS_Project', 'DS_Tags', 'Contains Extract', 'DataSource Type',
+                'Field ID', 'Field Name', 'Field Type', 'Formula', 'Table', 'Column', 'Sheet ID', 'Sheet', 'Used In Sheet', 'Dashboard ID', 'Dashboard', 'Custom Query', 'Flag'
+            ],
+        },
+        {
+            "sheet_name": "WB_Custom Query Details",
+            "payload": wb_processed.get("custom_query_details", []),
+            'columns': [
+                'Project ID', 'Project', 'Workbook ID', 'Workbook',
+                'Custom Query ID', 'Custom Query', 'Query', 'Flag'
+            ],
+        },
+        {
+            "sheet_name": "WB_Usage Statistics",
+            "payload": wb_processed.get("usage_statistics", []),
+            'columns': [
+                'Project ID', 'project', 'workbook ID', 'Workbook',
+                'View ID', 'View', 'created_at', 'updated_at', 'Total Views'
+            ],
+        },
+        {
+            "sheet_name": "DS_Datasource Details",
+            "payload": ds_processed.get("datasource_details", []),
+            "columns": [
+                "DS_Project ID", "DS_Project", "Datasource ID","datasource_luid", "Datasource", "DS_Created Date", "DS_Updated Date", "Contains Extract",
+                "DS_Tags", "DataSource Type", "Field ID", "Field Name", "Field Type", "Formula", "Column", "Table", "Sheet ID", "Sheet",
+                "Used In Sheet", "Dashboard ID", "Dashboard", "Workbook ID", "Workbook", "Workbook LUID", "WB_Created Date", "WB_Updated Date",
+                "WB_Tags", "Description", "WB_Project", "WB_Project ID", "Custom Query", "Flag"
+            ],
+        },
+        {
+            "sheet_name": "DS_Custom Query Details",
+            "payload": ds_processed.get("custom_query_details", []),
+            'columns': [
+                'Project ID', 'Project', 'Workbook ID', 'Workbook',
+                'Custom Query ID', 'Custom Query', 'Query', "Flag"
+            ],
+        },
+    ]
+
+
+def build_export_files(session_data: Dict[str, Any], formats: List[str]) -> Dict[str, Any]:
+    """
+    Build the combined Excel and/or columnar export files of a session.
+
+    CPU-bound: runs in the Excel scheduler's process pool, so it only takes
+    picklable arguments and returns the written file paths
+    ({"xlsx": path, "<format>": [paths]}); uploading happens in the caller.
+    """
+    wb_processed = session_data.get("workbook", {})
+    ds_processed = session_data.get("datasource", {})
+
+    # ============ COMBINED EXCEL PACKAGE ============
+    package = build_export_package(wb_processed, ds_processed)
+
+    logging.info("Package created, generating Excel...")
+
+    excel_generator = TableauExcellGenerator(package=package, file_tag=uuid.uuid4().hex[:8])
+    files = {}
+    try:
+        if "xlsx" in formats:
+            # Summary sheet with combined counts (written first, in the same pass)
+            workbook_counts = wb_processed.get("workbook_counts", [])
+            datasource_counts = wb_processed.get("datasource_counts", [])
+
+            write_summary_counts_from_data(
+                excel_generator,
+                workbook_counts,
+                datasource_counts
+            )
+
+            # Generate Excel: formatted sheets streamed and written to disk once
+            excel_generator.generate_spreadsheet()
+            files["xlsx"] = excel_generator.file_path
+
+        # Columnar exports: one file per sheet and format
+        file_prefix = os.path.splitext(os.path.basename(excel_generator.file_path))[0]
+        exporter = ColumnarExporter(package, excel_generator.output_directory, file_prefix)
+        for file_format in formats:
+            if file_format != "xlsx":
+                files[file_format] = exporter.export(file_format)
+    except Exception:
+        remove_export_files(files)
+        if os.path.exists(excel_generator.file_path):
+            os.remove(excel_generator.file_path)
+        raise
+    return files
+
+
+def remove_export_files(files: Dict[str, Any]):
+    for paths in files.values():
+        for path in ([paths] if isinstance(paths, str) else paths):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def write_summary_counts(excel_generator, data_manager):
+    """
+    Generate a combined summary sheet showing workbook-level counts
+    for dashboards, sheets, fields, datasources, tables, and columns.
+    
+    Used when you have DataManager objects (backward compatible).
+    
+    Args:
+        excel_generator: TableauExcellGenerator instance
+        data_manager: Workbook data manager
+    """
+    try:
+        # Retrieve both sets of data
+        workbook_counts = data_manager.get_workbook_counts()
+        datasource_counts = data_manager.get_datasource_counts()
+        
+        # Generate the summary using the internal function
+        _generate_summary_sheet(excel_generator, workbook_counts, datasource_counts)
+        
+        print("Workbook Summary sheet prepared successfully.")
+
+    except Exception as e:
+        logging.critical(f"Critical Error generating summary sheet: {e}")
+        raise e
+
+
+def write_summary_counts_from_data(excel_generator, workbook_counts, datasource_counts):
+    """
+    Generate a combined summary sheet from pre-computed count data.
+    
+    Used when you already have the count dictionaries (e.g., from API responses).
+    
+    Args:
+        excel_generator: TableauExcellGenerator instance
+        workbook_counts: List of workbook count dictionaries
+        datasource_counts: List of datasource count dictionaries
+    """
+    try:
+        # Generate the summary using the internal function
+        _generate_summary_sheet(excel_generator, workbook_counts, datasource_counts)
+        
+        print("Workbook Summary sheet prepared successfully from provided data.")
+
+    except Exception as e:
+        logging.critical(f"Critical Error generating summary sheet: {e}")
+        raise e
+
+
+def _generate_summary_sheet(excel_generator, workbook_counts, datasource_counts):
+    """
+    Internal function to generate the actual summary sheet.
+    Shared by both write_summary_counts and write_summary_counts_from_data.
+    
+    Args:
+        excel_generator: TableauExcellGenerator instance
+        workbook_counts: List of workbook count dictionaries
+        datasource_counts: List of datasource count dictionaries
+
+    Returns:
+        WorkbookSummary (workbook rows, project rollups, site totals)
+    """
+    # Id-keyed join of the two count lists, with project / site rollups in the same pass
+    summary = build_workbook_summary(workbook_counts, datasource_counts)
+
+    # Register the combined summary sheet (written by generate_spreadsheet)
+    excel_generator.add_summary_sheet(
+        unique_counts=as_records(summary.rows, SUMMARY_COLUMNS),
+        columns=SUMMARY_COLUMNS
+    )
+    # Project rollups, with the site totals as the last row
+    excel_generator.add_rollup_sheet(
+        "Project Summary",
+        project_summary_records(summary),
+        PROJECT_SUMMARY_COLUMNS
+    )
+    return summary
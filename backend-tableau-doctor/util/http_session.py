@@ -0,0 +1,128 @@
+"""
+Module: http_session
+
+This module owns the process-wide HTTP transport used by every client that talks
+to Tableau (`TableauAuthClient`, `TableauQueryClient` and the migrator's
+`TableauClient`). Instead of paying a new TCP + TLS handshake on every bare
+`requests.get` / `requests.post`, all calls go through one pooled
+`requests.Session` that keeps connections alive between requests.
+
+Key Features:
+- Connection pooling: `pool_connections` host pools with `pool_maxsize` keep-alive
+  connections each, with optional per-host overrides (`host_pool_maxsize`).
+- Timeouts: a default (connect, read) timeout is applied to every request that
+  does not pass its own `timeout`.
+- Retries: 429 and 5xx responses (and connection errors) of idempotent methods
+  are retried with exponential backoff, honouring `Retry-After`. POST / PUT are
+  never replayed by the transport (sign-in, publish and file-upload appends are
+  not idempotent); read-only GraphQL POSTs are retried by `TableauQueryClient`.
+- No shared cookies: the session never stores cookies, so one user's Tableau
+  session cannot leak into another user's request.
+
+Usage Example:
+    session = get_http_session()
+    response = session.get(url, headers=headers)
+"""
+
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from util.config_managers.tableau_reader import TableauConfigManager
+
+logger = logging.getLogger(__name__)
+
+# Status codes that are safe to retry for Tableau REST and Metadata API calls
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Only idempotent methods are replayed by the transport. POST and PUT are left out:
+# replaying a sign-in, publish or fileUploads append could apply it twice.
+RETRY_METHODS = frozenset(['HEAD', 'GET', 'DELETE', 'OPTIONS'])
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller does not pass one."""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def build_http_session(pool_connections=10, pool_maxsize=20, host_pool_maxsize=None,
+                       connect_timeout=10, read_timeout=120, retries=3,
+                       backoff_factor=0.5):
+    """
+    Build a pooled, keep-alive `requests.Session`.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache.
+        pool_maxsize: Keep-alive connections kept per host.
+        host_pool_maxsize: Optional {url_prefix: pool_maxsize} overrides for specific hosts.
+        connect_timeout: Default connect timeout in seconds.
+        read_timeout: Default read timeout in seconds.
+        retries: Retries for connection errors, 429 and 5xx responses (idempotent methods only).
+        backoff_factor: Exponential backoff factor between retries.
+
+    Returns:
+        A configured requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=RETRY_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the last response back, callers use raise_for_status()
+    )
+    timeout = (connect_timeout, read_timeout)
+
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))  # never store cookies
+
+    default_adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        timeout=timeout,
+    )
+    session.mount('https://', default_adapter)
+    session.mount('http://', default_adapter)
+
+    # Hosts that need a bigger (or smaller) pool get their own adapter
+    for prefix, maxsize in (host_pool_maxsize or {}).items():
+        session.mount(prefix, TimeoutHTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=maxsize,
+            max_retries=retry,
+            timeout=timeout,
+        ))
+
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Return the process-wide pooled session, creating it from tableau.yaml on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                settings = TableauConfigManager().get_http_settings()
+                _session = build_http_session(**settings)
+                logger.info("Shared HTTP session created.")
+    return _session
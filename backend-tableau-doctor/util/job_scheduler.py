@@ -0,0 +1,196 @@
+"""
+Module: job_scheduler
+
+This module runs background jobs (the combined Excel / columnar export) on a
+fixed number of worker threads with a bounded FIFO queue, instead of starting
+one thread per request.
+
+Key Features:
+- At most `max_workers` jobs run at once; at most `max_queue` wait behind them
+  (`submit` raises QueueFullError beyond that).
+- Jobs are keyed (e.g. by session key): submitting a key that is already queued
+  or running attaches to the existing job instead of starting a second one.
+- Queued jobs report their 1-based queue position and can be cancelled; a
+  running job gets its `cancel_event` set and is expected to stop at its next
+  checkpoint.
+- `run_in_pool` runs CPU-bound work of a job in a shared process pool (or
+  inline when `use_processes` is off), so heavy workbook builds do not compete
+  for the GIL of the API process.
+
+Usage Example:
+    scheduler = JobScheduler("excel", runner=generate_excel_worker, max_workers=2, max_queue=20)
+    job, created = scheduler.submit(session_key, formats)
+    scheduler.position(session_key)   # 0 when running, None when unknown
+    scheduler.cancel(session_key)     # 'cancelled' | 'cancelling' | None
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+CANCELLED = "cancelled"
+
+
+class QueueFullError(Exception):
+    """Raised by `JobScheduler.submit` when `max_queue` jobs are already waiting."""
+
+
+class Job:
+    __slots__ = ("key", "args", "state", "cancel_event", "submitted_at", "started_at")
+
+    def __init__(self, key, args):
+        self.key = key
+        self.args = args
+        self.state = QUEUED
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.time()
+        self.started_at = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+
+class JobScheduler:
+    def __init__(self, name, runner, max_workers=2, max_queue=20, use_processes=True, start_method="spawn"):
+        """
+        Args:
+            name: Used for thread names and log lines
+            runner: Called as runner(job, *job.args) on a worker thread
+            max_workers: Jobs running at once (also the process pool size)
+            max_queue: Jobs allowed to wait for a worker
+            use_processes: Run `run_in_pool` work in a process pool
+            start_method: multiprocessing start method of the pool
+        """
+        self.name = name
+        self.runner = runner
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.use_processes = use_processes
+        self.start_method = start_method
+        self._pending = deque()
+        self._active = {}  # key -> Job (queued or running)
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    # ---------------- queue ----------------
+    def submit(self, key, *args):
+        """Queue a job for `key`; returns (job, created). Attaches to an active job for the same key."""
+        with self._cond:
+            job = self._active.get(key)
+            if job is not None:
+                logger.info(f"[{self.name}] Job {key} already {job.state}; attaching")
+                return job, False
+            if len(self._pending) >= self.max_queue:
+                raise QueueFullError(f"{len(self._pending)} {self.name} jobs already queued")
+            job = Job(key, args)
+            self._active[key] = job
+            self._pending.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+            logger.info(f"[{self.name}] Queued job {key} (position {len(self._pending)})")
+            return job, True
+
+    def get(self, key):
+        with self._cond:
+            return self._active.get(key)
+
+    def position(self, key):
+        """1-based queue position of a waiting job, 0 when running, None when not active."""
+        with self._cond:
+            job = self._active.get(key)
+            if job is None:
+                return None
+            if job.state == RUNNING:
+                return 0
+            return self._pending.index(job) + 1
+
+    def cancel(self, key):
+        """Cancel a job: 'cancelled' (removed from the queue), 'cancelling' (running), or None."""
+        with self._cond:
+            job = self._active.get(key)
+            if job is None:
+                return None
+            job.cancel_event.set()
+            if job.state == QUEUED:
+                self._pending.remove(job)
+                del self._active[key]
+                job.state = CANCELLED
+                logger.info(f"[{self.name}] Cancelled queued job {key}")
+                return CANCELLED
+            logger.info(f"[{self.name}] Cancellation requested for running job {key}")
+            return "cancelling"
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "name": self.name,
+                "queued": len(self._pending),
+                "running": sum(1 for job in self._active.values() if job.state == RUNNING),
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
+
+    # ---------------- workers ----------------
+    def _ensure_workers(self):
+        # Lock held; worker threads are started lazily, up to max_workers
+        if len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._work, name=f"{self.name}-worker-{len(self._threads) + 1}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                job.state = RUNNING
+                job.started_at = time.time()
+            try:
+                self.runner(job, *job.args)
+            except Exception as e:
+                logger.error(f"[{self.name}] Job {job.key} failed: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    if self._active.get(job.key) is job:
+                        del self._active[job.key]
+                    job.state = CANCELLED if job.cancelled else FINISHED
+
+    # ---------------- CPU-bound work ----------------
+    def run_in_pool(self, fn, *args):
+        """
+        Run fn(*args) in the process pool and return its result. fn and args must
+        be picklable, and fn must live in a module without import-time side
+        effects: spawned workers import it by name (see util.export_builder).
+        """
+        if not self.use_processes:
+            return fn(*args)
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            pool = self._pool
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker process died (e.g. OOM kill); start a fresh pool for the next job
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+            raise
@@ -0,0 +1,228 @@
+"""
+Module: progress_channel
+
+This module is the publish/subscribe channel between migration threads and
+the SSE progress endpoint. Publishers merge an update into the task's latest
+progress snapshot and wake subscribers; subscribers get each new snapshot as
+soon as it is published instead of polling the progress store.
+
+Key Features:
+- In-process: an asyncio Condition on the API event loop, woken thread-safely
+  from the publishing thread.
+- Across workers (backend 'redis'): snapshots are also published on a Redis
+  channel and mirrored into every worker's local store by a listener thread,
+  so the SSE connection may land on any worker.
+- Replay: the latest snapshot of a task is kept (local store, and a Redis key
+  with a TTL), so a late subscriber immediately receives the last event.
+- Bookkeeping: a task's version counter is dropped once it reaches a terminal
+  status, or when its snapshot is evicted / expires from the store, so tasks
+  that never get a subscriber leave nothing behind.
+
+Configuration (`tableau.progress_channel` in tableau.yaml, overridable by env):
+- backend: 'memory' or 'redis'            (env PROGRESS_CHANNEL_BACKEND)
+- url: Redis URL                           (env REDIS_URL)
+- channel_prefix: Redis channel / key prefix
+- replay_ttl_seconds: lifetime of the Redis replay key
+
+Usage Example:
+    channel = ProgressChannel(progress_store)
+    channel.publish(task_id, {"stage": 10, "message": "Downloading"})   # any thread
+    async for progress in channel.subscribe(task_id, idle_timeout=3):   # event loop
+        ...
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from util.config_managers.tableau_reader import TableauConfigManager
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+_UNSEEN = object()
+
+
+class ProgressChannel:
+    def __init__(self, store, redis_client=None, channel_prefix="tableau-doctor:progress:", replay_ttl_seconds=86400):
+        """
+        Args:
+            store: Mapping of task_id -> latest progress snapshot (e.g. the BoundedStore progress_store)
+            redis_client: Optional redis.Redis for cross-worker delivery and replay
+            channel_prefix: Prefix of the Redis channel and replay keys
+            replay_ttl_seconds: Lifetime of a task's Redis replay key
+        """
+        self.store = store
+        self.redis = redis_client
+        self.channel_prefix = channel_prefix
+        self.replay_ttl_seconds = replay_ttl_seconds
+        self._versions = {}  # task_id -> number of snapshots seen by this process (running tasks only)
+        self._lock = threading.Lock()
+        if hasattr(store, "on_evict"):
+            store.on_evict = self._evicted
+        self._loop = None
+        self._condition = None
+        if self.redis is not None:
+            threading.Thread(target=self._listen, name="progress-listener", daemon=True).start()
+
+    # ---------------- publishing (any thread) ----------------
+    def publish(self, task_id, update, replace=False):
+        """Merge `update` into the task's snapshot (or replace it) and notify subscribers."""
+        with self._lock:
+            snapshot = {} if replace else dict(self.store.get(task_id) or {})
+            snapshot.update(update)
+            self._apply(task_id, snapshot)
+
+        if self.redis is not None:
+            try:
+                payload = json.dumps({"task_id": task_id, "progress": snapshot}, default=str)
+                pipe = self.redis.pipeline()
+                pipe.set(self._replay_key(task_id), payload, ex=int(self.replay_ttl_seconds))
+                pipe.publish(self._channel(), payload)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Could not publish progress of {task_id} to Redis: {e}")
+        return snapshot
+
+    def forget(self, task_id):
+        """Drop a finished task's snapshot and bookkeeping."""
+        with self._lock:
+            self.store.pop(task_id, None)
+            self._versions.pop(task_id, None)
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._replay_key(task_id))
+            except Exception as e:
+                logger.warning(f"Could not delete replay key of {task_id}: {e}")
+
+    def _evicted(self, task_id):
+        # Called by the store with its lock held: no channel lock here (publish holds it while writing)
+        self._versions.pop(task_id, None)
+
+    def _apply(self, task_id, snapshot):
+        self.store[task_id] = snapshot
+        if snapshot.get("status") in TERMINAL_STATUSES:
+            # Finished tasks are not updated again; dropping the counter still wakes
+            # subscribers (their last seen version differs from None)
+            self._versions.pop(task_id, None)
+        else:
+            self._versions[task_id] = self._versions.get(task_id, 0) + 1
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._schedule_notify)
+
+    def _schedule_notify(self):
+        asyncio.ensure_future(self._notify_all())
+
+    async def _notify_all(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    # ---------------- subscribing (event loop) ----------------
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+
+    def latest(self, task_id):
+        """Latest snapshot of a task (local store first, then the Redis replay key)."""
+        snapshot = self.store.get(task_id)
+        if snapshot is None and self.redis is not None:
+            try:
+                payload = self.redis.get(self._replay_key(task_id))
+            except Exception as e:
+                logger.warning(f"Could not read replay key of {task_id}: {e}")
+                payload = None
+            if payload:
+                snapshot = json.loads(payload)["progress"]
+                with self._lock:
+                    if task_id not in self.store:
+                        self._apply(task_id, snapshot)
+        return snapshot
+
+    async def wait_for_task(self, task_id, timeout):
+        """Wait until the task has a snapshot; returns it, or None after `timeout` seconds."""
+        self._bind_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            snapshot = self.latest(task_id)
+            remaining = deadline - time.monotonic()
+            if snapshot is not None or remaining <= 0:
+                return snapshot
+            try:
+                async with self._condition:
+                    # Redis replay keys are not signalled locally, so re-check at least every second
+                    await asyncio.wait_for(self._condition.wait(), timeout=min(remaining, 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def subscribe(self, task_id, idle_timeout):
+        """
+        Yield the latest snapshot (replay), then every new snapshot as it is
+        published. Yields None after `idle_timeout` seconds without an update
+        (keepalive) and returns once the task disappears.
+        """
+        self._bind_loop()
+        seen = _UNSEEN  # finished tasks have no version (None): the replay is still sent
+        while True:
+            version = self._versions.get(task_id)
+            snapshot = self.latest(task_id) if version is None else self.store.get(task_id)
+            if snapshot is None:
+                return
+            version = self._versions.get(task_id)
+            if version != seen:
+                seen = version
+                yield snapshot
+                continue
+            try:
+                async with self._condition:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self._versions.get(task_id) != seen),
+                        timeout=idle_timeout,
+                    )
+            except asyncio.TimeoutError:
+                yield None
+
+    # ---------------- Redis ----------------
+    def _channel(self):
+        return f"{self.channel_prefix}events"
+
+    def _replay_key(self, task_id):
+        return f"{self.channel_prefix}last:{task_id}"
+
+    def _listen(self):
+        # Mirrors snapshots published by other workers into this process
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel())
+                for message in pubsub.listen():
+                    event = json.loads(message["data"])
+                    with self._lock:
+                        if self.store.get(event["task_id"]) != event["progress"]:
+                            self._apply(event["task_id"], event["progress"])
+            except Exception as e:
+                logger.warning(f"Progress listener disconnected from Redis: {e}; reconnecting")
+                time.sleep(1)
+
+
+def build_progress_channel(store, settings=None):
+    """Create the channel selected by config / environment."""
+    settings = dict(settings or TableauConfigManager().get_progress_channel_settings())
+    backend = os.getenv("PROGRESS_CHANNEL_BACKEND", settings["backend"]).lower()
+
+    if backend == "redis":
+        import redis  # only needed when the Redis backend is selected
+        url = os.getenv("REDIS_URL", settings["url"])
+        logger.info(f"Using Redis progress channel at {url}")
+        return ProgressChannel(
+            store, redis.Redis.from_url(url), settings["channel_prefix"], settings["replay_ttl_seconds"])
+    if backend != "memory":
+        raise ValueError(f"Unknown progress channel backend: {backend}")
+    logger.info("Using in-process progress channel")
+    return ProgressChannel(store)
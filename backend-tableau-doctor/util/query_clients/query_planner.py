@@ -0,0 +1,147 @@
+"""
+Module: query_planner
+
+This module defines the `MetadataQueryPlanner` class, which splits large
+`idWithin` Metadata API queries into size-bounded chunks and runs them
+concurrently. Deep lineage selections (dashboards -> sheets -> fields ->
+upstreamColumns -> tables) make the node count grow quickly with the number
+of selected ids, so a single query for 50+ workbooks times out or hits the
+Metadata API node limit.
+
+How it works:
+- Each id is given an estimated node cost; ids are packed into chunks whose
+  total estimated cost stays under the configured node budget.
+- Chunks run in parallel on a bounded thread pool sharing the site's rate limiter.
+- A chunk that still fails with a node-limit error is split in half and retried.
+  A single id that still hits the limit keeps the partial `data` the API sent
+  with the error (logged), as an unchunked query would; other GraphQL errors
+  are logged and their partial data kept as well.
+- The `data.<result_key>` lists of all chunks are merged, in the order of the
+  requested ids, into one response shaped exactly like a single query's.
+- `AsyncMetadataQueryPlanner` runs the same plan with asyncio (for
+  `AsyncTableauQueryClient`), bounded by a semaphore instead of threads.
+
+Usage Example:
+    planner = MetadataQueryPlanner(query_client)
+    raw = planner.run(query_client.query_workbook_metadata, workbook_ids,
+                      'workbooks', node_cost=settings['workbook_node_cost'])
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from util.config_managers.tableau_reader import TableauConfigManager
+from util.rate_limiter import get_site_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataQueryPlanner:
+    def __init__(self, query_client, node_budget=None, max_workers=None):
+        config = TableauConfigManager()
+        self.query_client = query_client
+        self.node_budget = node_budget or config.get_query_planner_settings()['node_budget']
+        self.max_workers = max_workers or config.get_concurrency_settings()['max_workers']
+
+    def plan(self, ids, node_cost):
+        """Split ids (deduplicated, order kept) into chunks that fit the node budget."""
+        chunk_size = max(1, int(self.node_budget // max(1, node_cost)))
+        unique_ids = list(dict.fromkeys(ids))
+        return [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+
+    @staticmethod
+    def _node_limit_error(response):
+        """Message of the node-limit error of a response (None if there is none); other errors are logged."""
+        node_limit = None
+        for error in response.get('errors') or []:
+            message = str(error.get('message', ''))
+            if 'node limit' in message.lower() or 'node_limit' in message.lower():
+                node_limit = node_limit or message
+            else:
+                logger.warning(f"Metadata API error: {message}")
+        return node_limit
+
+    @staticmethod
+    def _nodes(response, chunk, result_key, node_limit):
+        if node_limit is not None:
+            logger.error(f"Node limit hit for id {chunk[0]}, keeping the partial result: {node_limit}")
+        return (response.get('data') or {}).get(result_key) or []
+
+    def _run_chunk(self, build_query, chunk, result_key, limiter):
+        """Run one chunk, halving it while the API reports a node-limit error."""
+        limiter.acquire()
+        response = self.query_client.send_request(build_query(chunk))
+        node_limit = self._node_limit_error(response)
+        if node_limit is None or len(chunk) == 1:
+            return self._nodes(response, chunk, result_key, node_limit)
+        middle = len(chunk) // 2
+        logger.warning(f"Node limit hit for {len(chunk)} ids, splitting into {middle} + {len(chunk) - middle}")
+        return (self._run_chunk(build_query, chunk[:middle], result_key, limiter) +
+                self._run_chunk(build_query, chunk[middle:], result_key, limiter))
+
+    def run(self, build_query, ids, result_key, node_cost):
+        """
+        Execute `build_query(chunk)` for every planned chunk and merge the results.
+
+        Args:
+            build_query: Callable building an idWithin query for a list of ids.
+            ids: The ids selected by the caller.
+            result_key: The key of the node list under `data` (e.g. 'workbooks').
+            node_cost: Estimated Metadata API nodes returned per id.
+
+        Returns:
+            dict: {'data': {result_key: [...]}} with nodes ordered like `ids`.
+        """
+        chunks = self.plan(ids, node_cost)
+        if not chunks:
+            return {'data': {result_key: []}}
+
+        logger.info(f"Planned {len(chunks)} {result_key} chunk(s) for {len(ids)} id(s)")
+        limiter = get_site_rate_limiter(self.query_client.auth_client.site_id)
+        workers = max(1, min(self.max_workers, len(chunks)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda chunk: self._run_chunk(build_query, chunk, result_key, limiter),
+                chunks,
+            ))
+
+        return self._merge(results, ids, result_key)
+
+    @staticmethod
+    def _merge(results, ids, result_key):
+        nodes = [node for chunk_nodes in results for node in chunk_nodes]
+        position = {node_id: index for index, node_id in enumerate(dict.fromkeys(ids))}
+        nodes.sort(key=lambda node: position.get(node.get('id'), len(position)))
+        return {'data': {result_key: nodes}}
+
+
+class AsyncMetadataQueryPlanner(MetadataQueryPlanner):
+    """Same plan as MetadataQueryPlanner, with chunks awaited concurrently on the event loop."""
+
+    async def _run_chunk(self, build_query, chunk, result_key, limiter):
+        await limiter.acquire_async()
+        response = await self.query_client.send_request(build_query(chunk))
+        node_limit = self._node_limit_error(response)
+        if node_limit is None or len(chunk) == 1:
+            return self._nodes(response, chunk, result_key, node_limit)
+        middle = len(chunk) // 2
+        logger.warning(f"Node limit hit for {len(chunk)} ids, splitting into {middle} + {len(chunk) - middle}")
+        return (await self._run_chunk(build_query, chunk[:middle], result_key, limiter) +
+                await self._run_chunk(build_query, chunk[middle:], result_key, limiter))
+
+    async def run(self, build_query, ids, result_key, node_cost):
+        chunks = self.plan(ids, node_cost)
+        if not chunks:
+            return {'data': {result_key: []}}
+
+        logger.info(f"Planned {len(chunks)} {result_key} chunk(s) for {len(ids)} id(s)")
+        limiter = get_site_rate_limiter(self.query_client.auth_client.site_id)
+        semaphore = asyncio.Semaphore(max(1, self.max_workers))
+
+        async def run_bounded(chunk):
+            async with semaphore:
+                return await self._run_chunk(build_query, chunk, result_key, limiter)
+
+        results = await asyncio.gather(*(run_bounded(chunk) for chunk in chunks))
+        return self._merge(results, ids, result_key)
@@ -7,61 +7,105 @@ and their metadata. It utilizes the `TableauAuthClient` for authentication
 and provides methods to send queries and process responses.
 
 Imports:
-- requests: Used for making HTTP requests to the Tableau API.
+- requests: Used for making HTTP requests to the Tableau API (through the pooled session).
 - json: Used for handling JSON data.
 - logging: Used for logging information and errors.
 - util.auth_clients.tableau_auth: Provides the TableauAuthClient for authentication.
 
 Classes:
 - TableauQueryClient: Client for querying Tableau metadata and workbooks via GraphQL.
+- AsyncTableauQueryClient: asyncio variant (same query builders) for async route
+  handlers; requests share the pooled `httpx.AsyncClient`.
 """
 
+import asyncio  # Concurrent async REST calls
 import requests  # Import the requests library for HTTP requests
+import httpx  # Async HTTP client errors
 import json  # Import the json library for JSON handling
 import logging  # Import the logging library for logging
+import time  # Backoff between GraphQL retries
+from concurrent.futures import ThreadPoolExecutor  # Bounded fan-out for per-workbook REST calls
 from util.auth_clients.tableau_auth import TableauAuthClient  # Import TableauAuthClient
+from util.config_managers.tableau_reader import TableauConfigManager  # Concurrency settings
+from util.rate_limiter import get_site_rate_limiter  # Per-site request budget
+from util.query_clients.query_planner import MetadataQueryPlanner, AsyncMetadataQueryPlanner  # Chunked idWithin execution
+from util.auth_clients.tableau_auth import AsyncTableauAuthClient  # Async authentication
+from util.async_http_client import AsyncHttpClient  # Shared async connection pool
+from util.single_flight import query_key, caller_scope, metadata_flight, async_metadata_flight  # Request coalescing
+from util.snapshot_cache import get_snapshot_cache, fingerprint  # Incremental metadata refresh
+from util.json_decoding import loads  # Fast decoding of large responses
+from util.http_session import RETRY_STATUS_CODES  # Statuses worth retrying for read-only queries
+from util.bounded_store import BoundedStore  # Session -> Tableau user id of the snapshot owner
 
 # Set up logging configuration
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# caller_scope(token) -> owner of the caller's metadata snapshots (resolved once per Tableau session)
+_snapshot_owners = BoundedStore("snapshot_owners", max_bytes=1024 * 1024, ttl_seconds=4 * 3600)
+
 class TableauQueryClient:
     """
     A client for querying Tableau workbooks and metadata using the GraphQL API.
     """
 
-    def __init__(self, auth: TableauAuthClient):
+    planner_class = MetadataQueryPlanner  # Runs chunked idWithin metadata queries
+
+    def __init__(self, auth: TableauAuthClient, session: requests.Session | None = None):
         """Initialize the TableauQueryClient with the given authentication client."""
         self.auth_client = auth  # Store the TableauAuthClient instance
+        self.session = session or auth.session  # Share the auth client's pooled transport
+        http_settings = TableauConfigManager().get_http_settings()  # Read once, not on every GraphQL POST
+        self.retries = http_settings['retries']  # Retries of read-only GraphQL POSTs
+        self.backoff_factor = http_settings['backoff_factor']  # Exponential backoff between them
         self.headers = {
             'Content-Type': 'application/json',  # Set content type for requests
             'Accept': 'application/json'  # Set accepted response type
         }  # Headers used for GraphQL requests
 
-    def query_loader(self):
-        """Construct and return a query to load workbooks."""
+    @staticmethod
+    def _connection_args(first, after, filters):
+        """Build the `(first:, after:, filter:)` argument list of a *Connection query."""
+        args = [f'first: {int(first)}']
+        if after:
+            args.append(f'after: {json.dumps(after)}')
+        filters = {k: v for k, v in filters.items() if v}
+        if filters:
+            filter_body = ', '.join(f'{k}: {json.dumps(v)}' for k, v in filters.items())
+            args.append(f'filter: {{ {filter_body} }}')
+        return ', '.join(args)
+
+    def query_loader(self, first=200, after=None, project_luid=None):
+        """Construct and return a query for one page of workbooks, optionally for a single project."""
         try:
-            query = """{
-                workbooks {
-                    name
-                    id
-                    luid
-                    projectName
-                    projectLuid
-                    projectVizportalUrlId
-                    upstreamDatasources{
-                     luid
-                     name
-                    }
-                    embeddedDatasources {
-                    id
-                    name
-                    parentPublishedDatasources{
+            args = self._connection_args(first, after, {'projectLuid': project_luid})
+            query = f"""{{
+                workbooksConnection({args}) {{
+                    nodes {{
                         name
+                        id
                         luid
-                    }
-                  }
-                }
-            }"""
+                        projectName
+                        projectLuid
+                        projectVizportalUrlId
+                        upstreamDatasources{{
+                         luid
+                         name
+                        }}
+                        embeddedDatasources {{
+                        id
+                        name
+                        parentPublishedDatasources{{
+                            name
+                            luid
+                        }}
+                      }}
+                    }}
+                    pageInfo {{
+                        hasNextPage
+                        endCursor
+                    }}
+                }}
+            }}"""
             return query  # Return the constructed query
         except Exception as e:
             logging.critical(f'Runtime Critical Error: {e}')
@@ -175,18 +219,25 @@ class TableauQueryClient:
             logging.critical(f'Runtime Critical Error: {e}')
             raise
 
-    def query_datasource(self):
-        """Construct and return a query to load datasources."""
+    def query_datasource(self, first=200, after=None, project_vizportal_url_id=None):
+        """Construct and return a query for one page of published datasources, optionally for a single project."""
         try:
-            query = """{
-                publishedDatasources{
+            args = self._connection_args(first, after, {'projectVizportalUrlId': project_vizportal_url_id})
+            query = f"""{{
+                publishedDatasourcesConnection({args}) {{
+                    nodes {{
                         id
                         name
                         luid
                         projectVizportalUrlId
                         projectName
-                    }
-            }"""
+                    }}
+                    pageInfo {{
+                        hasNextPage
+                        endCursor
+                    }}
+                }}
+            }}"""
             return query  # Return the constructed query
         except Exception as e:
             logging.critical(f'Runtime Critical Error: {e}')
@@ -279,25 +330,39 @@ class TableauQueryClient:
             raise    
 
 
+    def _coalesce_key(self, query):
+        """
+        Single-flight key: identical queries of the same user share one call. Results
+        are permission-filtered, so a site-wide scope must be opted into explicitly.
+        """
+        scope = TableauConfigManager().get_concurrency_settings()['coalesce_scope']
+        owner = None if scope == 'site' else caller_scope(self.auth_client.auth_token)
+        return query_key((self.auth_client.server_url, self.auth_client.site_id, owner), query)
+
     def send_request(self, query):
-        """Send a request to the Tableau API with the specified GraphQL query."""
+        """
+        Send a request to the Tableau API with the specified GraphQL query.
+        Concurrent identical queries share one upstream call and its (read-only) parsed response.
+        """
+        if self.auth_client.auth_token is None:
+            logging.warning('You are not signed in.')  # Log warning if user is not authenticated
+            raise RuntimeError('User is not authenticated.')  # Raise error if not signed in
+        return metadata_flight.do(self._coalesce_key(query), lambda: self._post_query(query))
+
+    def _post_query(self, query):
+        """POST one GraphQL query to the Metadata API and return the JSON response."""
         #logging.info(f"Sending request with query: {query}")  # Log the query being sent
         try:
-            if self.auth_client.auth_token is None:
-                logging.warning('You are not signed in.')  # Log warning if user is not authenticated
-                raise RuntimeError('User is not authenticated.')  # Raise error if not signed in
-
             url = f'{self.auth_client.server_url}/api/metadata/graphql'  # Construct the API URL
-            self.headers['X-Tableau-Auth'] = self.auth_client.auth_token  # Add auth token to headers
-            self.headers['Content-Type'] = 'application/json'
+            headers = dict(self.headers, **{'X-Tableau-Auth': self.auth_client.auth_token})  # Add auth token
             payload = {'query': query}  # Create the payload with the query string
 
             #logging.info(f"Making POST request to URL: {url} with payload: {payload}")  # Log request details
-            response = requests.post(url, json=payload, headers=self.headers)  # Send the POST request
+            response = self._post_with_retry(url, payload, headers)  # Send the POST request
             response.raise_for_status()  # Raise error for unsuccessful status codes
             logging.info("Request successful, processing response.")  # Log success
             #logging.info(f"Response data: {response.json()}")  # Add this line
-            return response.json()  # Return JSON response data
+            return loads(response.content)  # Return JSON response data
 
         except requests.exceptions.RequestException as e:
             logging.error(f'Request Error: {e}')  # Log HTTP request errors
@@ -312,84 +377,430 @@ class TableauQueryClient:
             logging.error(f'Runtime Critical Error: {e}')  # Log any other unexpected errors
             raise  # Raise the exception without handling
 
+    @staticmethod
+    def _retry_delay(response, attempt, backoff_factor):
+        """Seconds to wait before retry `attempt`, honouring `Retry-After`."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return backoff_factor * (2 ** attempt)
+
+    def _post_with_retry(self, url, payload, headers):
+        """
+        POST a GraphQL query, retrying connection errors, 429 and 5xx responses.
+
+        The shared transport never replays POSTs (they are not idempotent in
+        general); Metadata API queries are read-only, so they are retried here.
+        """
+        retries, backoff_factor = self.retries, self.backoff_factor
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.post(url, json=payload, headers=headers)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == retries:
+                    raise
+                delay = self._retry_delay(None, attempt, backoff_factor)
+                logging.warning(f'GraphQL request failed ({e}); retrying in {delay:.1f}s')
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                    return response
+                delay = self._retry_delay(response, attempt, backoff_factor)
+                logging.warning(f'GraphQL request returned {response.status_code}; retrying in {delay:.1f}s')
+            time.sleep(delay)
+
+    def _iter_connection_pages(self, build_query, connection_key):
+        """Follow the `endCursor` of a *Connection query, yielding the nodes of each page."""
+        after = None
+        while True:
+            response = self.send_request(build_query(after))
+            connection = (response.get('data') or {}).get(connection_key) or {}
+            yield connection.get('nodes') or []
+
+            page_info = connection.get('pageInfo') or {}
+            if not page_info.get('hasNextPage') or not page_info.get('endCursor'):
+                break
+            after = page_info['endCursor']
+
+    def iter_workbook_pages(self, project_luid=None, page_size=None):
+        """Yield pages (lists) of workbook nodes, filtered server-side to a project when given."""
+        page_size = page_size or TableauConfigManager().get_catalog_settings()['page_size']
+        return self._iter_connection_pages(
+            lambda after: self.query_loader(first=page_size, after=after, project_luid=project_luid),
+            'workbooksConnection',
+        )
+
+    def iter_datasource_pages(self, project_vizportal_url_id=None, page_size=None):
+        """Yield pages (lists) of published datasource nodes, filtered server-side to a project when given."""
+        page_size = page_size or TableauConfigManager().get_catalog_settings()['page_size']
+        return self._iter_connection_pages(
+            lambda after: self.query_datasource(
+                first=page_size, after=after, project_vizportal_url_id=project_vizportal_url_id
+            ),
+            'publishedDatasourcesConnection',
+        )
+
+    def query_workbook_versions(self, workbook_ids):
+        """Construct the cheap probe query deciding which workbooks need the deep metadata query."""
+        workbook_id_json = json.dumps(workbook_ids)
+        return f"""
+            {{
+                workbooks(filter: {{ idWithin: {workbook_id_json} }}) {{
+                    id
+                    updatedAt
+                    embeddedDatasources {{ id updatedAt }}
+                    upstreamDatasources {{ id updatedAt }}
+                }}
+            }}
+            """
+
+    def query_datasource_versions(self, datasource_ids):
+        """Construct the cheap probe query deciding which datasources need the deep metadata query."""
+        datasource_id_json = json.dumps(datasource_ids)
+        return f"""
+            {{
+                publishedDatasources(filter: {{ idWithin: {datasource_id_json} }}) {{
+                    id
+                    updatedAt
+                    downstreamWorkbooks {{ id updatedAt }}
+                }}
+            }}
+            """
+
+    def _snapshot_site(self):
+        return f"{self.auth_client.server_url}|{self.auth_client.site_id}"
+
+    def _cached_snapshot_owner(self):
+        """(owner, token scope): owner is None until the caller's session has been resolved."""
+        user_id = getattr(self.auth_client, 'user_id', None)  # set by sign_in()
+        token_scope = caller_scope(self.auth_client.auth_token)
+        return user_id or _snapshot_owners.get(token_scope), token_scope
+
+    @staticmethod
+    def _owner_from_session(response, token_scope):
+        """Tableau user id from a `sessions/current` response; the session itself when it cannot be read."""
+        try:
+            response.raise_for_status()
+            owner = response.json()['session']['user']['id']
+        except Exception as e:
+            logging.warning(f'Could not resolve the current Tableau user ({e}); snapshots scoped to this session')
+            owner = f'session:{token_scope}'
+        _snapshot_owners[token_scope] = owner
+        return owner
+
+    def _snapshot_owner(self):
+        """
+        Owner of the caller's metadata snapshots: the Tableau user id, so a cached
+        node (and its permission-filtered lineage) is only served back to its user.
+        """
+        owner, token_scope = self._cached_snapshot_owner()
+        if owner is not None:
+            return owner
+        url = f'{self.auth_client.server_url}/api/{self.auth_client.api_version}/sessions/current'
+        headers = dict(self.headers, **{'X-Tableau-Auth': self.auth_client.auth_token})
+        try:
+            response = self.session.get(url, headers=headers)
+        except requests.exceptions.RequestException as e:
+            logging.warning(f'Could not resolve the current Tableau user ({e}); snapshots scoped to this session')
+            return f'session:{token_scope}'
+        return self._owner_from_session(response, token_scope)
+
+    def _fetch_with_snapshots(self, result_key, ids, build_probe, build_query, node_cost):
+        """
+        Deep metadata for `ids`, re-fetching only the entities whose probe
+        fingerprint changed since their cached snapshot.
+        """
+        planner = self.planner_class(self)
+        cache = get_snapshot_cache()
+        if cache is None:
+            return planner.run(build_query, ids, result_key, node_cost)
+
+        probe_cost = TableauConfigManager().get_query_planner_settings()['probe_node_cost']
+        probe = planner.run(build_probe, ids, result_key, probe_cost)
+        fingerprints = {node['id']: fingerprint(node) for node in probe['data'][result_key] if node.get('id')}
+
+        site, owner = self._snapshot_site(), self._snapshot_owner()
+        cached = cache.get_many(site, owner, result_key, fingerprints)
+        stale = [entity_id for entity_id in fingerprints if entity_id not in cached]
+        fetched = planner.run(build_query, stale, result_key, node_cost)['data'][result_key] if stale else []
+        cache.put_many(site, owner, result_key, [
+            (node['id'], fingerprints[node['id']], node) for node in fetched if node.get('id') in fingerprints
+        ])
+
+        logging.info(f"{result_key}: {len(cached)} from snapshot cache, {len(stale)} fetched")
+        return planner._merge([list(cached.values()), fetched], ids, result_key)
+
+    def fetch_workbook_metadata(self, workbook_ids):
+        """Workbook metadata (deep query in planned chunks, unchanged workbooks from the snapshot cache)."""
+        node_cost = TableauConfigManager().get_query_planner_settings()['workbook_node_cost']
+        return self._fetch_with_snapshots(
+            'workbooks', workbook_ids, self.query_workbook_versions, self.query_workbook_metadata, node_cost
+        )
+
+    def fetch_datasource_metadata(self, datasource_ids):
+        """Datasource metadata (deep query in planned chunks, unchanged datasources from the snapshot cache)."""
+        node_cost = TableauConfigManager().get_query_planner_settings()['datasource_node_cost']
+        return self._fetch_with_snapshots(
+            'publishedDatasources', datasource_ids, self.query_datasource_versions,
+            self.query_datasource_metadata, node_cost
+        )
+
+    def query_workbooks_by_luid(self, workbook_luids):
+        """Construct a query that resolves many workbook LUIDs in one round trip."""
+        workbook_luid_json = json.dumps(workbook_luids)  # Convert workbook LUIDs to JSON format
+        try:
+            query = f"""
+            {{
+                workbooks(filter: {{ luidWithin: {workbook_luid_json} }}) {{
+                    id
+                    luid
+                    name
+                    projectName
+                    projectVizportalUrlId
+                }}
+            }}
+            """
+            return query
+        except Exception as e:
+            logging.critical(f'Runtime Critical Error: {e}')
+            raise
+
+    def _get_workbook_views(self, base, wb_luid, workbook, limiter, headers):
+        """Fetch the views (with usage) of one workbook and build its usage rows."""
+        try:
+            usage_url = f"{base}/workbooks/{wb_luid}/views?includeUsageStatistics=true"
+            limiter.acquire()
+            views_res = self.session.get(usage_url, headers=headers)
+            if views_res.status_code == 404:
+                logging.warning(
+                    "Views for workbook %s not found – skipping usage.",
+                    wb_luid,
+                )
+                return []
+            views_res.raise_for_status()
+            views = views_res.json()["views"]["view"]
+
+            rows = []
+            for v in views:
+                usage = v.get("usage", {})
+                rows.append({
+                    "project_id": workbook["projectVizportalUrlId"],
+                    "project_name": workbook["projectName"],
+                    "workbook_id": workbook["id"],
+                    "workbook_name": workbook["name"],
+                    "view_id": v["id"],
+                    "view_name": v["name"],
+                    "created_at": v["createdAt"],
+                    "updated_at": v["updatedAt"],
+                    "total_view_count": int(usage.get("totalViewCount", 0)),
+                })
+            return rows
+
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Request Error for workbook {wb_luid}: {e}")
+            return []  # skip this workbook on error
+
     def get_usage_stats_wb(self, workbook_luids):
+        """
+        Build usage-statistics rows for the given workbooks.
 
+        All workbooks are resolved with one batched `luidWithin` GraphQL query, then the
+        per-workbook REST `/views` calls are fanned out over a bounded thread pool that
+        shares the site's rate limiter. Workbooks that are missing or fail are skipped.
+        """
         try:
             if self.auth_client.auth_token is None:
                 logging.warning("You are not signed in.")
                 raise RuntimeError("User is not authenticated.")
-    
-            self.headers["X-Tableau-Auth"] = self.auth_client.auth_token
-            self.headers["Content-Type"] = "application/json"
+
+            if not workbook_luids:
+                return []
+
+            # Per-call headers: the client may be shared, its default headers never carry a token
+            headers = dict(self.headers, **{"X-Tableau-Auth": self.auth_client.auth_token})
             base = f"{self.auth_client.server_url}/api/{self.auth_client.api_version}/sites/{self.auth_client.site_id}"
+            limiter = get_site_rate_limiter(self.auth_client.site_id)
+
+            # 1) Resolve every workbook in a single GraphQL round trip
+            limiter.acquire()
+            workbook_response = self.send_request(self.query_workbooks_by_luid(list(workbook_luids)))
+            workbooks = {
+                wb["luid"]: wb
+                for wb in workbook_response.get("data", {}).get("workbooks", [])
+            }
+
+            # 2) Views + usage (REST), in parallel, keeping the caller's workbook order
+            targets = [luid for luid in workbook_luids if luid in workbooks]
+            max_workers = TableauConfigManager().get_concurrency_settings()["max_workers"]
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets) or 1))) as executor:
+                results = executor.map(
+                    lambda luid: self._get_workbook_views(base, luid, workbooks[luid], limiter, headers),
+                    targets,
+                )
+                all_rows = [row for rows in results for row in rows]
 
-            all_rows = []
-            for wb_luid in workbook_luids:
-                try:
-                    # 1) Workbook metadata (REST)
-                    query = f"""
-                    {{
-                        workbooks(filter: {{ luid: "{wb_luid}" }}) {{
-                            id
-                            name
-                            projectName
-                            projectVizportalUrlId
-                    }}
-                    }}
-                    """
-                    workbook_response = self.send_request(query)
-
-                    workbooks = workbook_response.get("data", {}).get("workbooks", [])
-
-                    if not workbooks:
-                        continue
-
-                    workbook_id = workbooks[0]["id"]
-                    workbook_name = workbooks[0]["name"]
-                    project_name = workbooks[0]["projectName"]
-                    project_id = workbooks[0]["projectVizportalUrlId"]
-
-
-                    # 2) Datasources from Metadata API (GraphQL) instead of /connections
-                    #datasource_names = self._get_datasources_from_metadata(wb_luid)
-        
-                    # 3) Views + usage (REST)
-                    usage_url = f"{base}/workbooks/{wb_luid}/views?includeUsageStatistics=true"
-                    views_res = requests.get(usage_url, headers=self.headers)
-                    if views_res.status_code == 404:
-                        logging.warning(
-                            "Views for workbook %s not found – skipping usage.",
-                            wb_luid,
-                        )
-                        continue
-                    views_res.raise_for_status()
-                    views = views_res.json()["views"]["view"]
-        
-                    # 4) Build rows
-                    for v in views:
-                        usage = v.get("usage", {})
-                        row = {
-                            "project_id": project_id,
-                            "project_name": project_name,
-                            "workbook_id": workbook_id,
-                            "workbook_name": workbook_name,
-                            #"datasources": datasource_names,
-                            "view_id": v["id"],
-                            "view_name": v["name"],
-                            "created_at": v["createdAt"],
-                            "updated_at": v["updatedAt"],
-                            "total_view_count": int(usage.get("totalViewCount", 0)),
-                        }
-                        all_rows.append(row)
-
-                except requests.exceptions.RequestException as e:
-                    logging.error(f"Request Error for workbook {wb_luid}: {e}")
-                    continue  # skip this workbook on error
-        
             logging.info("Request successful, processing response.")
 
             return all_rows
-    
+
         except requests.exceptions.RequestException as e:
             logging.error(f"Request Error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+class AsyncTableauQueryClient(TableauQueryClient):
+    """
+    asyncio variant of TableauQueryClient: `send_request`, `fetch_*_metadata` and
+    `get_usage_stats_wb` are awaitable and `iter_*_pages` are async iterators.
+    """
+
+    planner_class = AsyncMetadataQueryPlanner
+    OFFLOAD_DECODE_BYTES = 1 << 20  # responses at least this large are decoded in a worker thread
+
+    def __init__(self, auth: AsyncTableauAuthClient, client: AsyncHttpClient | None = None):
+        super().__init__(auth, session=auth.session)
+        self.client = client or auth.client  # Share the auth client's async pool
+
+    async def send_request(self, query):
+        """Send a GraphQL query (coalesced with identical in-flight queries) and return the JSON response."""
+        if self.auth_client.auth_token is None:
+            logging.warning('You are not signed in.')
+            raise RuntimeError('User is not authenticated.')
+        return await async_metadata_flight.do(self._coalesce_key(query), lambda: self._post_query(query))
+
+    async def _post_query(self, query):
+        try:
+            url = f'{self.auth_client.server_url}/api/metadata/graphql'
+            headers = dict(self.headers, **{'X-Tableau-Auth': self.auth_client.auth_token})
+            response = await self.client.post(url, json={'query': query}, headers=headers, retry=True)  # Read-only POST
+            response.raise_for_status()
+            logging.info("Request successful, processing response.")
+            if len(response.content) >= self.OFFLOAD_DECODE_BYTES:
+                # Multi-MB bodies are decoded off the event loop
+                return await asyncio.to_thread(loads, response.content)
+            return loads(response.content)
+
+        except httpx.HTTPError as e:
+            logging.error(f'Request Error: {e}')
+            raise
+        except json.JSONDecodeError as e:
+            logging.error(f'JSON Decode Error: {e}')
+            raise
+        except Exception as e:
+            logging.error(f'Runtime Critical Error: {e}')
+            raise
+
+    async def _snapshot_owner(self):
+        """Async variant of TableauQueryClient._snapshot_owner."""
+        owner, token_scope = self._cached_snapshot_owner()
+        if owner is not None:
+            return owner
+        url = f'{self.auth_client.server_url}/api/{self.auth_client.api_version}/sessions/current'
+        headers = dict(self.headers, **{'X-Tableau-Auth': self.auth_client.auth_token})
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logging.warning(f'Could not resolve the current Tableau user ({e}); snapshots scoped to this session')
+            return f'session:{token_scope}'
+        return self._owner_from_session(response, token_scope)
+
+    async def _fetch_with_snapshots(self, result_key, ids, build_probe, build_query, node_cost):
+        """Async variant of TableauQueryClient._fetch_with_snapshots (SQLite access off the event loop)."""
+        planner = self.planner_class(self)
+        cache = get_snapshot_cache()
+        if cache is None:
+            return await planner.run(build_query, ids, result_key, node_cost)
+
+        probe_cost = TableauConfigManager().get_query_planner_settings()['probe_node_cost']
+        probe = await planner.run(build_probe, ids, result_key, probe_cost)
+        fingerprints = {node['id']: fingerprint(node) for node in probe['data'][result_key] if node.get('id')}
+
+        site, owner = self._snapshot_site(), await self._snapshot_owner()
+        cached = await asyncio.to_thread(cache.get_many, site, owner, result_key, fingerprints)
+        stale = [entity_id for entity_id in fingerprints if entity_id not in cached]
+        fetched = (await planner.run(build_query, stale, result_key, node_cost))['data'][result_key] if stale else []
+        await asyncio.to_thread(cache.put_many, site, owner, result_key, [
+            (node['id'], fingerprints[node['id']], node) for node in fetched if node.get('id') in fingerprints
+        ])
+
+        logging.info(f"{result_key}: {len(cached)} from snapshot cache, {len(stale)} fetched")
+        return planner._merge([list(cached.values()), fetched], ids, result_key)
+
+    async def _iter_connection_pages(self, build_query, connection_key):
+        """Follow the `endCursor` of a *Connection query, yielding the nodes of each page."""
+        after = None
+        while True:
+            response = await self.send_request(build_query(after))
+            connection = (response.get('data') or {}).get(connection_key) or {}
+            yield connection.get('nodes') or []
+
+            page_info = connection.get('pageInfo') or {}
+            if not page_info.get('hasNextPage') or not page_info.get('endCursor'):
+                break
+            after = page_info['endCursor']
+
+    async def _get_workbook_views(self, base, wb_luid, workbook, limiter, headers):
+        """Fetch the views (with usage) of one workbook and build its usage rows."""
+        try:
+            usage_url = f"{base}/workbooks/{wb_luid}/views?includeUsageStatistics=true"
+            await limiter.acquire_async()
+            views_res = await self.client.get(usage_url, headers=headers)
+            if views_res.status_code == 404:
+                logging.warning(
+                    "Views for workbook %s not found – skipping usage.",
+                    wb_luid,
+                )
+                return []
+            views_res.raise_for_status()
+            views = views_res.json()["views"]["view"]
+
+            rows = []
+            for v in views:
+                usage = v.get("usage", {})
+                rows.append({
+                    "project_id": workbook["projectVizportalUrlId"],
+                    "project_name": workbook["projectName"],
+                    "workbook_id": workbook["id"],
+                    "workbook_name": workbook["name"],
+                    "view_id": v["id"],
+                    "view_name": v["name"],
+                    "created_at": v["createdAt"],
+                    "updated_at": v["updatedAt"],
+                    "total_view_count": int(usage.get("totalViewCount", 0)),
+                })
+            return rows
+
+        except httpx.HTTPError as e:
+            logging.error(f"Request Error for workbook {wb_luid}: {e}")
+            return []  # skip this workbook on error
+
+    async def get_usage_stats_wb(self, workbook_luids):
+        """Usage-statistics rows of the given workbooks; the `/views` calls run concurrently."""
+        if self.auth_client.auth_token is None:
+            logging.warning("You are not signed in.")
+            raise RuntimeError("User is not authenticated.")
+
+        if not workbook_luids:
+            return []
+
+        headers = dict(self.headers, **{"X-Tableau-Auth": self.auth_client.auth_token})  # per call, never shared
+        base = f"{self.auth_client.server_url}/api/{self.auth_client.api_version}/sites/{self.auth_client.site_id}"
+        limiter = get_site_rate_limiter(self.auth_client.site_id)
+
+        # 1) Resolve every workbook in a single GraphQL round trip
+        await limiter.acquire_async()
+        workbook_response = await self.send_request(self.query_workbooks_by_luid(list(workbook_luids)))
+        workbooks = {
+            wb["luid"]: wb
+            for wb in workbook_response.get("data", {}).get("workbooks", [])
+        }
+
+        # 2) Views + usage (REST), concurrently, keeping the caller's workbook order
+        targets = [luid for luid in workbook_luids if luid in workbooks]
+        semaphore = asyncio.Semaphore(max(1, TableauConfigManager().get_concurrency_settings()["max_workers"]))
+
+        async def views(luid):
+            async with semaphore:
+                return await self._get_workbook_views(base, luid, workbooks[luid], limiter, headers)
+
+        results = await asyncio.gather(*(views(luid) for luid in targets))
+        return [row for rows in results for row in rows]
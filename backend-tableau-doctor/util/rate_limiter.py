@@ -0,0 +1,76 @@
+"""
+Module: rate_limiter
+
+This module provides a thread-safe token-bucket `RateLimiter` and a per-site
+registry so that every worker thread talking to the same Tableau site shares one
+request budget, no matter which client or request started the work.
+
+Usage Example:
+    limiter = get_site_rate_limiter(site_id)
+    limiter.acquire()  # blocks until a request slot is free
+    await limiter.acquire_async()  # same budget, from async code
+    response = session.get(url, headers=headers)
+"""
+
+import asyncio
+import threading
+import time
+
+from util.config_managers.tableau_reader import TableauConfigManager
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _try_take(self):
+        """Consume a token if one is available; otherwise return the seconds to wait."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block until one token is available, then consume it."""
+        if self.rate <= 0:
+            return  # rate limiting disabled
+        while True:
+            wait = self._try_take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Like acquire(), but waits on the event loop instead of blocking a thread."""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._try_take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+_site_limiters: dict[str, RateLimiter] = {}
+_site_limiters_lock = threading.Lock()
+
+
+def get_site_rate_limiter(site_id: str) -> RateLimiter:
+    """Return the shared limiter for a Tableau site, creating it on first use."""
+    with _site_limiters_lock:
+        limiter = _site_limiters.get(site_id)
+        if limiter is None:
+            rate = TableauConfigManager().get_concurrency_settings()['requests_per_second']
+            limiter = RateLimiter(rate)
+            _site_limiters[site_id] = limiter
+        return limiter
@@ -0,0 +1,173 @@
+"""
+Module: session_store
+
+This module keeps the per-session metadata (flattened workbook / datasource rows,
+usage statistics and counts) between the metadata endpoints and the Excel job.
+The store is pluggable so that several uvicorn workers can share sessions:
+
+Backends:
+- MemorySessionStore: process-local BoundedStore with per-session TTL and a
+  byte budget (local development, single worker).
+- RedisSessionStore: one Redis hash per session (`<prefix><session_key>`, one
+  field per metadata type) holding msgpack + zlib compressed payloads, with the
+  session TTL refreshed on every write.
+
+ColumnarRows payloads are serialized as their distinct values and raw code
+buffers, so a stored session costs about as much in Redis as it does in memory.
+
+Configuration (`tableau.session_store` in tableau.yaml, overridable by env):
+- backend: 'memory' or 'redis'            (env SESSION_STORE_BACKEND)
+- url: Redis URL                           (env REDIS_URL)
+- ttl_seconds: lifetime of a session       (env SESSION_STORE_TTL_SECONDS)
+- key_prefix: Redis key prefix
+
+Usage Example:
+    store = get_session_store()
+    store.set(session_key, "workbook", workbook_processed_data)
+    session_data = store.get(session_key)   # {'workbook': {...}, 'datasource': {...}}
+    store.clear(session_key)
+"""
+
+import logging
+import os
+import threading
+import zlib
+
+import msgpack
+
+from core.managers.columnar_rows import ColumnarRows
+from util.bounded_store import BoundedStore
+from util.config_managers.tableau_reader import TableauConfigManager
+
+logger = logging.getLogger(__name__)
+
+_COLUMNAR_EXT = 1  # msgpack extension type code of a ColumnarRows payload
+
+
+# ------------------------------------------------------------------
+# Serialization
+# ------------------------------------------------------------------
+def _encode_ext(obj):
+    if isinstance(obj, ColumnarRows):
+        return msgpack.ExtType(_COLUMNAR_EXT, msgpack.packb(obj.to_state(), use_bin_type=True))
+    raise TypeError(f"Cannot serialize session payload of type {type(obj).__name__}")
+
+
+def _decode_ext(code, data):
+    if code == _COLUMNAR_EXT:
+        return ColumnarRows.from_state(msgpack.unpackb(data, raw=False, strict_map_key=False))
+    return msgpack.ExtType(code, data)
+
+
+def dumps(payload, level=6):
+    """Serialize a session payload to compressed msgpack bytes."""
+    return zlib.compress(msgpack.packb(payload, default=_encode_ext, use_bin_type=True), level)
+
+
+def loads(blob):
+    """Inverse of `dumps`."""
+    return msgpack.unpackb(zlib.decompress(blob), ext_hook=_decode_ext, raw=False, strict_map_key=False)
+
+
+# ------------------------------------------------------------------
+# Backends
+# ------------------------------------------------------------------
+class MemorySessionStore:
+    """
+    Process-local store; payloads are kept as live objects (no serialization)
+    in a BoundedStore, so idle sessions expire and the total stays within budget.
+    """
+
+    def __init__(self, ttl_seconds, max_bytes):
+        self.ttl_seconds = ttl_seconds
+        self._sessions = BoundedStore("sessions", max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()  # serializes read-modify-write of a session's entries
+
+    def set(self, session_key, metadata_type, data):
+        with self._lock:
+            entries = dict(self._sessions.get(session_key) or {})
+            entries[metadata_type] = data
+            self._sessions[session_key] = entries  # re-measured and TTL refreshed
+
+    def get(self, session_key):
+        return dict(self._sessions.get(session_key) or {})
+
+    def clear(self, session_key):
+        with self._lock:  # no set() can re-add entries between the lookup and the delete
+            return self._sessions.pop(session_key, None) is not None
+
+    def metrics(self):
+        return {"backend": "memory", **self._sessions.metrics()}
+
+
+class RedisSessionStore:
+    """Redis hash per session; shared by every worker process pointing at the same Redis."""
+
+    def __init__(self, client, ttl_seconds, key_prefix="tableau-doctor:session:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url, ttl_seconds, key_prefix="tableau-doctor:session:"):
+        import redis  # only needed when the Redis backend is selected
+        return cls(redis.Redis.from_url(url), ttl_seconds, key_prefix)
+
+    def _key(self, session_key):
+        return f"{self.key_prefix}{session_key}"
+
+    def set(self, session_key, metadata_type, data):
+        key = self._key(session_key)
+        blob = dumps(data)
+        pipe = self.client.pipeline()
+        pipe.hset(key, metadata_type, blob)
+        pipe.expire(key, int(self.ttl_seconds))
+        pipe.execute()
+        logger.info(f"Stored {metadata_type} for session {session_key} in Redis ({len(blob)} bytes)")
+
+    def get(self, session_key):
+        entries = self.client.hgetall(self._key(session_key))
+        return {
+            (field.decode() if isinstance(field, bytes) else field): loads(blob)
+            for field, blob in entries.items()
+        }
+
+    def clear(self, session_key):
+        return bool(self.client.delete(self._key(session_key)))
+
+    def metrics(self):
+        return {"backend": "redis", "ttl_seconds": self.ttl_seconds, "key_prefix": self.key_prefix}
+
+
+# ------------------------------------------------------------------
+# Factory
+# ------------------------------------------------------------------
+_store = None
+_store_lock = threading.Lock()
+
+
+def build_session_store(settings=None):
+    """Create the store selected by config / environment."""
+    settings = dict(settings or TableauConfigManager().get_session_store_settings())
+    backend = os.getenv("SESSION_STORE_BACKEND", settings["backend"]).lower()
+    ttl_seconds = int(os.getenv("SESSION_STORE_TTL_SECONDS", settings["ttl_seconds"]))
+
+    if backend == "redis":
+        url = os.getenv("REDIS_URL", settings["url"])
+        logger.info(f"Using Redis session store at {url} (ttl {ttl_seconds}s)")
+        return RedisSessionStore.from_url(url, ttl_seconds, settings["key_prefix"])
+    if backend != "memory":
+        raise ValueError(f"Unknown session store backend: {backend}")
+    max_bytes = TableauConfigManager().get_memory_limit_settings()["session_max_bytes"]
+    logger.info(f"Using in-memory session store (ttl {ttl_seconds}s, budget {max_bytes} bytes)")
+    return MemorySessionStore(ttl_seconds, max_bytes)
+
+
+def get_session_store():
+    """Return the process-wide session store, building it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = build_session_store()
+    return _store
@@ -0,0 +1,132 @@
+"""
+Module: single_flight
+
+This module coalesces identical concurrent calls: while a call for a key is in
+flight, every other caller asking for the same key waits for it and receives
+the same result (or exception) instead of issuing its own upstream request.
+Nothing is cached once the call completes.
+
+`TableauQueryClient.send_request` uses it with the key
+((site, caller scope), hash of the whitespace-normalized GraphQL query), so
+repeated identical queries of one user (double clicks, several tabs, chunked
+runs overlapping) cost one Metadata API call. The Metadata API filters results
+by the caller's permissions, so by default the scope is the caller's session
+(`caller_scope`); sharing across users of a site is an explicit opt-in
+(`coalesce_scope: site`). Shared results are the same parsed object for every
+caller and must be treated as read-only.
+
+Classes:
+- SingleFlight: for threads (sync clients).
+- AsyncSingleFlight: for coroutines on one event loop (async clients).
+
+Usage Example:
+    key = query_key(site_id, query)
+    response = metadata_flight.do(key, lambda: post(query))
+    response = await async_metadata_flight.do(key, lambda: apost(query))
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def caller_scope(auth_token):
+    """Opaque per-session scope (hash of the Tableau auth token) for caches and coalescing keys."""
+    return hashlib.sha256((auth_token or '').encode('utf-8')).hexdigest()[:32]
+
+
+def query_key(scope, query):
+    """(scope, sha256 of the query with whitespace runs collapsed)."""
+    normalized = _WHITESPACE.sub(' ', query).strip()
+    return scope, hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0  # calls answered by another caller's request
+
+    def do(self, key, fn):
+        """Run fn() once per key among concurrent callers and share its result."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            logger.debug(f"[{self.name}] Joining in-flight call {key[1][:12]}")
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class AsyncSingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}  # (loop, key) -> Future
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Await fn() once per key among concurrent coroutines and share its result."""
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+        future = self._calls.get(slot)
+        if future is not None:
+            self.coalesced += 1
+            logger.debug(f"[{self.name}] Joining in-flight call {key[1][:12]}")
+            # shield: a cancelled follower must not cancel the leader's request
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._calls[slot] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[slot]
+
+
+metadata_flight = SingleFlight('metadata')
+async_metadata_flight = AsyncSingleFlight('metadata')
@@ -0,0 +1,157 @@
+"""
+Module: snapshot_cache
+
+This module keeps a persistent, per-site and per-user SQLite cache of the deep
+Metadata API nodes (workbook and published datasource lineage) so that repeat
+exports only re-fetch the entities that changed.
+
+How it works:
+- Before the deep `idWithin` query, a cheap probe query returns `id`, `updatedAt`
+  and the `updatedAt` of the related entities whose changes show up in the
+  deep node (embedded / upstream datasources of a workbook, downstream
+  workbooks of a datasource). The probe node is hashed into a fingerprint.
+- Entities whose fingerprint matches the cached one are served from the cache;
+  only the others go through the deep query, and their nodes are stored.
+- Entries older than `max_age_seconds` are always re-fetched, as a safety net
+  for lineage changes that no probed `updatedAt` reflects.
+
+Entries are keyed by (site, owner, kind, entity id). A deep node carries nested
+lineage (downstream sheets, workbooks, dashboards) that the Metadata API
+filtered with the permissions of the user who fetched it, so a node is only
+ever served back to that same user (`owner`: the Tableau user id, or a hash of
+the session token when the user cannot be resolved).
+
+Usage Example:
+    cache = get_snapshot_cache()          # None when disabled in tableau.yaml
+    cached = cache.get_many(site, owner, 'workbooks', fingerprints)   # {id: node}
+    cache.put_many(site, owner, 'workbooks', [(id, fingerprint, node), ...])
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from util.config_managers.tableau_reader import TableauConfigManager
+from util.json_decoding import loads
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    site TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (site, owner, kind, entity_id)
+)
+"""
+
+_SQLITE_MAX_VARIABLES = 900  # stay under SQLite's default bound-parameter limit
+
+
+def fingerprint(probe_node):
+    """Stable hash of a probe node (key order and list order of related entities ignored)."""
+    def canonical(value):
+        if isinstance(value, dict):
+            return {k: canonical(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return sorted((canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+        return value
+    blob = json.dumps(canonical(probe_node), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class MetadataSnapshotCache:
+    def __init__(self, path, max_age_seconds):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(snapshots)")]
+            if columns and 'owner' not in columns:
+                # Snapshots written before entries were scoped per user: not safe to serve, drop them
+                conn.execute("DROP TABLE snapshots")
+                logger.info("Dropped metadata snapshots without an owner")
+            conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call: safe from any worker thread
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, site, owner, kind, fingerprints):
+        """Cached nodes {id: node} of `owner` whose stored fingerprint matches and is not too old."""
+        ids = list(fingerprints)
+        oldest = time.time() - self.max_age_seconds
+        hits = {}
+        with self._connect() as conn:
+            for start in range(0, len(ids), _SQLITE_MAX_VARIABLES):
+                chunk = ids[start:start + _SQLITE_MAX_VARIABLES]
+                rows = conn.execute(
+                    f"SELECT entity_id, fingerprint, payload FROM snapshots "
+                    f"WHERE site = ? AND owner = ? AND kind = ? AND fetched_at >= ? "
+                    f"AND entity_id IN ({','.join('?' * len(chunk))})",
+                    [site, owner, kind, oldest, *chunk],
+                ).fetchall()
+                for entity_id, stored_fingerprint, payload in rows:
+                    if stored_fingerprint == fingerprints[entity_id]:
+                        hits[entity_id] = loads(zlib.decompress(payload))
+        return hits
+
+    def put_many(self, site, owner, kind, entries):
+        """Store (id, fingerprint, node) entries fetched by `owner`, replacing older snapshots."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO snapshots "
+                "(site, owner, kind, entity_id, fingerprint, payload, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (site, owner, kind, entity_id, entity_fingerprint,
+                     zlib.compress(json.dumps(node, separators=(',', ':')).encode('utf-8')), now)
+                    for entity_id, entity_fingerprint, node in entries
+                ],
+            )
+
+    def invalidate(self, site=None):
+        """Drop the snapshots of one site (every user's), or of every site when site is None."""
+        with self._connect() as conn:
+            if site is None:
+                conn.execute("DELETE FROM snapshots")
+            else:
+                conn.execute("DELETE FROM snapshots WHERE site = ?", (site,))
+        logger.info(f"Metadata snapshots invalidated for site {site or 'ALL'}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_snapshot_cache():
+    """Return the process-wide snapshot cache, or None when it is disabled."""
+    global _cache
+    settings = TableauConfigManager().get_snapshot_cache_settings()
+    if not settings['enabled']:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MetadataSnapshotCache(settings['path'], settings['max_age_seconds'])
+                logger.info(f"Metadata snapshot cache at {settings['path']}")
+    return _cache
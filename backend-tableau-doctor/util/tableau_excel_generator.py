@@ -1,302 +1,153 @@
 """
 TableauExcellGenerator Class
 
-This class is responsible for generating and formatting Excel spreadsheets 
-that contain data related to Tableau projects, reports, and workbooks. 
-It utilizes the pandas and openpyxl libraries to handle data and Excel file 
-creation.
+This class is responsible for generating and formatting Excel spreadsheets
+that contain data related to Tableau projects, reports, and workbooks.
+It streams rows through xlsxwriter in constant_memory mode: every sheet is
+written row by row with its formatting applied as the row is written, so the
+file is produced in a single pass and written to disk exactly once.
 
 Attributes:
 - package_list (list): A list of dictionaries, where each dictionary contains
   information about a sheet, including 'sheet_name', 'payload', and 'columns'.
-- output_directory (str): The directory where the generated Excel file will 
+- output_directory (str): The directory where the generated Excel file will
   be saved. Default is './output'.
-- file_path (str): The full path to the generated Excel file, combining the 
+- file_path (str): The full path to the generated Excel file, combining the
   output directory and the file name 'metadata.xlsx'.
-- image_path (str): The path to the logo image that will be added to the 
+- image_path (str): The path to the logo image that will be added to the
   summary sheet.
 
 Methods:
-- __init__(package): Initializes the TableauExcellGenerator with the provided 
+- __init__(package): Initializes the TableauExcellGenerator with the provided
   package list and sets up the output directory and file paths.
-  
-- generate_spreadsheet(): Generates an Excel spreadsheet with multiple sheets 
-  based on the provided package list. Each sheet corresponds to a project and 
-  contains data from the payload. If a sheet's payload is empty, it will be 
-  skipped.
-
-- format_excel(): Applies formatting to the generated Excel spreadsheet. 
-  This includes setting styles for headers, adjusting column widths based on 
-  content, and enabling word wrapping for specific columns (e.g., the "Query" 
-  column in the 'Custom Query Details' sheet).
-
-- generate_summary_sheet(unique_counts): Creates or updates a summary sheet 
-  in the Excel file with counts of workbooks and their types. It adds an image 
-  at the top and formats the sheet with appropriate headers, borders, and 
-  column widths. The counts are based on the provided unique_counts dictionary.
+
+- add_summary_sheet(unique_counts, columns): Registers the counts of the
+  'Summary' sheet (logo, total formulas and one row per workbook). The sheet is
+  written first when the spreadsheet is generated.
+
+- add_rollup_sheet(sheet_name, payload, columns): Registers a rollup sheet
+  (e.g. 'Project Summary'), written right after the Summary sheet.
+
+- generate_spreadsheet(): Generates the Excel spreadsheet: the summary sheet
+  (if registered) followed by one sheet per package entry. Each sheet gets its
+  header styling, borders, conditional green fills (e.g. "Used In Sheet" = Y on
+  'Datasource Details', calculated fields on 'Dashboard Details'), word
+  wrapping ('Custom Query Details') and column widths / row heights (computed
+  up front from the source data, see util.sheet_dimensions) while its rows are
+  streamed. If a sheet's payload is empty, it will be skipped. FlatRowSource
+  and ColumnarRows payloads are streamed without building a DataFrame.
 
 Raises:
-- FileNotFoundError: If the specified file path cannot be found during 
+- FileNotFoundError: If the specified file path cannot be found during
   operations.
 - PermissionError: If there are permission issues when accessing the file.
 - ValueError: If there are issues with the values being processed.
-- IndexError: If there is an attempt to access an index that does not exist 
-  (e.g., when adding counts to the summary sheet).
 - TypeError: If there is a type mismatch when processing the data.
 - Exception: For any other unexpected runtime errors during execution.
 """
 
-import openpyxl.workbook
 import pandas as pd
 import os
 import logging
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side
-from openpyxl.drawing.image import Image
-from util.auth_clients.tableau_auth import TableauAuthClient
+import xlsxwriter
+from PIL import Image
 from util.config_managers.tableau_reader import TableauConfigManager
-from openpyxl.styles import Alignment
+from core.managers.flat_row_source import FlatRowSource
+from core.managers.columnar_rows import ColumnarRows
+from util.sheet_dimensions import column_widths, wrapped_row_heights
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+LIGHT_BLUE = '#ADD8E6'
+LIGHT_GREEN = '#C6EFCE'
+
+# Fixed widths of the 'Custom Query Details' sheet (the Query column holds the SQL text)
+CUSTOM_QUERY_WIDTHS = [20, 20, 38, 20, 38, 20, 100]
+DEFAULT_COLUMN_WIDTH = 13
+EXCEL_MAX_DATA_ROWS = 1048576 - 1  # sheet row limit minus the header row
+
+# Rows that get the green fill: sheet name -> (header, normalized value that triggers it)
+GREEN_ROW_RULES = {
+    'Datasource Details': ('Used In Sheet', 'y'),
+    'Dashboard Details': ('Field Type', 'calculatedfield'),
+}
+
+# Layout of the Summary sheet
+SUMMARY_TOP_HEADER_ROW = 7
+SUMMARY_TABLE_HEADER_ROW = 11
+SUMMARY_HEADERS = [
+    "Total no of Dashboards",
+    "Total no of Reports",
+    "Total no of Report Fields",
+    "Total no of Datasources",
+    "Total no of DB Tables",
+    "Total no of DB Columns",
+    "Total no of Custom SQLs"
+]
+SUMMARY_FORMULA_COLUMNS = ['B', 'C', 'D', 'G', 'H', 'I', 'J']
+LOGO_SIZE = (287, 84)
+
+
 class TableauExcellGenerator:
-    def __init__(self, package):
+    def __init__(self, package, file_tag=None):
         self.package_list = package
         # Use the TableauConfigManager to read config values instead of incorrectly
         # instantiating TableauAuthClient with the class itself.
         config = TableauConfigManager()
         self.output_directory = config.get_output_directory()
         file_Timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
-        self.file_path = f'{self.output_directory}/Tableau_Metadata_{file_Timestamp}.xlsx'
+        # file_tag keeps concurrent jobs started in the same second from sharing a file
+        file_name = f'Tableau_Metadata_{file_Timestamp}' + (f'_{file_tag}' if file_tag else '')
+        self.file_path = f'{self.output_directory}/{file_name}.xlsx'
         self.image_path = config.get_logo_path()
+        self.width_sample_rows = config.get_excel_settings()['width_sample_rows']
+        self.summary = None
+        self.rollup_sheets = []
+
+    def add_summary_sheet(self, unique_counts, columns=None):
+        """Register the Summary sheet content; it is written as the first sheet."""
+        self.summary = (unique_counts or [], columns)
+
+    def add_rollup_sheet(self, sheet_name, payload, columns):
+        """Register a rollup sheet (e.g. 'Project Summary'); rollups follow the Summary sheet."""
+        self.rollup_sheets.append({'sheet_name': sheet_name, 'payload': payload, 'columns': columns})
 
     def generate_spreadsheet(self):
         logging.info(f'Starting to generate spreadsheet: {self.file_path}')
         try:
             # check if the output directory exists, it not create it
             os.makedirs(self.output_directory, exist_ok=True)
-            
-            with pd.ExcelWriter(self.file_path, engine='openpyxl') as writer:
-                logging.info('Opened Excell Writer')
-                
-                for package in self.package_list:
+
+            workbook = xlsxwriter.Workbook(self.file_path, {
+                'constant_memory': True,      # rows are flushed as soon as the next row starts
+                'strings_to_formulas': False,  # field formulas are text, not Excel formulas
+                'strings_to_urls': False,
+            })
+            logging.info('Opened Excell Writer')
+            formats = self._build_formats(workbook)
+
+            try:
+                if self.summary is not None:
+                    self._write_summary_sheet(workbook, formats, *self.summary)
+
+                for package in self.rollup_sheets + list(self.package_list):
                     sheet_name = package['sheet_name']
-                    payload = package['payload']
-                    headers = package['columns']                   
-                    
+                    headers = package['columns']
+
                     logging.info(f'Processing sheet: {sheet_name}')
-                    
-                    # if not package['payload']:
-                    #     logging.info(f'Skipping empty sheet: {sheet_name}')    
-                    #     continue
-                    # # ✅ FIX: Check for empty payload (None, empty list, etc.)
-                    # if not payload or (isinstance(payload, list) and len(payload) == 0):
-                    #     logging.info(f'Skipping empty sheet: {sheet_name}')    
-                    #     continue
-                    
-                    # logging.info(f'Creating DataFrame for sheet: {sheet_name}')
-                    # df = pd.DataFrame(payload)
-                    
-                    # logging.info(f'Writing data to sheet: {sheet_name}')
-                    # df.to_excel(
-                    #     writer,
-                    #     sheet_name=sheet_name,
-                    #     header=headers,
-                    #     index=False
-                    # )
-                    # logging.info(f'Successfully wrote data to sheet: {sheet_name}')
-                    # ✅ ENHANCED FIX: More robust empty payload detection
-                    # Check if payload is None, empty list, empty dict, or falsy
-                    is_empty = False
-                    
-                    if payload is None:
-                        is_empty = True
-                    elif isinstance(payload, (list, tuple)):
-                        is_empty = len(payload) == 0
-                    elif isinstance(payload, dict):
-                        is_empty = len(payload) == 0
-                    elif not payload:  # Catches other falsy values
-                        is_empty = True
-                    
-                    if is_empty:
-                        logging.info(f'Skipping empty sheet: {sheet_name} (payload is empty)')
-                        continue
-                    
-                    logging.info(f'Creating DataFrame for sheet: {sheet_name}')
-                    try:
-                        df = pd.DataFrame(payload)
-                        
-                        # Double-check: if DataFrame is empty after creation, skip it
-                        if df.empty:
-                            logging.info(f'Skipping sheet: {sheet_name} (DataFrame is empty after creation)')
-                            continue
-                        
-                        logging.info(f'Writing data to sheet: {sheet_name}')
-                        df.to_excel(
-                            writer,
-                            sheet_name=sheet_name,
-                            header=headers,
-                            index=False
-                        )
-                        logging.info(f'Successfully wrote data to sheet: {sheet_name}')
-                    except ValueError as ve:
-                        # If pandas fails to create DataFrame or write it, log and skip
-                        logging.warning(f'Skipping sheet {sheet_name} due to ValueError: {ve}')
+                    sheet = self._sheet_rows(sheet_name, package['payload'], headers)
+                    if sheet is None:
                         continue
-                        
-        except FileNotFoundError as e:
-            logging.error(f'File Not Found Error: {e}')
-            raise
-        except PermissionError as e:
-            logging.error(f'Permission Error: {e}')
-            raise
-        except ValueError as e:
-            logging.error(f'Value Error: {e}')
-            raise
-        except pd.errors.EmptyDataError as e:
-            logging.error(f'Pandas: Empty Data Error: {e}')
-            raise
-        except pd.errors.ParserError as e:
-            logging.error(f'Pandas: Parser Error: {e}')
-            raise
-        except Exception as e:
-            logging.critical(f'Runtime Critical Error: {e}')
-            raise
-        
-    def format_excel(self):
-        logging.info(f'Starting to format spreadsheet: {self.file_path}')
 
-        try:
-            # Load the workbook and iterate over each sheet
-            wb = openpyxl.load_workbook(self.file_path)
-
-            # Define the styles
-            bold_font = Font(bold=True)
-            light_blue_fill = PatternFill(start_color='ADD8E6', end_color='ADD8E6', fill_type='solid')
-            green_fill = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')  # light green
-            border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                            top=Side(style='thin'), bottom=Side(style='thin'))
-
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                logging.info(f'Formatting sheet: {sheet_name}')
-
-                # Set starting row for headers and data
-                header_start_row = 1
-                data_start_row = header_start_row + 1
-
-                # Build header map: header name (stripped) -> column index (int)
-                header_map = {}
-                for cell in ws[header_start_row]:
-                    header_value = str(cell.value).strip() if cell.value is not None else ""
-                    if header_value:
-                        header_map[header_value] = cell.col_idx  # col_idx is integer index
-
-                # Apply styles to the header
-                for cell in ws[header_start_row]:
-                    cell.font = bold_font
-                    cell.fill = light_blue_fill
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-
-                # Apply borders to the data rows and apply conditional green-fill rows where required
-                for row_idx in range(data_start_row, ws.max_row + 1):
-                    # Determine whether to color this row green based on rules
-                    apply_green = False
-
-                    if sheet_name == "Datasource Details" and "Used In Sheet" in header_map:
-                        col_idx = header_map["Used In Sheet"]
-                        value = ws.cell(row=row_idx, column=col_idx).value
-                        if isinstance(value, str):
-                            if value.strip().upper() == "Y":
-                                apply_green = True
-                        else:
-                            # In case it's stored as boolean or other type, do a fallback compare
-                            try:
-                                if str(value).strip().upper() == "Y":
-                                    apply_green = True
-                            except Exception:
-                                pass
-
-                    if sheet_name == "Dashboard Details" and "Field Type" in header_map:
-                        col_idx = header_map["Field Type"]
-                        value = ws.cell(row=row_idx, column=col_idx).value
-                        if isinstance(value, str):
-                            if value.strip().lower() == "calculatedfield".lower():
-                                apply_green = True
-                        else:
-                            try:
-                                if str(value).strip().lower() == "calculatedfield".lower():
-                                    apply_green = True
-                            except Exception:
-                                pass
-
-                    # Apply border (and green fill if needed) to every cell in this row
-                    for col_idx in range(1, ws.max_column + 1):
-                        cell = ws.cell(row=row_idx, column=col_idx)
-                        cell.border = border
-                        if apply_green:
-                            cell.fill = green_fill
-
-                # Adjust column width based on content
-                if sheet_name == 'Custom Query Details':
-                    # Enable word wrapping for all columns
-                    for row in ws.iter_rows(min_row=data_start_row, max_row=ws.max_row):
-                        for cell in row:
-                            cell.alignment = Alignment(wrap_text=True, vertical='top')
-                            cell.border = border
-                    
-                    # Set specific widths for each column
-                    ws.column_dimensions['A'].width = 20  # Project ID
-                    ws.column_dimensions['B'].width = 20  # Project
-                    ws.column_dimensions['C'].width = 38  # Workbook ID
-                    ws.column_dimensions['D'].width = 20  # Workbook
-                    ws.column_dimensions['E'].width = 38  # Custom Query ID
-                    ws.column_dimensions['F'].width = 20  # Custom Query
-                    ws.column_dimensions['G'].width = 100  # Query column - main content
-                    
-                    # Auto-adjust row heights based on content
-                    for row_num in range(data_start_row, ws.max_row + 1):
-                        # Calculate required height based on wrapped text
-                        max_lines = 1
-                        for col_num in range(1, ws.max_column + 1):
-                            cell = ws.cell(row=row_num, column=col_num)
-                            if cell.value:
-                                # Estimate number of lines needed
-                                text_length = len(str(cell.value))
-                                col_width = ws.column_dimensions[cell.column_letter].width
-                                estimated_lines = max(1, int(text_length / col_width) + 1)
-                                max_lines = max(max_lines, estimated_lines)
-                        
-                        # Set row height (approximately 15 points per line)
-                        ws.row_dimensions[row_num].height = max_lines * 15
-                else:
-                    for column in ws.columns:
-                        max_length = 0
-                        column_cells = [cell for cell in column]
-                        for cell in column_cells:
-                            try:
-                                if cell.value is not None and len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except Exception:
-                                pass
-
-                        adjusted_width = max_length + 2  # Adding some extra space
-                        # column_cells[0] is the header cell; use its column_letter
-                        try:
-                            col_letter = column_cells[0].column_letter
-                            ws.column_dimensions[col_letter].width = adjusted_width
-                        except Exception:
-                            # fallback if something unexpected happens
-                            pass
-
-                ws.sheet_view.showGridLines = False
-                ws.freeze_panes = ws.cell(row=data_start_row, column=1)
-
-            # Save the formatted workbook
-            wb.save(self.file_path)
-            logging.info(f'Successfully formatted spreadsheet: {self.file_path}')
+                    logging.info(f'Writing data to sheet: {sheet_name}')
+                    self._write_data_sheet(workbook, formats, sheet_name, headers, *sheet)
+                    logging.info(f'Successfully wrote data to sheet: {sheet_name}')
+            finally:
+                # The only write of the file to disk
+                workbook.close()
+
+            logging.info(f'Successfully generated spreadsheet: {self.file_path}')
 
         except FileNotFoundError as e:
             logging.error(f'File Not Found Error: {e}')
@@ -304,158 +155,171 @@ class TableauExcellGenerator:
         except PermissionError as e:
             logging.error(f'Permission Error: {e}')
             raise
-        except Exception as e:
-            logging.critical(f'Runtime Critical Error: {e}')
-            raise
-    
-    def generate_summary_sheet(self, unique_counts, columns=None):
-        try:
-            wb = openpyxl.load_workbook(self.file_path)
-
-            # Check if the 'Summary' sheet already exists
-            if 'Summary' in wb.sheetnames:
-                ws = wb['Summary']
-                # ws.delete_rows(1, ws.max_row)  # clear old content
-            else:
-                ws = wb.create_sheet('Summary', 0)
-
-            # Add the image only if it's not already added
-            if ws._images == []:
-                img = Image(self.image_path)
-                img.width = 287
-                img.height = 84
-                ws.add_image(img, 'A1')
-
-                # Hide gridlines under image (white fill)
-                for row in ws.iter_rows(min_row=1, max_row=6, min_col=1, max_col=5):
-                    for cell in row:
-                        cell.border = None  # Ensure no border
-                        cell.fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-
-            # ---------- Styling ----------
-            header_font = Font(bold=True, size=11)    # header text
-            count_font  = Font(bold=True, size=22, color="FF7030A0")     # count/formula row
-            light_blue_fill = PatternFill(start_color='ADD8E6', end_color='ADD8E6', fill_type='solid')
-            # border = Border(left=Side(style='thin'), right=Side(style='thin'),
-            #                 top=Side(style='thin'), bottom=Side(style='thin'))
-            # Border styles
-            medium_border = Side(style='medium')  # thicker for visible outline
-            no_border = Side(style=None)
-
-            center_alignment = Alignment(horizontal="center", vertical="center")
-
-            # ---------- Header Row ----------
-            top_header_row = 7
-            headers = [
-                "Total no of Dashboards",
-                "Total no of Reports",
-                "Total no of Report Fields",
-                "Total no of Datasources",
-                "Total no of DB Tables",
-                "Total no of DB Columns",
-                "Total no of Custom SQLs"
-            ]
-
-            for col, header in enumerate(headers, start=1):
-                cell = ws.cell(row=top_header_row, column=col, value=header)
-                cell.font = header_font
-                cell.fill = light_blue_fill
-                cell.alignment = center_alignment
-                #cell.border = border
-
-                # Thick verticals + top border; no bottom border (merges visually with count row)
-                cell.border = Border(
-                    left=medium_border,
-                    right=medium_border,
-                    top=medium_border,
-                    bottom=no_border
-                )
-                ws.column_dimensions[cell.column_letter].width = len(header)
-                
-            # ---------- Formula Row ----------
-            header_row = 11
-            formula_row = top_header_row + 1
-            # ---------- Formula Row (Dynamic) ----------
-            data_start_row = header_row + 1
-            data_end_row = header_row + len(unique_counts)
-            formula_columns = ['B', 'C', 'D', 'G', 'H', 'I', 'J']
-            formulas = [
-                f"=SUM({col}{data_start_row}:{col}{data_end_row})"
-                for col in formula_columns
-            ]
-
-            
-            center_alignment = Alignment(horizontal="center", vertical="center")
-            for col, formula in enumerate(formulas, start=1):
-                cell = ws.cell(row=formula_row, column=col, value=formula)
-                cell.font = count_font
-                cell.alignment = center_alignment  # centered horizontally & vertically
-                cell.fill = light_blue_fill
-                # Thick verticals + bottom border; no top border (merges visually with header)
-                cell.border = Border(
-                    left=medium_border,
-                    right=medium_border,
-                    top=no_border,
-                    bottom=medium_border
-                )
- 
-            # Define styles
-            bold_font = Font(bold=True)
-            light_blue_fill = PatternFill(start_color='ADD8E6', end_color='ADD8E6', fill_type='solid')
-            border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                            top=Side(style='thin'), bottom=Side(style='thin'))
- 
-            # Determine columns from unique_counts (fall back to empty list if none)
-            if unique_counts and isinstance(unique_counts, list) and len(unique_counts) > 0:
-                columns = list(unique_counts[0].keys())
-            else:
-                columns = []
- 
-            for col_idx, col_name in enumerate(columns, start=1):
-                cell = ws.cell(row=header_row, column=col_idx, value=col_name)
-                cell.font = bold_font
-                cell.fill = light_blue_fill
-                cell.border = border
- 
-            # ✅ 4. Write data rows
-            for row_idx, entry in enumerate(unique_counts, start=header_row + 1):
-                for col_idx, col_name in enumerate(columns, start=1):
-                    value = entry.get(col_name, "")
-                    c = ws.cell(row=row_idx, column=col_idx, value=value)
-                    c.border = border
- 
-            # ✅ 5. Auto-fit column width
-            for column in ws.columns:
-                max_len = max((len(str(cell.value)) if cell.value else 0) for cell in column)
-                ws.column_dimensions[column[0].column_letter].width = max_len
-
-            # ---------- Visual Formatting ----------
-            # Match row heights to blend perfectly
-            #ws.row_dimensions[header_row].height = 25
-            #ws.row_dimensions[formula_row].height = 40
-            ws.sheet_view.showGridLines = False
-            #ws.freeze_panes = ws.cell(row=header_row + 1, column=1)
-            ws.freeze_panes = ws.cell(row=top_header_row + 5, column=1)
-
-            # ---------- Save ----------
-            wb.save(self.file_path)
-            logging.info(f"Successfully created the formatted 'Summary' sheet: {self.file_path}")
-
-        except FileNotFoundError as e:
-            logging.error(f'File Not Found Error: {e}')
-            raise
         except ValueError as e:
             logging.error(f'Value Error: {e}')
             raise
-        except IndexError as e:
-            logging.error(f'Index Error: {e}')
-            raise
         except TypeError as e:
             logging.error(f'Type Error: {e}')
             raise
-        except PermissionError as e:
-            logging.error(f'Permission Error: {e}')
-            raise
         except Exception as e:
             logging.critical(f'Runtime Critical Error: {e}')
-            raise
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def _build_formats(workbook):
+        thin = {'border': 1}
+        return {
+            'header': workbook.add_format({**thin, 'bold': True, 'bg_color': LIGHT_BLUE,
+                                           'align': 'left', 'valign': 'vcenter'}),
+            'cell': workbook.add_format(thin),
+            'green': workbook.add_format({**thin, 'bg_color': LIGHT_GREEN}),
+            'wrap': workbook.add_format({**thin, 'text_wrap': True, 'valign': 'top'}),
+            'white': workbook.add_format({'bg_color': '#FFFFFF', 'pattern': 1}),
+            'summary_header': workbook.add_format({
+                'bold': True, 'font_size': 11, 'bg_color': LIGHT_BLUE,
+                'align': 'center', 'valign': 'vcenter',
+                'left': 2, 'right': 2, 'top': 2, 'bottom': 0}),
+            'summary_count': workbook.add_format({
+                'bold': True, 'font_size': 22, 'font_color': '#7030A0', 'bg_color': LIGHT_BLUE,
+                'align': 'center', 'valign': 'vcenter',
+                'left': 2, 'right': 2, 'top': 0, 'bottom': 2}),
+            'table_header': workbook.add_format({**thin, 'bold': True, 'bg_color': LIGHT_BLUE}),
+        }
+
+    @staticmethod
+    def _sheet_rows(sheet_name, payload, headers):
+        """
+        Return (row tuples, measurable source) for a payload, or None when the
+        sheet is skipped. The source is what the sheet dimensions are computed from.
+        """
+        # Row containers from the data managers: streamed row by row, no DataFrame
+        if isinstance(payload, (FlatRowSource, ColumnarRows)):
+            if payload.is_empty():
+                logging.info(f'Skipping empty sheet: {sheet_name} (payload is empty)')
+                return None
+            width = len(payload.columns)
+            rows = source = payload
+        else:
+            if payload is None or (isinstance(payload, (list, tuple, dict)) and len(payload) == 0) or not payload:
+                logging.info(f'Skipping empty sheet: {sheet_name} (payload is empty)')
+                return None
+            df = pd.DataFrame(payload)
+            # Double-check: if DataFrame is empty after creation, skip it
+            if df.empty:
+                logging.info(f'Skipping sheet: {sheet_name} (DataFrame is empty after creation)')
+                return None
+            width = len(df.columns)
+            df = source = df.astype(object).where(pd.notna(df), None)
+            rows = df.itertuples(index=False, name=None)
+
+        if len(headers) != width:
+            # Same rule pandas applied to header aliases
+            logging.warning(f'Skipping sheet {sheet_name}: writing {width} cols but got {len(headers)} aliases')
+            return None
+        return rows, source
+
+    @staticmethod
+    def _cell_value(value):
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return value
+        return str(value)
+
+    def _write_data_sheet(self, workbook, formats, sheet_name, headers, rows, source):
+        ws = workbook.add_worksheet(sheet_name)
+        ws.hide_gridlines(2)
+        ws.freeze_panes(1, 0)
+
+        # Dimensions come from the source data, computed before any row is written
+        wrap_sheet = sheet_name == 'Custom Query Details'
+        if wrap_sheet:
+            widths = list(CUSTOM_QUERY_WIDTHS)
+            widths += [DEFAULT_COLUMN_WIDTH] * max(0, len(headers) - len(widths))
+            heights = wrapped_row_heights(source, widths)
+        else:
+            widths = column_widths(headers, source, sample_rows=self.width_sample_rows)
+            heights = None
+        for col_idx, width in enumerate(widths):
+            ws.set_column(col_idx, col_idx, width)
+
+        green_column, green_value = None, None
+        rule = GREEN_ROW_RULES.get(sheet_name)
+        if rule and rule[0] in headers:
+            green_column = list(headers).index(rule[0])
+            green_value = rule[1]
+
+        ws.write_row(0, 0, list(headers), formats['header'])
+
+        row_idx = 0
+        for row in rows:
+            if row_idx >= EXCEL_MAX_DATA_ROWS:
+                logging.warning(f'Sheet {sheet_name} truncated at {EXCEL_MAX_DATA_ROWS} rows (Excel limit); '
+                                f'use a columnar export format for the full data')
+                break
+            if heights is not None:
+                ws.set_row(row_idx + 1, int(heights[row_idx]))
+                cell_format = formats['wrap']
+            elif green_column is not None and str(row[green_column]).strip().lower() == green_value:
+                cell_format = formats['green']
+            else:
+                cell_format = formats['cell']
+
+            row_idx += 1
+            for col_idx, value in enumerate(row):
+                ws.write(row_idx, col_idx, self._cell_value(value), cell_format)
+        return row_idx
+
+    def _insert_logo(self, ws):
+        with Image.open(self.image_path) as img:
+            pixel_width, pixel_height = img.size
+            dpi_x, dpi_y = img.info.get('dpi', (96, 96))
+        # xlsxwriter scales by the image DPI; aim for the same on-screen size as before
+        ws.insert_image('A1', self.image_path, {
+            'x_scale': LOGO_SIZE[0] / (pixel_width * 96.0 / (dpi_x or 96)),
+            'y_scale': LOGO_SIZE[1] / (pixel_height * 96.0 / (dpi_y or 96)),
+        })
+
+    def _write_summary_sheet(self, workbook, formats, unique_counts, columns=None):
+        logging.info('Writing the Summary sheet')
+        ws = workbook.add_worksheet('Summary')
+        ws.hide_gridlines(2)
+        ws.freeze_panes(SUMMARY_TOP_HEADER_ROW + 4, 0)
+
+        # Determine columns (fall back to the keys of the first entry)
+        if not columns:
+            columns = list(unique_counts[0].keys()) if unique_counts else []
+
+        header_row = SUMMARY_TABLE_HEADER_ROW
+        data_start_row = header_row + 1
+        data_end_row = header_row + len(unique_counts)
+        formulas = [
+            f"=SUM({col}{data_start_row}:{col}{data_end_row})"
+            for col in SUMMARY_FORMULA_COLUMNS
+        ]
+
+        # Column widths (auto-fit to the longest value in each column) are known upfront
+        max_lengths = {}
+        for values in [SUMMARY_HEADERS, formulas, columns] + [
+                [entry.get(col_name, "") for col_name in columns] for entry in unique_counts]:
+            for col_idx, value in enumerate(values):
+                max_lengths[col_idx] = max(max_lengths.get(col_idx, 0), len(str(value)) if value else 0)
+        for col_idx, length in max_lengths.items():
+            ws.set_column(col_idx, col_idx, length)
+
+        # Rows 1-6: white background under the logo
+        self._insert_logo(ws)
+        for row_idx in range(0, SUMMARY_TOP_HEADER_ROW - 1):
+            for col_idx in range(5):
+                ws.write_blank(row_idx, col_idx, None, formats['white'])
+
+        # Total headers and their SUM formulas
+        ws.write_row(SUMMARY_TOP_HEADER_ROW - 1, 0, SUMMARY_HEADERS, formats['summary_header'])
+        for col_idx, formula in enumerate(formulas):
+            ws.write_formula(SUMMARY_TOP_HEADER_ROW, col_idx, formula, formats['summary_count'])
+
+        # Per-workbook table
+        ws.write_row(header_row - 1, 0, columns, formats['table_header'])
+        for row_idx, entry in enumerate(unique_counts, start=header_row):
+            for col_idx, col_name in enumerate(columns):
+                ws.write(row_idx, col_idx, self._cell_value(entry.get(col_name, "")), formats['cell'])
+
+        logging.info("Successfully created the formatted 'Summary' sheet")